@@ -97,21 +97,41 @@
 
 # backend/api/main.py
 from fastapi import FastAPI, UploadFile, Form, Request, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from pathlib import Path
 import shutil
 import time
+import mimetypes
+import json
+import asyncio
 
 from prometheus_client import (
-    Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+    Counter, Histogram, Gauge, CONTENT_TYPE_LATEST
 )
 
 # ---- project-local imports ----
+from backend.api.metrics import RouteMetrics, PromMiddleware, Exposition, mark_process_dead
 from backend.formal_verifier.runner import run_formal
-from backend.inferopt.server import InferService
+from backend.formal_verifier.depth import run_adaptive
+from backend.formal_verifier.cache import CACHE as FORMAL_CACHE
+from backend.formal_verifier.jobs import SCHEDULER as FORMAL_JOBS
+from backend.formal_verifier.batch import run_batch
+from backend.formal_verifier.engines import STATS as FORMAL_ENGINES
+from backend.formal_verifier.workspace import WORKSPACE as FORMAL_WORKSPACE
+from backend.formal_verifier.incremental import PROOFS as FORMAL_PROOFS
+from backend.formal_verifier.templates import template_stats, design_modules
+from backend.formal_verifier.logreport import report as formal_log_report
+from backend.formal_verifier.artifacts import VARIANTS as ARTIFACT_VARIANTS, pick_encoding
+from backend.formal_verifier.vcd import vcd_index
+from backend.common.history import HISTORY
+from backend.common import tracing
+from backend.common.profiler import PROFILER
+# torch-free: models (and torch) load on first /infer use, see inferopt/registry.py
+from backend.inferopt.registry import REGISTRY as INFER_MODELS
+from backend.inferopt.tuner import TUNERS as INFER_TUNERS
 
 # -----------------------------------------------------------------------------
 # App, static, templates
@@ -121,10 +141,9 @@ app.mount("/static", StaticFiles(directory="backend/static"), name="static")
 templates = Jinja2Templates(directory="backend/templates")
 
 ROOT = Path(__file__).resolve().parents[2]
+DATA = (ROOT / "data").resolve()
 SAMPLES = ROOT / "data" / "rtl_samples"   # contains counter.sv, fsm_buggy.sv, etc.
 
-infer = InferService()
-
 # -----------------------------------------------------------------------------
 # Prometheus: request-level + domain metrics
 # -----------------------------------------------------------------------------
@@ -136,30 +155,32 @@ AEGIS_LATENCY  = Histogram(
     "aegis_latency_ms", "Request latency (ms)",
     buckets=[5,10,25,50,100,200,400,800,1600]
 )
+AEGIS_ROUTE_LATENCY = Histogram(
+    "aegis_route_latency_ms", "Request latency by route template (ms)", ["route", "method"],
+    buckets=[1,5,10,25,50,100,200,400,800,1600]
+)
 
-# Inference
+# Inference (gauge multiprocess modes only matter with PROMETHEUS_MULTIPROC_DIR)
 infer_latency  = Histogram("aegis_infer_latency_ms", "Latency (ms)")
 infer_requests = Counter("aegis_infer_requests_total", "Total inference requests")
-current_batch  = Gauge("aegis_current_batch", "Current batch size")
-cost_per_1k    = Gauge("aegis_cost_per_1k_requests", "Cost per 1000 requests ($)")
-util_pct       = Gauge("aegis_utilization_percent", "Utilization percent")
+current_batch  = Gauge("aegis_current_batch", "Current batch size", multiprocess_mode="mostrecent")
+cost_per_1k    = Gauge("aegis_cost_per_1k_requests", "Cost per 1000 requests ($)", multiprocess_mode="mostrecent")
+util_pct       = Gauge("aegis_utilization_percent", "Utilization percent", multiprocess_mode="mostrecent")
+infer_rps      = Gauge("aegis_infer_rps", "Sliding-window inference rows per second", multiprocess_mode="livesum")
+infer_capacity = Gauge("aegis_infer_capacity_rps", "Measured inference capacity (rows/s at full utilization)",
+                       multiprocess_mode="livesum")
+infer_quantile = Gauge("aegis_infer_latency_quantile_ms", "Sliding-window request latency quantile (ms)", ["quantile"],
+                       multiprocess_mode="livemax")
 
 # Formal
 formal_runs = Counter(
     "aegis_formal_runs_total", "Formal runs by result", ["kind", "result"]
 )
+formal_cache_hits = Counter("aegis_formal_cache_hits_total", "Formal runs served from the result cache")
 
-@app.middleware("http")
-async def _prom_mw(request: Request, call_next):
-    t0 = time.time()
-    resp = await call_next(request)
-    dt_ms = (time.time() - t0) * 1000.0
-    try:
-        AEGIS_REQUESTS.labels(request.url.path, request.method, str(resp.status_code)).inc()
-        AEGIS_LATENCY.observe(dt_ms)
-    except Exception:
-        pass
-    return resp
+# Labels use the matched route template, so /artifact?..., /formal/jobs/{job_id} etc. stay bounded
+app.add_middleware(PromMiddleware, metrics=RouteMetrics(AEGIS_REQUESTS, AEGIS_LATENCY, AEGIS_ROUTE_LATENCY))
+METRICS_EXPOSITION = Exposition()
 
 # -----------------------------------------------------------------------------
 # Models
@@ -173,6 +194,15 @@ class FormalReq(BaseModel):
     clk: str | None = None
     rst: str | None = None
     kind: str = "prove"           # "prove" | "cover" (used when rtl_path is omitted)
+    force: bool = False           # bypass the formal result cache
+    engines: list[str] | None = None  # e.g. ["smtbmc yices"]; default: fastest seen, else z3
+    portfolio: bool = False       # race several engines, first conclusive verdict wins
+    depth: int = 20
+    incremental: bool = False     # reuse verdicts whose cone of influence is unchanged
+    properties: list[str] | None = None  # property templates (GET /formal/templates); default per mode
+    adaptive: bool = False        # depth ladder (BMC -> k-induction) instead of one fixed depth
+    budget_s: float | None = None # adaptive: wall-time budget (default AEGIS_FORMAL_BUDGET_S)
+    max_depth: int | None = None  # adaptive: depth cap (default AEGIS_FORMAL_MAX_DEPTH)
 
 # -----------------------------------------------------------------------------
 # Routes
@@ -186,17 +216,22 @@ def health():
     return {"status": "ok"}
 
 @app.get("/metrics")
-def metrics():
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+def metrics(request: Request):
+    # Rendered at most once per AEGIS_METRICS_TTL_S (default 1 s, well under the 5 s scrape interval)
+    body, encoding = METRICS_EXPOSITION.render(gzip_ok="gzip" in request.headers.get("accept-encoding", ""))
+    headers = {"Content-Encoding": encoding, "Vary": "Accept-Encoding"} if encoding else None
+    return Response(body, media_type=CONTENT_TYPE_LATEST, headers=headers)
 
 # ---------- FORMAL ----------
-@app.post("/formal/run")
-def formal_run(req: FormalReq):
+def _resolve_formal(req: FormalReq):
     """
     If req.rtl_path is provided, run formal on that RTL (your current behavior).
     If not, run using built-in samples based on req.kind:
       - prove  => counter.sv (top='counter')
-      - cover  => fsm_buggy.sv (runner generates/uses the right harness on your side)
+      - cover  => fsm_buggy.sv (top='fsm_buggy')
+    The harness is generated from the top's ports. An explicit `kind` sets the
+    mode; with rtl_path and no kind the mode is picked from the interface.
+    Returns (kind, params); the caller checks that params["rtl_path"] exists.
     """
     kind = (req.kind or "prove").lower()
     if kind not in {"prove", "cover"}:
@@ -210,30 +245,48 @@ def formal_run(req: FormalReq):
     else:
         rtl_path = SAMPLES / ("counter.sv" if kind == "prove" else "fsm_buggy.sv")
 
-    if not rtl_path.exists():
-        return JSONResponse({"error": f"rtl_path not found: {rtl_path}"}, status_code=400)
-
-    # Sensible defaults that match your demos
-    top = req.top or ("counter" if kind == "prove" else "fsm_buggy_tb")
-    clk = req.clk or "clk"
-    rst = req.rst or "rst_n"
-
-    # ---- IMPORTANT FIX ----
-    # Do NOT pass `kind` into run_formal (runner doesn't accept it).
-    result = run_formal(
-        rtl_path=str(rtl_path),
-        top=top,
-        clk=clk,
-        rst=rst,
-    )
-
+    # Sensible defaults that match your demos (clk/rst fall back to the design's own clock/reset ports)
+    return kind, {
+        "rtl_path": str(rtl_path),
+        "top": req.top or ("counter" if kind == "prove" else "fsm_buggy"),
+        "clk": req.clk or "clk",
+        "rst": req.rst or "rst",
+        "mode": kind if (not req.rtl_path or "kind" in req.model_fields_set) else None,
+        "properties": req.properties,
+        **({"adaptive": True, "budget_s": req.budget_s, "max_depth": req.max_depth} if req.adaptive else {}),
+        "engines": req.engines,
+        "portfolio": req.portfolio,
+        "depth": req.depth,
+        "incremental": req.incremental,
+    }
+
+def _count_formal(kind, result):
     # Increment formal metrics (still labeled by the UI's intended kind)
     try:
+        if result.get("cached"):
+            formal_cache_hits.inc()
         status = str(result.get("status", "UNKNOWN")).lower()
         formal_runs.labels(kind=kind, result=status).inc()
     except Exception:
         pass
 
+FORMAL_JOBS.on_finish = lambda job: _count_formal(job.params.get("kind", "prove"), job.result or {"status": "ERROR"})
+
+@app.post("/formal/run")
+def formal_run(req: FormalReq):
+    kind, params = _resolve_formal(req)
+    if not Path(params["rtl_path"]).exists():
+        return JSONResponse({"error": f"rtl_path not found: {params['rtl_path']}"}, status_code=400)
+    try:
+        if params.pop("adaptive", False):
+            params.pop("depth")
+            limits = {k: params.pop(k) for k in ("budget_s", "max_depth")}
+            result = run_adaptive(**params, force=req.force, **{k: v for k, v in limits.items() if v is not None})
+        else:
+            result = run_formal(**params, force=req.force)
+    except ValueError as e:  # top not in the design, unknown property template, no clock port
+        return JSONResponse({"error": str(e)}, status_code=400)
+    _count_formal(kind, result)
     return result
 
 # Small convenience aliases for buttons that POST without a body
@@ -245,6 +298,111 @@ def formal_prove():
 def formal_cover():
     return formal_run(FormalReq(kind="cover"))
 
+@app.get("/formal/engines")
+def formal_engine_stats():
+    # Per-design engine timings gathered from portfolio runs
+    return FORMAL_ENGINES.snapshot()
+
+@app.get("/formal/cache")
+def formal_cache_stats():
+    return FORMAL_CACHE.stats()
+
+@app.delete("/formal/cache")
+def formal_cache_clear():
+    FORMAL_CACHE.clear()
+    return FORMAL_CACHE.stats()
+
+@app.get("/formal/templates")
+def formal_templates(rtl_path: str | None = None):
+    # Property templates + parse/render cache stats; with rtl_path, the parsed module ports
+    out = template_stats()
+    if rtl_path:
+        p = Path(rtl_path) if Path(rtl_path).is_absolute() else ROOT / rtl_path
+        if not p.exists():
+            raise HTTPException(status_code=404, detail=f"rtl_path not found: {rtl_path}")
+        out["modules"] = design_modules(p.read_bytes())
+    return out
+
+@app.get("/formal/proofs")
+def formal_proof_stats():
+    # Incremental mode: verdicts stored per cone of influence
+    return FORMAL_PROOFS.stats()
+
+@app.get("/formal/report")
+def formal_report(records: bool = False, top: int = 20):
+    # Every sby logfile in the workspace, parsed and folded into one summary.
+    # In-process (workers=1): no forking a server that holds model/executor threads.
+    return formal_log_report(FORMAL_WORKSPACE.root, workers=1, records=records, top=top)
+
+# ---------- FORMAL BATCH (regression manifests) ----------
+class FormalBatchReq(BaseModel):
+    rtl: list[str] | str = "data/rtl_samples/*.sv"   # glob(s), relative to the repo root
+    tops: list[str] | None = None
+    modes: list[str] | None = None
+    depths: list[int] | None = None
+    entries: list[dict] | None = None
+    engines: list[str] | None = None
+    portfolio: bool = False
+    clk: str = "clk"
+    rst: str = "rst"
+    parallel: int | None = None
+    force: bool = False
+    incremental: bool = False
+    adaptive: bool = False
+    budget_s: float | None = None
+    max_depth: int | None = None
+
+@app.post("/formal/batch")
+def formal_batch(req: FormalBatchReq):
+    manifest = req.model_dump(exclude_none=True)
+    globs = [manifest["rtl"]] if isinstance(manifest["rtl"], str) else manifest["rtl"]
+    manifest["rtl"] = [g if Path(g).is_absolute() else str(ROOT / g) for g in globs]
+    rep = run_batch(manifest, parallel=req.parallel, force=req.force)
+    for r in rep["entries"]:
+        if not r["shared"]:
+            _count_formal(r["mode"] or "batch", {"status": r["status"], "cached": r["cached"]})
+    return rep
+
+# ---------- FORMAL JOBS (async queue) ----------
+class FormalJobReq(FormalReq):
+    priority: int = 0             # higher runs first
+
+def _job_or_404(job_id: str):
+    job = FORMAL_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+@app.post("/formal/jobs")
+async def formal_job_submit(req: FormalJobReq):
+    kind, params = _resolve_formal(req)
+    if not Path(params["rtl_path"]).exists():
+        raise HTTPException(status_code=400, detail=f"rtl_path not found: {params['rtl_path']}")
+    job = FORMAL_JOBS.submit({**params, "kind": kind}, priority=req.priority, force=req.force)
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/formal/jobs")
+def formal_job_list(status: str | None = None):
+    return {"max_parallel": FORMAL_JOBS.max_parallel, "jobs": FORMAL_JOBS.list(status)}
+
+@app.get("/formal/jobs/{job_id}")
+def formal_job_get(job_id: str):
+    return _job_or_404(job_id).snapshot()
+
+@app.delete("/formal/jobs/{job_id}")
+def formal_job_cancel(job_id: str):
+    _job_or_404(job_id)
+    return FORMAL_JOBS.cancel(job_id).snapshot()
+
+@app.get("/formal/jobs/{job_id}/stream")
+async def formal_job_stream(job_id: str):
+    # Server-sent events: one `data:` frame per state change, heartbeat every 15 s
+    _job_or_404(job_id)
+    async def events():
+        async for snap in FORMAL_JOBS.stream(job_id, timeout=15.0):
+            yield f"data: {json.dumps(snap)}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.post("/formal/upload")
 async def formal_upload(file: UploadFile):
     dst = SAMPLES / file.filename
@@ -252,44 +410,301 @@ async def formal_upload(file: UploadFile):
         shutil.copyfileobj(file.file, f)
     return {"saved_as": str(dst)}
 
+def _artifact_path(rel_path: str):
+    # Formal run artifacts resolve through the workspace index (O(1), no disk walk);
+    # anything else must stay under data/ once resolved (no ../, no symlinks out)
+    p = FORMAL_WORKSPACE.resolve(rel_path)
+    if p is None:
+        p = (DATA / rel_path).resolve()
+        if not p.is_relative_to(DATA):
+            return None
+    return p if p.exists() and p.is_file() else None
+
 @app.get("/artifact")
-def artifact(rel_path: str):
-    p = ROOT / "data" / rel_path
-    if p.exists() and p.is_file():
-        return FileResponse(p)
-    return JSONResponse({"error": "artifact not found"}, status_code=404)
+def artifact(rel_path: str, request: Request):
+    p = _artifact_path(rel_path)
+    if p is None:
+        return JSONResponse({"error": "artifact not found"}, status_code=404)
+    # Range requests get the identity file (FileResponse answers 206 / multipart ranges);
+    # full downloads of text artifacts get a compressed copy, built once per file version
+    enc = pick_encoding(request.headers.get("accept-encoding", ""))
+    if enc is None or "range" in request.headers or not ARTIFACT_VARIANTS.compressible(p):
+        return FileResponse(p, headers={"Vary": "Accept-Encoding"})
+    media_type = mimetypes.guess_type(p.name)[0] or "text/plain"
+    return FileResponse(ARTIFACT_VARIANTS.get(p, enc), media_type=media_type,
+                        headers={"Content-Encoding": enc, "Vary": "Accept-Encoding"})
+
+@app.get("/artifact/vcd")
+def artifact_vcd(rel_path: str, t0: int = 0, t1: int | None = None, signals: str = ""):
+    # Time window / signal subset of a trace, streamed as a standalone VCD
+    p = _artifact_path(rel_path)
+    if p is None or p.suffix.lower() != ".vcd":
+        raise HTTPException(status_code=404, detail="vcd artifact not found")
+    if t1 is not None and t1 < t0:
+        raise HTTPException(status_code=400, detail="t1 must be >= t0")
+    try:
+        idx = vcd_index(p)
+        chunks = idx.window(t0, t1, [s.strip() for s in signals.split(",") if s.strip()])
+        first = next(chunks)  # resolves signal names before the response starts
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    def body():
+        yield first
+        yield from chunks
+    return StreamingResponse(body(), media_type="text/plain",
+                             headers={"Content-Disposition": f'inline; filename="{p.stem}_{t0}-{t1 if t1 is not None else "end"}.vcd"'})
+
+@app.get("/artifact/vcd/index")
+def artifact_vcd_index(rel_path: str):
+    p = _artifact_path(rel_path)
+    if p is None or p.suffix.lower() != ".vcd":
+        raise HTTPException(status_code=404, detail="vcd artifact not found")
+    try:
+        return vcd_index(p).summary()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/artifact/cache")
+def artifact_cache_stats():
+    return ARTIFACT_VARIANTS.stats()
+
+@app.get("/formal/runs")
+def formal_runs_list(status: str | None = None, limit: int = 100):
+    return {"stats": FORMAL_WORKSPACE.stats(), "runs": FORMAL_WORKSPACE.runs(status=status, limit=limit)}
+
+@app.get("/formal/runs/{run_id}")
+def formal_run_get(run_id: str):
+    entry = FORMAL_WORKSPACE.get(run_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="run not found")
+    return entry
+
+@app.post("/formal/gc")
+def formal_gc():
+    removed = FORMAL_WORKSPACE.gc()
+    return {"removed": removed, "stats": FORMAL_WORKSPACE.stats()}
+
+@app.on_event("startup")
+def _start_workspace_gc():
+    FORMAL_WORKSPACE.start_gc()
+
+@app.on_event("shutdown")
+def _close_models():
+    INFER_MODELS.shutdown()  # also persists each model's tuner state
+    HISTORY.flush()
+    mark_process_dead()
+
+# ---------- HISTORY (formal verdicts + inference latencies, sqlite) ----------
+@app.get("/history")
+def history_stats():
+    return HISTORY.stats()
+
+@app.get("/history/formal")
+def history_formal(design_hash: str | None = None, top: str | None = None, status: str | None = None,
+                   since: float | None = None, until: float | None = None, limit: int = 100):
+    return {"runs": HISTORY.formal_runs(design_hash=design_hash, top=top, status=status,
+                                        since=since, until=until, limit=limit)}
+
+@app.get("/history/formal/trend")
+def history_formal_trend(design_hash: str | None = None, top: str | None = None, status: str | None = None,
+                         since: float | None = None, until: float | None = None, bucket_s: int = 3600,
+                         include_cached: bool = False):
+    # Proof time per design over time; `since`/`until` are unix timestamps
+    return {"bucket_s": bucket_s, "trend": HISTORY.formal_trend(design_hash=design_hash, top=top, status=status,
+                                                               since=since, until=until, bucket_s=bucket_s,
+                                                               include_cached=include_cached)}
+
+@app.get("/history/infer/latency")
+def history_infer_latency(model: str | None = None, arm: str | None = None, source: str | None = None,
+                          since: float | None = None, until: float | None = None, bucket_s: int | None = None):
+    # Latency distribution per tuner arm (and per time bucket when bucket_s is given)
+    return {"bucket_s": bucket_s, "arms": HISTORY.infer_latency(model=model, arm=arm, source=source,
+                                                               since=since, until=until, bucket_s=bucket_s)}
+
+# ---------- DEBUG (sampled span traces + on-demand sampling profiler) ----------
+class TraceConfigReq(BaseModel):
+    sample_rate: float  # 0 = only requests sent with "X-Aegis-Trace: 1"
+
+@app.get("/debug/traces")
+def debug_traces(limit: int = 50, name: str | None = None):
+    # Recent sampled requests with their spans, plus per-stage latency histograms
+    return tracing.report(limit=limit, name=name)
+
+@app.post("/debug/traces/config")
+def debug_traces_config(req: TraceConfigReq):
+    return {"sample_rate": tracing.set_sample_rate(req.sample_rate)}
+
+@app.delete("/debug/traces")
+def debug_traces_reset():
+    tracing.STAGES.reset()
+    tracing.RECENT.clear()
+    return {"ok": True}
+
+@app.post("/debug/profile")
+async def debug_profile(seconds: float = 5.0, interval_ms: float = 5.0, top: int = 30, idle: bool = False,
+                        format: str = "json"):
+    # Samples every thread from a worker thread, so the loop keeps serving the load being profiled
+    try:
+        prof = await asyncio.to_thread(PROFILER.capture, seconds=seconds, interval_ms=interval_ms, top=top,
+                                       idle=idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":  # flamegraph.pl / speedscope input
+        return Response("\n".join(prof["collapsed"]) + "\n", media_type="text/plain")
+    return prof
+
+@app.get("/debug/profile")
+def debug_profile_last():
+    if PROFILER.last is None:
+        raise HTTPException(status_code=404, detail="no profile captured yet")
+    return PROFILER.last
 
 # ---------- INFERENCE ----------
+# Every /infer route takes an optional `model` ("name" or "name@version");
+# omitted means the registry's default model.
+async def _infer_svc(model=None):
+    try:
+        return await INFER_MODELS.aget(model)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def _infer_svc_sync(model=None):
+    try:
+        return INFER_MODELS.get(model)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def _publish_telemetry(infer, max_age_s=None):
+    # Memoized inside Telemetry, so calling this per request is cheap
+    st = infer.stats(max_age_s=max_age_s)
+    cost_per_1k.set(st["cost_per_1k_requests"])
+    util_pct.set(st["utilization_percent"])
+    infer_rps.set(st["rps"])
+    if st["capacity_rps"] is not None:
+        infer_capacity.set(st["capacity_rps"])
+    for q in ("p50", "p95", "p99"):
+        if st[f"{q}_ms"] is not None:
+            infer_quantile.labels(q).set(st[f"{q}_ms"])
+    return st
+
 @app.post("/infer/once")
-def infer_once(batch: int = Form(4), workers: int = Form(1)):
+async def infer_once(batch: int = Form(4), workers: int = Form(1), model: str | None = Form(None)):
+    # Concurrent callers are coalesced into one forward by the model's batcher
+    infer = await _infer_svc(model)
     current_batch.set(batch)
     with infer_latency.time():
-        out = infer.infer_once(batch=batch, workers=workers)
+        out = await infer.infer_batched(batch=batch, workers=workers)
+    out.pop("output", None)
     infer_requests.inc(batch)
-    cost_per_1k.set(out["cost_per_1k_requests"])
-    util_pct.set(out["utilization_percent"])
+    _publish_telemetry(infer)
     return out
 
+@app.post("/infer/once/raw")
+async def infer_once_raw(request: Request, in_dim: int | None = None, workers: int = 1, model: str | None = None):
+    """
+    Binary variant: body is little-endian float32 rows (application/octet-stream)
+    or msgpack. Responds with the float32 outputs; metrics go in X-* headers.
+    """
+    infer = await _infer_svc(model)
+    body = await request.body()
+    ctype = request.headers.get("content-type", "application/octet-stream")
+    try:
+        with infer_latency.time():
+            out = await infer.infer_batched(workers=workers, in_dim=in_dim,
+                                            payload=body, content_type=ctype)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    y = out.pop("output")
+    current_batch.set(out["batch"])
+    infer_requests.inc(out["batch"])
+    _publish_telemetry(infer)
+    return Response(y.tobytes(), media_type="application/octet-stream", headers={
+        "X-Batch": str(out["batch"]), "X-Out-Dim": str(y.shape[1]),
+        "X-Latency-Ms": f"{out['latency_ms']:.4f}", "X-Coalesced": str(out["coalesced"]),
+    })
+
 @app.post("/infer/auto")
-def infer_auto(trials: int = Form(20)):
+def infer_auto(trials: int = Form(20), model: str | None = Form(None)):
+    infer = _infer_svc_sync(model)
     r = infer.auto_infer(trials=trials)
     if r.get("results"):
-        last = r["results"][-1]
-        cost_per_1k.set(last["cost_per_1k_requests"])
-        util_pct.set(last["utilization_percent"])
-        current_batch.set(last["batch"])
+        current_batch.set(r["results"][-1]["batch"])
+    r["telemetry"] = _publish_telemetry(infer, max_age_s=0)
     return r
 
+@app.get("/infer/models")
+def infer_models():
+    return INFER_MODELS.snapshot()
+
+@app.post("/infer/models/load")
+def infer_models_load(model: str = Form(...)):
+    # Load + warm up ahead of traffic
+    _infer_svc_sync(model)
+    return INFER_MODELS.snapshot()
+
+@app.delete("/infer/models/{model}")
+def infer_models_unload(model: str):
+    try:
+        return {"unloaded": INFER_MODELS.unload(model)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@app.get("/infer/telemetry")
+def infer_telemetry(window_s: float = 60.0, model: str | None = None):
+    return _infer_svc_sync(model).stats(window_s=window_s, max_age_s=0)
+
 @app.get("/infer/tuner")
-def infer_tuner():
-    return infer.tuner.snapshot()
+def infer_tuner(model: str | None = None):
+    return _infer_svc_sync(model).tuner.snapshot()
+
+@app.get("/infer/batcher")
+def infer_batcher(model: str | None = None):
+    return _infer_svc_sync(model).batcher.snapshot()
+
+@app.get("/infer/executor")
+def infer_executor(model: str | None = None):
+    return _infer_svc_sync(model).executor.snapshot()
+
+@app.get("/infer/buffers")
+def infer_buffers(model: str | None = None):
+    return _infer_svc_sync(model).buffers.snapshot()
+
+@app.post("/infer/batcher")
+def infer_batcher_config(max_batch: int = Form(32), max_wait_ms: float = Form(2.0), runtime: str = Form("eager"),
+                         model: str | None = Form(None)):
+    # Fixed limits; only used while the tuner is disabled
+    from backend.inferopt.model import RUNTIMES
+    if runtime not in RUNTIMES:
+        raise HTTPException(status_code=400, detail=f"unknown runtime: {runtime}")
+    infer = _infer_svc_sync(model)
+    infer.executor.prepare([runtime])
+    infer.batcher.max_batch = max_batch
+    infer.batcher.max_wait_ms = max_wait_ms
+    infer.batcher.runtime = runtime
+    return infer.batcher.snapshot()
 
 @app.post("/infer/tuner/enable")
-def tuner_enable(enable: bool = Form(True)):
+def tuner_enable(enable: bool = Form(True), model: str | None = Form(None)):
+    infer = _infer_svc_sync(model)
     infer.tuner.enabled = enable
     return infer.tuner.snapshot()
 
+@app.post("/infer/tuner/mode")
+def tuner_mode(kind: str = Form("contextual"), slo_ms: float | None = Form(None), model: str | None = Form(None)):
+    # "bandit" (context-free, reward -latency) or "contextual" (rows/s under a p95 SLO)
+    if kind not in INFER_TUNERS:
+        raise HTTPException(status_code=400, detail=f"unknown tuner kind: {kind}")
+    kw = {"slo_ms": slo_ms} if kind == "contextual" and slo_ms is not None else {}
+    return _infer_svc_sync(model).set_tuner(kind, **kw).snapshot()
+
 @app.post("/infer/tuner/policy")
-def tuner_policy(policy: str = Form("ucb1")):
+def tuner_policy(policy: str = Form("ucb1"), model: str | None = Form(None)):
+    infer = _infer_svc_sync(model)
     infer.tuner.policy = policy
     return infer.tuner.snapshot()
@@ -0,0 +1,117 @@
+# backend/api/metrics.py
+import os, gzip, time, threading
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from ..common import tracing
+
+# Set by the launcher for multi-worker uvicorn; every worker then writes its
+# samples to mmap'd files in this dir and /metrics aggregates them.
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+EXPOSITION_TTL_S = float(os.environ.get("AEGIS_METRICS_TTL_S", 1.0))
+UNMATCHED = "<unmatched>"  # 404s etc. share one label value instead of their raw paths
+
+class RouteMetrics:
+    """
+    Request counter + latency histograms labelled by route *template*
+    ("/formal/jobs/{job_id}", never the raw path), so cardinality is bounded
+    by the route table. Label children are bound once per (route, method,
+    status) and reused, so the hot path is a dict hit plus inc/observe.
+    """
+    def __init__(self, requests, latency, route_latency):
+        self.requests = requests            # Counter[path, method, status]
+        self.latency = latency              # Histogram, all routes
+        self.route_latency = route_latency  # Histogram[route, method]
+        self._children = {}
+
+    def observe(self, route, method, status, ms):
+        key = (route, method, status)
+        c = self._children.get(key)
+        if c is None:
+            c = self._children[key] = (self.requests.labels(route, method, str(status)),
+                                       self.route_latency.labels(route, method))
+        c[0].inc()
+        c[1].observe(ms)
+        self.latency.observe(ms)
+
+class PromMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware task/stream wrapping).
+    Latency is time to the response start, as before; streaming bodies
+    (SSE) don't stretch it. Sampled requests (tracing.sampled) also get a
+    span trace, named by route template once routing has matched.
+    """
+    def __init__(self, app, metrics: RouteMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        done = False
+        trace = token = None
+        if tracing.sampled(scope.get("headers", ())):
+            trace, token = tracing.begin(scope.get("path", ""))
+
+        def record(status):
+            nonlocal done
+            done = True
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED
+            try:
+                self.metrics.observe(route, scope["method"], status, (time.perf_counter() - t0) * 1000.0)
+            except Exception:
+                pass
+
+        async def send_wrapper(msg):
+            if msg["type"] == "http.response.start" and not done:
+                record(msg["status"])
+            await send(msg)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not done:
+                record(500)
+            if trace is not None:
+                route = getattr(scope.get("route"), "path", None) or UNMATCHED
+                tracing.finish(trace, token, name=f'{scope["method"]} {route}')
+
+class Exposition:
+    """
+    /metrics body rendered at most once per ttl_s (single-flight; concurrent
+    scrapes share the render), with a gzip variant made on demand per render.
+    In multiprocess mode it collects across workers via MultiProcessCollector.
+    """
+    def __init__(self, ttl_s=EXPOSITION_TTL_S):
+        if MULTIPROC_DIR:
+            self.registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(self.registry)
+        else:
+            self.registry = REGISTRY
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._cached = (float("-inf"), b"", None)  # (rendered_at, body, gzip body)
+        self.renders = 0
+
+    def render(self, gzip_ok=False):
+        at, body, gz = self._cached
+        if time.monotonic() - at >= self.ttl_s:
+            with self._lock:
+                at, body, gz = self._cached
+                if time.monotonic() - at >= self.ttl_s:
+                    body, gz = generate_latest(self.registry), None
+                    at = time.monotonic()
+                    self._cached = (at, body, gz)
+                    self.renders += 1
+        if not gzip_ok:
+            return body, None
+        if gz is None:
+            gz = gzip.compress(body, compresslevel=1)
+            with self._lock:
+                if self._cached[0] == at:
+                    self._cached = (at, body, gz)
+        return gz, "gzip"
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the multiprocess aggregate (call on shutdown)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,221 @@
+# backend/common/history.py
+import os, time, queue, sqlite3, threading
+from pathlib import Path
+
+HISTORY_DB = os.environ.get("AEGIS_HISTORY_DB", "data/cache/history.db")   # "" disables
+RETENTION_DAYS = float(os.environ.get("AEGIS_HISTORY_DAYS", "30"))
+BATCH = 1024             # rows per write transaction
+FLUSH_S = 0.5            # max time a row waits in memory
+PRUNE_EVERY_S = 3600.0
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS formal_runs (
+    id INTEGER PRIMARY KEY, ts REAL NOT NULL, design TEXT, design_hash TEXT, top TEXT, mode TEXT,
+    status TEXT, engine TEXT, depth INTEGER, step INTEGER, walltime_s REAL, cached INTEGER,
+    run_id TEXT, pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS formal_runs_design ON formal_runs(design_hash, ts);
+CREATE INDEX IF NOT EXISTS formal_runs_top ON formal_runs(top, ts);
+CREATE INDEX IF NOT EXISTS formal_runs_status ON formal_runs(status, ts);
+CREATE INDEX IF NOT EXISTS formal_runs_ts ON formal_runs(ts);
+CREATE TABLE IF NOT EXISTS infer_requests (
+    id INTEGER PRIMARY KEY, ts REAL NOT NULL, model TEXT, arm TEXT, source TEXT, rows INTEGER,
+    coalesced INTEGER, latency_ms REAL, forward_ms REAL, pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS infer_requests_arm ON infer_requests(arm, ts);
+CREATE INDEX IF NOT EXISTS infer_requests_model ON infer_requests(model, ts);
+CREATE INDEX IF NOT EXISTS infer_requests_ts ON infer_requests(ts);
+"""
+_INSERT = {
+    "formal_runs": "INSERT INTO formal_runs (ts, design, design_hash, top, mode, status, engine, depth, step, "
+                   "walltime_s, cached, run_id, pid) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+    "infer_requests": "INSERT INTO infer_requests (ts, model, arm, source, rows, coalesced, latency_ms, forward_ms, "
+                      "pid) VALUES (?,?,?,?,?,?,?,?,?)",
+}
+
+def arm_label(arm):
+    """Stable text label for a tuner arm ({"batch": 8, "workers": 2} -> "batch=8,workers=2")."""
+    if not arm:
+        return "untuned"
+    return ",".join(f"{k}={arm[k]}" for k in sorted(arm))
+
+def _where(filters, since=None, until=None):
+    clauses, args = [], []
+    for col, val in filters.items():
+        if val is not None:
+            clauses.append(f"{col} = ?")
+            args.append(val)
+    if since is not None:
+        clauses.append("ts >= ?")
+        args.append(since)
+    if until is not None:
+        clauses.append("ts < ?")
+        args.append(until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+class HistoryStore:
+    """
+    Append-only SQLite (WAL) store of formal verdicts and inference request
+    latencies. record_*() only enqueue a tuple; one writer thread per process
+    drains the queue in transactions of up to BATCH rows every FLUSH_S, so the
+    request path never touches the disk. Readers open their own connection
+    (WAL: they never block the writer), and trends are computed in SQL.
+    Several server workers may share one file; sqlite serializes their writers.
+    """
+    def __init__(self, path=HISTORY_DB, retention_days=RETENTION_DAYS):
+        self.path = Path(path) if path else None
+        self.retention_s = retention_days * 86400.0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._schema_ready = False
+        self.written = 0
+        self.dropped = 0
+        self.last_error = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _put(self, table, row):
+        if self.path is None:
+            return
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._writer, name="history-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put((table, row))
+
+    # ---- writers (request path: enqueue only) ----
+    def record_formal(self, design, design_hash, top, mode, result, depth=None):
+        self._put("formal_runs", (
+            time.time(), design, design_hash, top, mode, result.get("status"), result.get("engine"), depth,
+            result.get("step"), result.get("walltime_s"), int(bool(result.get("cached"))), result.get("run_id"),
+            os.getpid()))
+
+    def record_infer(self, model, arm, latencies_ms, rows, coalesced=None, forward_ms=None, source="batcher"):
+        """One row per request; `latencies_ms` and `rows` are parallel lists."""
+        ts, label, pid = time.time(), arm_label(arm), os.getpid()
+        for lat, n in zip(latencies_ms, rows):
+            self._put("infer_requests", (ts, model, label, source, n, coalesced, lat, forward_ms, pid))
+
+    def _writer(self):
+        conn, pending, last_prune = None, [], 0.0
+        while True:
+            deadline = time.monotonic() + FLUSH_S
+            waiters = []
+            while len(pending) < BATCH:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)  # flush(): write what we have now
+                    break
+                pending.append(item)
+            if pending:
+                try:
+                    conn = conn or self._connect()
+                    with conn:
+                        for table in _INSERT:
+                            rows = [r for t, r in pending if t == table]
+                            if rows:
+                                conn.executemany(_INSERT[table], rows)
+                    self.written += len(pending)
+                except sqlite3.Error as e:
+                    self.dropped += len(pending)
+                    self.last_error = repr(e)
+                pending = []
+            if conn is not None and time.time() - last_prune > PRUNE_EVERY_S:
+                last_prune = time.time()
+                self._prune(conn)
+            for w in waiters:
+                w.set()
+
+    def _prune(self, conn):
+        cutoff = time.time() - self.retention_s
+        try:
+            with conn:
+                conn.execute("DELETE FROM formal_runs WHERE ts < ?", (cutoff,))
+                conn.execute("DELETE FROM infer_requests WHERE ts < ?", (cutoff,))
+        except sqlite3.Error as e:
+            self.last_error = repr(e)
+
+    def flush(self, timeout=10.0):
+        """Block until everything recorded so far is written."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    # ---- queries ----
+    def _query(self, sql, args=()):
+        if self.path is None or not self.path.exists():
+            return []
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(r) for r in conn.execute(sql, args)]
+        finally:
+            conn.close()
+
+    def formal_runs(self, design_hash=None, top=None, status=None, since=None, until=None, limit=100):
+        where, args = _where({"design_hash": design_hash, "top": top, "status": status}, since, until)
+        return self._query(f"SELECT * FROM formal_runs{where} ORDER BY ts DESC LIMIT ?", args + [limit])
+
+    def formal_trend(self, design_hash=None, top=None, status=None, since=None, until=None, bucket_s=3600,
+                     include_cached=False):
+        """Per design/top and time bucket: runs, verdict counts and proof time (fresh runs only by default)."""
+        filters = {"design_hash": design_hash, "top": top, "status": status}
+        if not include_cached:
+            filters["cached"] = 0
+        where, args = _where(filters, since, until)
+        return self._query(f"""
+            SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, design, design_hash, top, mode,
+                   COUNT(*) AS runs, AVG(walltime_s) AS mean_walltime_s, MAX(walltime_s) AS max_walltime_s,
+                   SUM(status = 'PASSED') AS passed, SUM(status = 'FAILED') AS failed,
+                   SUM(status = 'COVERED') AS covered, SUM(status NOT IN ('PASSED', 'FAILED', 'COVERED')) AS other,
+                   MAX(step) AS max_step
+            FROM formal_runs{where}
+            GROUP BY bucket, design_hash, top, mode ORDER BY bucket, design, top""", [bucket_s, bucket_s] + args)
+
+    def infer_latency(self, model=None, arm=None, source=None, since=None, until=None, bucket_s=None):
+        """Latency distribution per arm (optionally per time bucket): count, mean, min/max and quantiles."""
+        where, args = _where({"model": model, "arm": arm, "source": source}, since, until)
+        bucket = "CAST(ts / ? AS INTEGER) * ?" if bucket_s else "NULL"
+        bargs = [bucket_s, bucket_s] if bucket_s else []
+        quantiles = ", ".join(f"MIN(CASE WHEN rn >= {q} * n THEN latency_ms END) AS p{round(q * 100)}_ms"
+                              for q in QUANTILES)
+        # Nearest-rank quantiles with window functions: no per-row transfer into Python
+        return self._query(f"""
+            WITH r AS (
+                SELECT {bucket} AS bucket, model, arm, rows, latency_ms,
+                       ROW_NUMBER() OVER (PARTITION BY {bucket}, model, arm ORDER BY latency_ms) AS rn,
+                       COUNT(*) OVER (PARTITION BY {bucket}, model, arm) AS n
+                FROM infer_requests{where})
+            SELECT bucket, model, arm, COUNT(*) AS requests, SUM(rows) AS rows,
+                   AVG(latency_ms) AS mean_ms, MIN(latency_ms) AS min_ms, MAX(latency_ms) AS max_ms, {quantiles}
+            FROM r GROUP BY bucket, model, arm ORDER BY bucket, model, arm""", bargs * 3 + args)
+
+    def stats(self):
+        counts = {}
+        for table in _INSERT:
+            rows = self._query(f"SELECT COUNT(*) AS n, MIN(ts) AS first, MAX(ts) AS last FROM {table}")
+            counts[table] = rows[0] if rows else {"n": 0, "first": None, "last": None}
+        return {"path": str(self.path) if self.path else None, "written": self.written, "dropped": self.dropped,
+                "queued": self._queue.qsize(), "last_error": self.last_error, "tables": counts}
+
+HISTORY = HistoryStore()
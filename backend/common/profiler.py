@@ -0,0 +1,97 @@
+# backend/common/profiler.py
+import os, sys, time, threading
+from collections import Counter
+
+MAX_SECONDS = 60.0
+DEFAULT_INTERVAL_MS = 5.0
+BUSY_FRACTION = 0.1      # of the interval on-CPU for a thread to count as running
+# innermost frames that mean "blocked right now"
+_IDLE = {"wait", "select", "poll", "sleep", "_worker", "accept", "get", "_wait_for_tstate_lock",
+         "readline", "recv", "recv_into", "read"}
+
+_ROOT = os.getcwd() + os.sep
+
+def _frame_key(code, cache):
+    key = cache.get(code)
+    if key is None:
+        path = code.co_filename
+        key = cache[code] = f"{code.co_name} ({path[len(_ROOT):] if path.startswith(_ROOT) else path}:{code.co_firstlineno})"
+    return key
+
+def _cpu_ns(tid):
+    try:
+        return time.clock_gettime_ns(time.pthread_getcpuclockid(tid))
+    except (AttributeError, OSError):  # not POSIX, or the thread just exited
+        return None
+
+class SamplingProfiler:
+    """
+    py-spy style in-process sampler: the capturing thread snapshots every
+    other thread's stack (sys._current_frames) each interval and counts frames.
+    Unlike cProfile it sees all threads (event loop, threadpool, executor,
+    sby pumps) and costs nothing outside a capture. One capture at a time.
+    Like py-spy without --idle, a thread only counts if its CPU clock advanced
+    over the interval and it isn't sitting in a wait/select/sleep frame.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last = None
+
+    def capture(self, seconds=5.0, interval_ms=DEFAULT_INTERVAL_MS, top=30, idle=False):
+        """Sample for `seconds`; returns the hottest functions (self / inclusive) and collapsed stacks."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("a profile capture is already running")
+        try:
+            return self._capture(min(float(seconds), MAX_SECONDS), max(0.5, float(interval_ms)) / 1000.0, top, idle)
+        finally:
+            self._lock.release()
+
+    def _capture(self, seconds, interval, top, idle):
+        me = threading.get_ident()
+        names, keys_of, cpu = {}, {}, {}
+        own, inclusive, stacks = Counter(), Counter(), Counter()
+        samples = 0
+        t0 = time.perf_counter()
+        deadline = t0 + seconds
+        last = t0
+        while time.perf_counter() < deadline:
+            now = time.perf_counter()
+            busy_ns = max(now - last, interval) * 1e9 * BUSY_FRACTION
+            last = now
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if not idle:
+                    used = _cpu_ns(tid)
+                    prev, cpu[tid] = cpu.get(tid), used
+                    if used is not None and (prev is None or used - prev < busy_ns):
+                        continue
+                    if frame.f_code.co_name in _IDLE:  # ran this interval, but blocked right now
+                        continue
+                chain = []
+                f = frame
+                while f is not None:
+                    chain.append(f.f_code)
+                    f = f.f_back
+                samples += 1
+                keys = [_frame_key(c, keys_of) for c in reversed(chain)]
+                own[keys[-1]] += 1
+                for k in set(keys):
+                    inclusive[k] += 1
+                if tid not in names:
+                    names[tid] = next((t.name for t in threading.enumerate() if t.ident == tid), str(tid))
+                stacks[";".join([names[tid]] + keys)] += 1
+            time.sleep(interval)
+        wall = time.perf_counter() - t0
+        total = max(samples, 1)
+        self.last = out = {
+            "seconds": round(wall, 3), "interval_ms": interval * 1000.0, "samples": samples,
+            "self": [{"frame": k, "samples": n, "pct": round(100.0 * n / total, 2)} for k, n in own.most_common(top)],
+            "inclusive": [{"frame": k, "samples": n, "pct": round(100.0 * n / total, 2)}
+                          for k, n in inclusive.most_common(top)],
+            # flamegraph.pl / speedscope "collapsed" input
+            "collapsed": [f"{k} {n}" for k, n in stacks.most_common(200)],
+        }
+        return out
+
+PROFILER = SamplingProfiler()
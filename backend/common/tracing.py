@@ -0,0 +1,152 @@
+# backend/common/tracing.py
+import os, time, random, bisect, itertools, threading, contextvars
+from collections import deque
+
+SAMPLE_RATE = float(os.environ.get("AEGIS_TRACE_SAMPLE", "0"))   # fraction of requests traced; 0 = off
+FORCE_HEADER = b"x-aegis-trace"   # "X-Aegis-Trace: 1" traces one request regardless of the rate
+KEEP_TRACES = 200
+MAX_SPANS = 512                   # per trace; long jobs stop recording instead of growing
+BUCKETS_MS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_current = contextvars.ContextVar("aegis_trace", default=None)
+_ids = itertools.count(1)
+
+class Trace:
+    """One sampled request: a root name and a flat list of timed spans (perf_counter based)."""
+    __slots__ = ("id", "name", "t0", "wall", "end", "spans")
+
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+        self.t0 = time.perf_counter()
+        self.wall = time.time()
+        self.end = None
+        self.spans = []
+
+    def add(self, stage, t0, t1, **attrs):
+        """Record an externally timed span (e.g. one batched forward shared by several requests)."""
+        if self.end is None and len(self.spans) < MAX_SPANS:
+            self.spans.append((stage, t0, t1, attrs or None))
+        STAGES.observe(stage, (t1 - t0) * 1000.0)
+
+    def snapshot(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "id": self.id, "name": self.name, "at": self.wall, "ms": round((end - self.t0) * 1000.0, 4),
+            "done": self.end is not None,
+            "spans": [{"stage": s, "start_ms": round((a - self.t0) * 1000.0, 4), "ms": round((b - a) * 1000.0, 4),
+                       **(attrs or {})} for s, a, b, attrs in self.spans],
+        }
+
+class _Span:
+    __slots__ = ("trace", "stage", "t0", "attrs")
+
+    def __init__(self, trace, stage, attrs):
+        self.trace, self.stage, self.attrs = trace, stage, attrs
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.stage, self.t0, time.perf_counter(), **self.attrs)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoSpan()
+
+def current():
+    """Active trace of this context, or None (not sampled, or its request already finished)."""
+    t = _current.get()
+    return t if t is not None and t.end is None else None
+
+def span(stage, **attrs):
+    """with span("model.forward"): ...  -- a shared no-op unless this request is being traced."""
+    t = _current.get()
+    if t is None or t.end is not None:
+        return _NOOP
+    return _Span(t, stage, attrs)
+
+def sampled(headers=()):
+    rate = SAMPLE_RATE
+    if rate > 0 and (rate >= 1 or random.random() < rate):
+        return True
+    return any(k == FORCE_HEADER for k, _ in headers)
+
+def begin(name):
+    """Start a trace in this context; returns the token for finish()."""
+    t = Trace(name)
+    return t, _current.set(t)
+
+def finish(trace, token, name=None):
+    trace.end = time.perf_counter()
+    if name:
+        trace.name = name
+    _current.reset(token)
+    STAGES.observe(f"request {trace.name}", (trace.end - trace.t0) * 1000.0)
+    RECENT.append(trace)
+
+class StageHistograms:
+    """Per-stage count / sum / max and fixed-bucket histogram (ms) over every sampled span."""
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = list(buckets)
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, stage, ms):
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                s = self._stages[stage] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            s[0] += 1
+            s[1] += ms
+            s[2] = max(s[2], ms)
+            s[3][bisect.bisect_left(self.buckets, ms)] += 1
+
+    def _quantile(self, counts, n, q):
+        # upper bound of the bucket holding the q-quantile
+        rank, seen = q * n, 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= rank and c:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            items = [(k, v[0], v[1], v[2], list(v[3])) for k, v in self._stages.items()]
+        out = {}
+        for stage, n, total, mx, counts in sorted(items, key=lambda it: -it[2]):
+            out[stage] = {
+                "count": n, "total_ms": round(total, 3), "mean_ms": round(total / n, 4), "max_ms": round(mx, 4),
+                "p50_le_ms": self._quantile(counts, n, 0.5), "p95_le_ms": self._quantile(counts, n, 0.95),
+                "p99_le_ms": self._quantile(counts, n, 0.99),
+                "buckets": {("+Inf" if i == len(self.buckets) else str(self.buckets[i])): c
+                            for i, c in enumerate(counts) if c},
+            }
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+STAGES = StageHistograms()
+RECENT = deque(maxlen=KEEP_TRACES)
+
+def set_sample_rate(rate):
+    global SAMPLE_RATE
+    SAMPLE_RATE = max(0.0, min(1.0, float(rate)))
+    return SAMPLE_RATE
+
+def report(limit=50, name=None):
+    traces = [t for t in list(RECENT) if name is None or name in t.name][-limit:]
+    return {"sample_rate": SAMPLE_RATE, "kept": len(RECENT), "stages": STAGES.snapshot(),
+            "traces": [t.snapshot() for t in reversed(traces)]}
@@ -0,0 +1,105 @@
+# backend/formal_verifier/artifacts.py
+import os, gzip, shutil, hashlib, threading
+from pathlib import Path
+from ..common import tracing
+
+try:  # optional: zstd variants only when the zstandard package is installed
+    import zstandard
+except ImportError:
+    zstandard = None
+
+VARIANT_DIR = Path(os.environ.get("AEGIS_ARTIFACT_CACHE", "data/cache/artifacts"))
+MAX_BYTES = 2 << 30
+MIN_SIZE = 1024          # smaller files aren't worth a Content-Encoding
+COMPRESSIBLE = {".vcd", ".txt", ".log", ".sv", ".v", ".sby", ".il", ".ys", ".smt2", ".smtc", ".yw", ".json", ".xml"}
+CHUNK = 1 << 20
+
+def file_key(path: Path):
+    """Identity of a file's current content: path + size + mtime (so rewritten files get new variants)."""
+    st = path.stat()
+    return hashlib.sha1(f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()
+
+def encodings():
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+def pick_encoding(accept_encoding: str):
+    """Preferred encoding the client accepts (zstd over gzip), or None."""
+    offered = {e.split(";")[0].strip() for e in (accept_encoding or "").lower().split(",")}
+    return next((e for e in encodings() if e in offered), None)
+
+class ArtifactVariants:
+    """
+    Compressed copies of artifacts (gzip, zstd when available), written once per
+    file version to <root>/<file_key>.<enc> and served as plain files. Writes go
+    to a temp file and are renamed, and a per-key lock keeps concurrent first
+    requests from compressing the same trace twice. LRU-by-mtime eviction
+    bounds the directory like FormalCache.
+    """
+    SUFFIX = {"gzip": ".gz", "zstd": ".zst"}
+
+    def __init__(self, root=VARIANT_DIR, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._building = {}
+        self.hits = 0
+        self.builds = 0
+
+    def compressible(self, path: Path):
+        return path.suffix.lower() in COMPRESSIBLE and path.stat().st_size >= MIN_SIZE
+
+    def get(self, path: Path, encoding: str):
+        """Path of the `encoding` variant of `path`, compressing it on first use."""
+        out = self.root / f"{file_key(path)}{self.SUFFIX[encoding]}"
+        if out.exists():
+            os.utime(out)
+            self.hits += 1
+            return out
+        with self._lock:
+            lock = self._building.setdefault(out.name, threading.Lock())
+        with lock:
+            if not out.exists():
+                with tracing.span("artifact.compress", encoding=encoding):
+                    self._build(path, out, encoding)
+        with self._lock:
+            self._building.pop(out.name, None)
+        return out
+
+    def _build(self, path, out, encoding):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(out.name + f".{threading.get_ident()}.tmp")
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            if encoding == "zstd":
+                zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+            else:
+                with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6, mtime=0) as gz:
+                    shutil.copyfileobj(src, gz, CHUNK)
+        tmp.replace(out)
+        self.builds += 1
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            files = []
+            for p in self.root.glob("*.*"):
+                if p.suffix in (".gz", ".zst", ".npz"):
+                    try:
+                        st = p.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, p))
+            files.sort()
+            total = sum(f[1] for f in files)
+            for _, size, p in files:
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+
+    def stats(self):
+        files = list(self.root.glob("*.*")) if self.root.exists() else []
+        return {"variants": len(files), "bytes": sum(p.stat().st_size for p in files if p.exists()),
+                "hits": self.hits, "builds": self.builds, "encodings": list(encodings()),
+                "max_bytes": self.max_bytes}
+
+VARIANTS = ArtifactVariants()
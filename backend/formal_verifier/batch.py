@@ -0,0 +1,230 @@
+# backend/formal_verifier/batch.py
+# python -m backend.formal_verifier.batch manifest.json --out report.json
+import os, sys, json, glob, time, argparse, itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .runner import (
+    sby_binary, prepare_run, cached_result, make_workdir, collect_result, run_portfolio, _run_sby
+)
+from .coverage import SbyLogParser
+from .depth import run_adaptive
+
+DEFAULT_PARALLEL = os.cpu_count() or 1
+
+def expand_manifest(manifest):
+    """
+    Manifest -> list of entries {rtl_path, top, mode, depth, clk, rst}.
+      rtl:    glob or list of globs, e.g. "data/rtl_samples/*.sv"
+      tops:   optional list; defaults to each file's stem
+      modes:  optional list of "prove" / "cover"; default auto (from the top's ports)
+      depths: optional list of ints; default [20]
+      engines: optional engine list, e.g. ["smtbmc yices"]; portfolio: race them
+      properties: optional property template names (templates.PROPERTY_TEMPLATES)
+      entries: optional explicit list, appended as-is (missing keys defaulted)
+      incremental: optional bool; reuse verdicts whose cone of influence is unchanged
+      adaptive: optional bool; depth ladder per (rtl, top, mode) instead of `depths`
+                (budget_s / max_depth cap each entry)
+    """
+    clk, rst = manifest.get("clk", "clk"), manifest.get("rst", "rst")
+    rtl = manifest.get("rtl", [])
+    paths = sorted({p for g in ([rtl] if isinstance(rtl, str) else rtl) for p in glob.glob(g)})
+    modes = manifest.get("modes") or [None]
+    depths = manifest.get("depths") or [20]
+    extra = {k: manifest[k] for k in ("engines", "portfolio", "properties") if manifest.get(k)}
+
+    entries = []
+    for path in paths:
+        tops = manifest.get("tops") or [Path(path).stem]
+        for top, mode, depth in itertools.product(tops, modes, depths):
+            entries.append({"rtl_path": path, "top": top, "mode": mode, "depth": int(depth),
+                            "clk": clk, "rst": rst, **extra})
+    for e in manifest.get("entries", []):
+        # no rtl_path: kept, and reported as an ERROR entry by run_batch
+        entries.append({"rtl_path": None, "top": Path(e["rtl_path"]).stem if e.get("rtl_path") else None,
+                        "mode": None, "depth": 20, "clk": clk, "rst": rst, **extra, **e})
+    return entries
+
+def _run_one(prep):
+    run_id, work_dir = make_workdir(prep)
+    if prep.get("variants"):
+        return run_portfolio(prep, run_id, work_dir)
+    parser = SbyLogParser()
+    out, err, ok = _run_sby(work_dir, parser=parser)
+    return collect_result(prep, run_id, work_dir, out, err, ok, parser=parser)
+
+def _run_adaptive_batch(entries, manifest, parallel, force):
+    # One ladder per distinct (rtl, top, mode): `depths` don't apply, the scheduler picks them
+    limits = {k: manifest[k] for k in ("budget_s", "max_depth") if manifest.get(k) is not None}
+    uniq = list({(e["rtl_path"], e["top"], e["mode"]): e for e in entries}.values())
+
+    def one(e):
+        s = time.time()
+        try:
+            if not e["rtl_path"]:
+                raise ValueError("entry has no rtl_path")
+            r = run_adaptive(e["rtl_path"], top=e["top"], clk=e["clk"], rst=e["rst"], mode=e["mode"], force=force,
+                             engines=e.get("engines"), portfolio=bool(e.get("portfolio")) and sby_binary() is not None,
+                             incremental=bool(manifest.get("incremental")), properties=e.get("properties"), **limits)
+        except (ValueError, OSError) as err:
+            r = {"status": "ERROR", "error": str(err), "cached": False}
+        except Exception as err:
+            r = {"status": "ERROR", "error": repr(err), "cached": False}
+        return e, r, time.time() - s
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        done = list(pool.map(one, uniq))
+    return [{
+        **e, "depth": (r.get("schedule") or {}).get("final_depth"), "status": r.get("status"),
+        "cached": bool(r.get("cached")), "shared": False, "wall_s": round(dt, 3), "run_id": r.get("run_id"),
+        "engine": r.get("engine"), "artifacts": r.get("artifacts", []), "error": r.get("error"),
+        "reverified": r["incremental"]["reverified"] if r.get("incremental") else None,
+        "schedule": r.get("schedule"),
+    } for e, r, dt in done]
+
+def run_batch(manifest, parallel=None, force=False):
+    """
+    Fan a manifest out over a thread pool (each lane drives one sby process).
+    RTL files are read once; entries that render to the same cache key
+    (identical design + harness + .sby) are run once and share the result.
+    """
+    t0 = time.time()
+    entries = expand_manifest(manifest)
+    parallel = parallel or manifest.get("parallel") or DEFAULT_PARALLEL
+    force = force or manifest.get("force", False)
+
+    if manifest.get("adaptive"):
+        report = _run_adaptive_batch(entries, manifest, parallel, force)
+        return {
+            "summary": {
+                "entries": len(report), "unique_runs": sum(len(r["schedule"]["rungs"]) for r in report if r["schedule"]),
+                "cache_hits": sum(1 for r in report if r["cached"]), "shared": 0,
+                "by_status": dict(Counter(r["status"] for r in report)),
+                "parallel": parallel, "wall_s": round(time.time() - t0, 3),
+            },
+            "entries": report,
+        }
+
+    has_sby = sby_binary() is not None
+    rtl_cache = {}
+    preps = []
+    for i, e in enumerate(entries):
+        try:
+            if not e["rtl_path"]:
+                raise ValueError("entry has no rtl_path")
+            if e["rtl_path"] not in rtl_cache:
+                rtl_cache[e["rtl_path"]] = Path(e["rtl_path"]).read_bytes()
+            preps.append(prepare_run(e["rtl_path"], top=e["top"], clk=e["clk"], rst=e["rst"],
+                                     mode=e["mode"], depth=e["depth"], rtl_bytes=rtl_cache[e["rtl_path"]],
+                                     engines=e.get("engines"), portfolio=bool(e.get("portfolio")) and has_sby,
+                                     incremental=bool(manifest.get("incremental")), properties=e.get("properties")))
+        except (ValueError, OSError, KeyError) as err:
+            # e.g. a missing file, or one whose stem isn't a module name: report the entry, run the rest
+            preps.append({"key": f"invalid:{i}", "error": str(err) if not isinstance(err, KeyError) else f"missing {err}"})
+
+    results, todo = {}, {}
+    for prep in preps:
+        key = prep["key"]
+        if key in results or key in todo:
+            continue
+        if "error" in prep:
+            results[key] = ({"status": "ERROR", "error": prep["error"], "cached": False}, 0.0)
+            continue
+        hit = None if force else cached_result(prep)
+        if hit is not None:
+            results[key] = (hit, 0.0)
+        else:
+            todo[key] = prep
+
+    def timed(prep):
+        s = time.time()
+        try:
+            r = _run_one(prep)
+        except Exception as e:
+            r = {"status": "ERROR", "error": repr(e), "cached": False}
+        return prep["key"], r, time.time() - s
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        for key, r, dt in pool.map(timed, todo.values()):
+            results[key] = (r, dt)
+
+    report, seen = [], set()
+    for e, prep in zip(entries, preps):
+        r, dt = results[prep["key"]]
+        report.append({
+            **e, "status": r.get("status"), "cached": bool(r.get("cached")),
+            "shared": prep["key"] in seen, "wall_s": round(dt, 3),
+            "run_id": r.get("run_id"), "engine": r.get("engine"), "artifacts": r.get("artifacts", []),
+            "error": r.get("error"),
+            "reverified": r["incremental"]["reverified"] if r.get("incremental") else None,
+        })
+        seen.add(prep["key"])
+
+    return {
+        "summary": {
+            "entries": len(report), "unique_runs": len(todo),
+            "cache_hits": sum(1 for r in report if r["cached"] and not r["shared"]),
+            "shared": sum(1 for r in report if r["shared"]),
+            "by_status": dict(Counter(r["status"] for r in report)),
+            "parallel": parallel, "wall_s": round(time.time() - t0, 3),
+        },
+        "entries": report,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m backend.formal_verifier.batch",
+                                 description="Run a formal regression manifest.")
+    ap.add_argument("manifest", nargs="?", help="JSON manifest (omit to use --rtl/--tops/...)")
+    ap.add_argument("--rtl", action="append", help="glob of RTL files (repeatable)")
+    ap.add_argument("--tops", help="comma-separated top modules")
+    ap.add_argument("--modes", help="comma-separated modes: prove,cover")
+    ap.add_argument("--depths", help="comma-separated depths")
+    ap.add_argument("--engines", help="comma-separated engines, e.g. 'smtbmc yices,abc pdr'")
+    ap.add_argument("--portfolio", action="store_true", help="race the engines, first verdict wins")
+    ap.add_argument("--properties", help="comma-separated property templates, e.g. 'reset_zero,toggle'")
+    ap.add_argument("--parallel", type=int)
+    ap.add_argument("--force", action="store_true", help="bypass the result cache")
+    ap.add_argument("--incremental", action="store_true", help="reuse proofs of unchanged modules")
+    ap.add_argument("--adaptive", action="store_true", help="escalate depth per entry instead of --depths")
+    ap.add_argument("--budget-s", type=float, help="adaptive: wall-time budget per entry")
+    ap.add_argument("--out", help="write the JSON report here")
+    ap.add_argument("--fail-on", default="ERROR,FAILED", help="statuses that make the exit code 1")
+    args = ap.parse_args(argv)
+
+    manifest = json.loads(Path(args.manifest).read_text()) if args.manifest else {}
+    if args.rtl:
+        manifest["rtl"] = args.rtl
+    if args.tops:
+        manifest["tops"] = args.tops.split(",")
+    if args.modes:
+        manifest["modes"] = args.modes.split(",")
+    if args.depths:
+        manifest["depths"] = [int(d) for d in args.depths.split(",")]
+    if args.engines:
+        manifest["engines"] = args.engines.split(",")
+    if args.portfolio:
+        manifest["portfolio"] = True
+    if args.properties:
+        manifest["properties"] = args.properties.split(",")
+    if args.incremental:
+        manifest["incremental"] = True
+    if args.adaptive:
+        manifest["adaptive"] = True
+    if args.budget_s is not None:
+        manifest["budget_s"] = args.budget_s
+
+    rep = run_batch(manifest, parallel=args.parallel, force=args.force)
+    for r in rep["entries"]:
+        tag = "cached" if r["cached"] else ("shared" if r["shared"] else f"{r['wall_s']:.2f}s")
+        print(f"{r['status']:<8} {r['rtl_path']} top={r['top']} mode={r['mode'] or 'auto'} "
+              f"depth={r['depth']} ({tag})", file=sys.stderr)
+    print(json.dumps(rep["summary"]), file=sys.stderr)
+    if args.out:
+        Path(args.out).write_text(json.dumps(rep, indent=2))
+    else:
+        print(json.dumps(rep, indent=2))
+    bad = {s.strip().upper() for s in args.fail_on.split(",") if s.strip()}
+    return 1 if any(r["status"] in bad for r in rep["entries"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# backend/formal_verifier/cache.py
+import os, json, time, hashlib, subprocess, threading, shutil as _shutil
+from functools import lru_cache
+from pathlib import Path
+from .workspace import WORKSPACE
+
+CACHE_DIR = Path("data/cache/formal")
+MAX_ENTRIES = 512
+MAX_BYTES = 64 * 1024 * 1024
+MAX_AGE_S = 7 * 24 * 3600.0
+CACHEABLE = {"PASSED", "FAILED", "COVERED"}  # never cache ERROR/UNKNOWN (tool missing, crash, ...)
+
+def sby_binary():
+    # AEGIS_SBY_BIN lets CI point at a stub solver when no real toolchain is installed
+    sby_bin = os.environ.get("AEGIS_SBY_BIN") or _shutil.which("sby") or "/opt/homebrew/bin/sby"
+    return sby_bin if Path(sby_bin).exists() else None
+
+def _version(path, flag):
+    try:
+        return subprocess.run([path, flag], capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return "?"
+
+@lru_cache(maxsize=8)
+def _identity(sby_bin):
+    sby = f"sby:{os.path.realpath(sby_bin)}:{_version(sby_bin, '--version')}" if sby_bin else "sby:none"
+    yosys = _shutil.which("yosys")
+    return sby + "|" + (f"yosys:{yosys}:{_version(yosys, '-V')}" if yosys else "yosys:none")
+
+def tool_identity():
+    """Solver/toolchain identity folded into every key: the sby actually run (AEGIS_SBY_BIN included) + yosys."""
+    return _identity(sby_binary())
+
+def stub_toolchain():
+    # sby_stub.py answers --version with "SBY stub": its verdicts are fake and never cached
+    return ":SBY stub|" in tool_identity()
+
+def cache_key(rtl_bytes: bytes, harness: str, sby: str, engine_id: str = ""):
+    h = hashlib.sha256()
+    for part in (rtl_bytes, harness.encode(), sby.encode(), (engine_id or tool_identity()).encode()):
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+class FormalCache:
+    """
+    Content-addressed store of finished formal results, one JSON file per key.
+    Hits touch the file's mtime so eviction (oldest first) behaves like an LRU,
+    bounded by entry count, total bytes and age.
+    """
+    def __init__(self, root=CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, max_age_s=MAX_AGE_S):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return self.root / f"{key}.json"
+
+    def get(self, key):
+        p = self._path(key)
+        try:
+            entry = json.loads(p.read_text())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Stale if too old or its artifacts have since been cleaned up
+        if time.time() - entry.get("stored_at", 0) > self.max_age_s or \
+           not all(WORKSPACE.exists(a) for a in entry["result"].get("artifacts", [])):
+            p.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        os.utime(p)
+        self.hits += 1
+        return entry["result"]
+
+    def put(self, key, result):
+        if result.get("status") not in CACHEABLE or stub_toolchain():
+            return False
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(".tmp")
+        tmp.write_text(json.dumps({"stored_at": time.time(), "result": result}))
+        os.replace(tmp, self._path(key))
+        self.evict()
+        return True
+
+    def evict(self):
+        with self._lock:
+            if not self.root.exists():
+                return 0
+            entries = []
+            for p in self.root.glob("*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+            entries.sort()  # oldest first
+            now = time.time()
+            total = sum(e[1] for e in entries)
+            removed = 0
+            for i, (mtime, size, p) in enumerate(entries):
+                left = len(entries) - i
+                if now - mtime <= self.max_age_s and left <= self.max_entries and total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self):
+        with self._lock:
+            for p in self.root.glob("*.json"):
+                p.unlink(missing_ok=True)
+
+    def stats(self):
+        files = list(self.root.glob("*.json")) if self.root.exists() else []
+        return {
+            "entries": len(files), "bytes": sum(p.stat().st_size for p in files),
+            "hits": self.hits, "misses": self.misses,
+            "max_entries": self.max_entries, "max_bytes": self.max_bytes, "max_age_s": self.max_age_s,
+        }
+
+CACHE = FormalCache()
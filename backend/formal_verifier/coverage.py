@@ -1,34 +1,251 @@
 from pathlib import Path
+from collections import deque
 import re
+import time
+
+# SBY log line: "SBY 12:30:41 [job] <message>"; engine messages "engine_0[.basecase]: <text>",
+# solver progress inside them "##   0:00:03  <text>"
+_LINE = re.compile(r"SBY\s+(\d+):(\d\d):(\d\d) \[[^\]]*\] (.*)")
+_ENGINE_MSG = re.compile(r"(engine_\d+)(?:\.(\w+))?: (.*)")
+_SOLVER = re.compile(r"##\s+(\d+):(\d\d):(\d\d)\s+(.*)")
+_ENGINE_DECL = re.compile(r"(?:smtbmc|abc|aiger|btor|none)\b.*")
+_STEP = re.compile(r"\bstep (\d+)\b")
+_ASSERT_FAILED = re.compile(r"Assert failed in ([^:\s]+): (\S+)(?: \(([^)]*)\))?")
+_COVER = re.compile(r"(Reached|Unreached) cover statement at ([^:\s]+): (\S+)(?: \(([^)]*)\))?(?: in step (\d+))?")
+_TRACE = re.compile(r"(?:Writing trace to VCD file|trace(?: \[[^\]]*\])?): (\S+\.vcd)")
+_RETURNED = re.compile(r"Status returned by engine(?: for (\w+))?: (\w+)")
+_ELAPSED = re.compile(r"Elapsed (clock|process) time \[H:MM:SS \(secs\)\]: (\d+:\d\d:\d\d) \((\d+)\)")
+_SUMMARY_PROP = re.compile(r"(failed assertion|reached cover statement|unreached cover statement)?\s*(\S+) at (\S+)(?: in step (\d+))?$")
+_DONE = re.compile(r"DONE \((\w+), rc=(\d+)\)")
+TAIL_LINES = 50
+MAX_ERRORS = 5
+
+def _secs(h, m, s):
+    return int(h) * 3600 + int(m) * 60 + int(s)
+
+class SbyLogParser:
+    """
+    Single-pass SBY log parser: feed() one line at a time as sby produces it
+    (or from a finished logfile). One prefix regex per line, then the message
+    is dispatched on cheap substring checks to a few precompiled patterns.
+    Keeps a compact structured record: per-property results (keyed by source
+    location), per-engine step/status/time, trace paths, errors, and the
+    verdict from sby's DONE line (cover-mode PASS reads as COVERED).
+    """
+    def __init__(self, tail_lines=TAIL_LINES):
+        self.started = time.time()
+        self.lines = 0
+        self.step = None
+        self.engines = {}
+        self.properties = {}      # location -> {kind, name, module, status, step, engine}
+        self.traces = []
+        self.errors = []
+        self.walltime = None      # "H:MM:SS" as sby prints it
+        self.walltime_s = None
+        self.process_s = None
+        self.rc = None
+        self.done = False
+        self.tail = deque(maxlen=tail_lines)
+        self._verdict = None
+        self._cover_mode = False
+        self._proof = False
+        self._unreached_section = False
+
+    def feed(self, line: str):
+        """Consume one log line; returns True if the status or depth changed."""
+        self.lines += 1
+        line = line.rstrip("\n")
+        self.tail.append(line)
+        before = (self.status, self.step)
+        m = _LINE.match(line)
+        if m:
+            clock, msg = _secs(m.group(1), m.group(2), m.group(3)), m.group(4)
+        else:
+            clock, msg = None, line.strip()
+
+        if msg.startswith("engine_"):
+            e = _ENGINE_MSG.match(msg)
+            if e:
+                self._engine_line(e.group(1), e.group(2), e.group(3), clock)
+        elif msg.startswith("summary: "):
+            self._summary_line(msg[9:])
+        elif msg.startswith("DONE ("):
+            d = _DONE.match(msg)
+            if d:
+                self._verdict, self.rc, self.done = d.group(1), int(d.group(2)), True
+        elif msg.startswith("ERROR:"):
+            self._verdict = "ERROR"  # job-level error (e.g. .sby syntax): sby stops without a DONE line
+        if "ERROR" in msg and len(self.errors) < MAX_ERRORS and not msg.startswith("DONE"):
+            self.errors.append(msg)
+        return (self.status, self.step) != before
+
+    def _engine_line(self, name, phase, text, clock):
+        eng = self.engines.get(name)
+        if eng is None:
+            eng = self.engines[name] = {"engine": None, "step": None, "status": None, "phases": {},
+                                        "time_s": 0.0, "_first": clock}
+        if clock is not None:
+            first = eng["_first"] if eng["_first"] is not None else clock
+            eng["_first"] = first
+            eng["time_s"] = max(eng["time_s"], float((clock - first) % 86400))
+        s = _SOLVER.match(text)
+        if s is not None:
+            eng["time_s"] = max(eng["time_s"], float(_secs(s.group(1), s.group(2), s.group(3))))
+            text = s.group(4)
+            if "step" in text:
+                st = _STEP.search(text)
+                if st and (text.startswith("Checking") or text.startswith("Trying")):
+                    if text.startswith("Checking cover"):
+                        self._cover_mode = True
+                    k = int(st.group(1))
+                    eng["step"] = max(eng["step"] or 0, k)
+                    self.step = max(self.step or 0, k)
+                    return
+            if text.startswith("Assert failed"):
+                a = _ASSERT_FAILED.match(text)
+                if a:
+                    self._prop("assert", a.group(2), a.group(3), a.group(1), "failed", eng["step"], name)
+            elif "cover statement" in text:
+                c = _COVER.match(text)
+                if c:
+                    self._cover_mode = True
+                    reached = c.group(1) == "Reached"
+                    self._prop("cover", c.group(3), c.group(4), c.group(2), "reached" if reached else "unreached",
+                               int(c.group(5)) if c.group(5) else (eng["step"] if reached else None), name)
+            elif "trace" in text:
+                self._trace(text)
+            elif text.startswith("Temporal induction successful"):
+                self._proof = True
+            elif text.startswith("Status: "):
+                eng["phases"][phase or "main"] = text[8:].strip()
+            return
+        if eng["engine"] is None and _ENGINE_DECL.fullmatch(text):
+            eng["engine"] = text
+        elif text.startswith("Status returned"):
+            r = _RETURNED.match(text)
+            if r:
+                eng["status"] = r.group(2).upper()
+                if r.group(1):
+                    eng["phases"][r.group(1)] = r.group(2).lower()
+
+    def _summary_line(self, text):
+        if text.startswith("Elapsed"):
+            e = _ELAPSED.match(text)
+            if e:
+                if e.group(1) == "clock":
+                    self.walltime, self.walltime_s = e.group(2), int(e.group(3))
+                else:
+                    self.process_s = int(e.group(3))
+            return
+        if text.startswith("successful proof"):
+            self._proof = True
+            return
+        if text.startswith("unreached cover statements"):
+            self._unreached_section = True
+            return
+        if "trace" in text and ".vcd" in text:
+            self._trace(text)
+            return
+        if text.startswith("  "):
+            p = _SUMMARY_PROP.match(text.strip())
+            if p:
+                what = p.group(1) or ("unreached cover statement" if self._unreached_section else None)
+                if what:
+                    kind = "assert" if what == "failed assertion" else "cover"
+                    status = {"failed assertion": "failed", "reached cover statement": "reached"}.get(what, "unreached")
+                    if kind == "cover":
+                        self._cover_mode = True
+                    self._prop(kind, p.group(3), p.group(2), None, status,
+                               int(p.group(4)) if p.group(4) else None, None)
+            return
+        self._unreached_section = False
+
+    def _prop(self, kind, location, name, module, status, step, engine):
+        # Engine lines and the summary report the same property; merge by source location
+        p = self.properties.get(location)
+        if p is None:
+            self.properties[location] = {"kind": kind, "name": name, "module": module, "status": status,
+                                         "step": step, "engine": engine}
+            return
+        p["name"] = p["name"] or name
+        p["module"] = p["module"] or module
+        p["engine"] = p["engine"] or engine
+        if step is not None:
+            p["step"] = step
+        if status != "unreached":
+            p["status"] = status
+
+    def _trace(self, text):
+        t = _TRACE.search(text)
+        if t and t.group(1) not in self.traces:
+            self.traces.append(t.group(1))
+
+    @property
+    def status(self):
+        v = self._verdict
+        if v is not None:
+            if v == "PASS":
+                return "COVERED" if self._cover_mode else "PASSED"
+            return {"FAIL": "FAILED", "ERROR": "ERROR"}.get(v, "UNKNOWN")
+        # still running: provisional verdict from what the engines reported so far
+        statuses = [p["status"] for p in self.properties.values()]
+        if "failed" in statuses:
+            return "FAILED"
+        if self._proof:
+            return "PASSED"
+        if "reached" in statuses:
+            return "COVERED"
+        return "UNKNOWN"
+
+    def counts(self):
+        status = self.status
+        c = {"proved": 0, "failed": 0, "covered": 0, "undetermined": 0}
+        for p in self.properties.values():
+            if p["status"] == "reached":
+                c["covered"] += 1
+            elif p["status"] == "failed" or status == "FAILED":
+                c["failed"] += 1        # failed assert, or cover unreachable within the depth
+            else:
+                c["undetermined"] += 1  # unreached when the run didn't finish its bound
+        # sby names only failing/covered properties; a verdict counts at least once
+        if status == "PASSED":
+            c["proved"] = 1
+        elif status == "COVERED":
+            c["covered"] = max(1, c["covered"])
+        elif status == "FAILED":
+            c["failed"] = max(1, c["failed"])
+        elif status == "UNKNOWN":
+            c["undetermined"] = max(1, c["undetermined"])
+        return c
+
+    def result(self):
+        return {"status": self.status, **self.counts(), "walltime": self.walltime}
+
+    def record(self):
+        """Compact structured summary of the whole log."""
+        return {
+            **self.result(), "walltime_s": self.walltime_s, "process_s": self.process_s, "rc": self.rc,
+            "mode": "cover" if self._cover_mode else "prove", "step": self.step,
+            "engines": {n: {k: v for k, v in e.items() if not k.startswith("_")} for n, e in self.engines.items()},
+            "properties": [{"location": loc, **p} for loc, p in self.properties.items()],
+            "traces": self.traces, "errors": self.errors, "lines": self.lines,
+        }
+
+    def live(self):
+        return {
+            "status": self.status if (self.done or self.status != "UNKNOWN") else "RUNNING",
+            "done": self.done, "step": self.step,
+            "engines": {n: {k: v for k, v in e.items() if not k.startswith("_")} for n, e in self.engines.items()},
+            "lines": self.lines, "elapsed_s": round(time.time() - self.started, 3),
+            "walltime": self.walltime, "tail": list(self.tail)[-5:],
+        }
+
+def parse_log(logfile_path: Path, tail_lines=0):
+    parser = SbyLogParser(tail_lines=tail_lines)
+    with Path(logfile_path).open(errors="ignore") as f:
+        for line in f:
+            parser.feed(line)
+    return parser
 
 def parse_status_and_coverage(logfile_path: Path):
-    text = Path(logfile_path).read_text(errors="ignore")
-
-    status = "UNKNOWN"
-    proved = failed = covered = undetermined = 0
-    walltime = None
-
-    # Map SBY end banners
-    if "DONE (PASS" in text or "successful proof" in text or "returned pass" in text:
-        status = "PASSED"
-        proved = 1
-    elif "DONE (COVER" in text or re.search(r"reached cover", text, re.I):
-        status = "COVERED"
-        covered = 1
-    elif "DONE (FAIL" in text or "unreached cover" in text:
-        status = "FAILED"
-        failed = 1
-
-    # Optional: extract elapsed time if present
-    m = re.search(r"Elapsed (?:clock|process) time.*?([0-9:.]+)", text)
-    if m:
-        walltime = m.group(1)
-
-    return {
-        "status": status,
-        "proved": proved,
-        "failed": failed,
-        "covered": covered,
-        "undetermined": undetermined,
-        "walltime": walltime,
-    }
+    return parse_log(logfile_path, tail_lines=TAIL_LINES).result()
@@ -0,0 +1,104 @@
+# backend/formal_verifier/depth.py
+import os, time, hashlib
+from pathlib import Path
+from .runner import run_formal
+from .templates import render_harness
+from ..common.history import HISTORY
+
+START_DEPTH = int(os.environ.get("AEGIS_FORMAL_START_DEPTH", "8"))
+MAX_DEPTH = int(os.environ.get("AEGIS_FORMAL_MAX_DEPTH", "256"))
+BUDGET_S = float(os.environ.get("AEGIS_FORMAL_BUDGET_S", "300"))
+GROWTH = 2
+SATURATE_AFTER = 2       # clean BMC rungs in a row before trying an unbounded proof
+LEARN_FROM = 20          # recent conclusive runs of the same design/top consulted
+
+def learned_depth(design_hash, top, mode):
+    """
+    Depth at which this design/top typically resolves, from the run history:
+    trace length + 1 for counterexamples / reached covers, k for k-induction
+    proofs; the max over recent runs so the usual case resolves in one rung.
+    Returns (depth or None, "prove" if that depth came from a proof).
+    """
+    depth, proof = None, False
+    runs = [r for r in HISTORY.formal_runs(design_hash=design_hash, top=top, limit=200)
+            if r["status"] in ("PASSED", "FAILED", "COVERED")][:LEARN_FROM]
+    for r in runs:
+        if mode == "cover" and r["mode"] == "cover" and r["status"] == "COVERED" and r["step"] is not None:
+            d = r["step"] + 1
+        elif mode == "prove" and r["mode"] in ("prove", "bmc") and r["status"] == "FAILED" and r["step"] is not None:
+            d = r["step"] + 1
+        elif mode == "prove" and r["mode"] == "prove" and r["status"] == "PASSED" and r["depth"]:
+            d = r["depth"]
+        else:
+            continue
+        if depth is None or d > depth:
+            depth, proof = d, r["status"] == "PASSED"
+    return depth, proof
+
+def run_adaptive(rtl_path: str, top="counter", clk="clk", rst="rst", mode=None, force=False, engines=None,
+                 portfolio=False, incremental=False, properties=None, budget_s=BUDGET_S, max_depth=MAX_DEPTH,
+                 start_depth=None, cancel=None):
+    """
+    Depth ladder instead of one fixed depth:
+      prove: BMC at start, 2x, 4x ... (a counterexample ends it); after
+             SATURATE_AFTER clean rungs, k-induction at the current depth,
+             escalating k while the proof stays inconclusive
+      cover: cover runs at growing depth until every cover is reached
+    A rung only starts if its predicted time (last rung x GROWTH) fits the
+    remaining budget. The start depth comes from the history (learned_depth)
+    unless given. Each rung goes through run_formal, so rungs hit the cache.
+    Returns the last rung's result plus a "schedule" report. `cancel`
+    (runner.CancelToken) stops the ladder and kills the running rung.
+    """
+    t0 = time.monotonic()
+    rtl_bytes = Path(rtl_path).read_bytes()
+    mode = render_harness(rtl_bytes, top, clk=clk, rst=rst, mode=mode, properties=properties)["mode"]
+    learned, proof = (None, False) if start_depth else \
+        learned_depth(hashlib.sha256(rtl_bytes).hexdigest()[:16], top, mode)
+    depth = max(1, min(start_depth or learned or START_DEPTH, max_depth))
+    rung_mode = "prove" if (mode == "prove" and proof) else ("bmc" if mode == "prove" else "cover")
+
+    rungs, clean, result, stopped = [], 0, None, None
+    while True:
+        if cancel is not None:
+            cancel.check()
+        s = time.monotonic()
+        result = run_formal(rtl_path, top=top, clk=clk, rst=rst, mode=rung_mode, force=force, depth=depth,
+                            engines=engines, portfolio=portfolio, incremental=incremental, properties=properties,
+                            cancel=cancel)
+        wall = time.monotonic() - s
+        status = result.get("status")
+        rungs.append({"mode": rung_mode, "depth": depth, "status": status, "step": result.get("step"),
+                      "wall_s": round(wall, 3), "cached": bool(result.get("cached")), "run_id": result.get("run_id")})
+
+        if status == "ERROR":
+            stopped = "error"  # a deeper run fails the same way
+        elif status == "FAILED" and rung_mode != "cover":
+            stopped = "conclusive"  # counterexample (bmc, or the base case of an induction)
+        elif status in ("PASSED", "COVERED") and rung_mode != "bmc":
+            stopped = "conclusive"
+        if stopped:
+            break
+
+        nxt = min(depth * GROWTH, max_depth)
+        if rung_mode == "bmc" and status == "PASSED":
+            clean += 1
+            if clean >= SATURATE_AFTER or depth >= max_depth:
+                # BMC keeps coming back clean: try to close it with k-induction at this depth
+                rung_mode, nxt = "prove", depth
+        elif depth >= max_depth:
+            stopped = "max_depth"
+            break
+        elapsed = time.monotonic() - t0
+        if elapsed + (0.0 if result.get("cached") else wall * GROWTH) > budget_s:
+            stopped = "budget"
+            break
+        depth = nxt
+
+    if rungs[-1]["mode"] == "bmc" and result.get("status") == "PASSED":
+        # bounded only: clean up to `depth`, nothing proven beyond it
+        result = {**result, "status": "UNKNOWN", "bounded_pass_depth": depth}
+    return {**result, "schedule": {
+        "mode": mode, "start_depth": rungs[0]["depth"], "learned_depth": learned, "final_depth": depth,
+        "stopped": stopped, "budget_s": budget_s, "elapsed_s": round(time.monotonic() - t0, 3), "rungs": rungs,
+    }}
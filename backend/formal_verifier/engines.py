@@ -0,0 +1,65 @@
+# backend/formal_verifier/engines.py
+import json, threading
+from pathlib import Path
+
+DEFAULT_ENGINE = "smtbmc z3"
+# Portfolio candidates; "abc pdr" only supports prove mode
+PORTFOLIO = ["smtbmc z3", "smtbmc boolector", "smtbmc yices", "abc pdr"]
+PROVE_ONLY = {"abc pdr", "aiger suprove", "aiger avy"}
+STATS_PATH = Path("data/cache/formal_engines.json")
+CONCLUSIVE = {"PASSED", "FAILED", "COVERED"}
+
+def portfolio_for(mode, engines=None):
+    engines = list(engines or PORTFOLIO)
+    return engines if mode == "prove" else [e for e in engines if e not in PROVE_ONLY]
+
+class EngineStats:
+    """
+    Per-design engine timings from portfolio runs, persisted as one JSON file.
+    Only conclusive finishes count towards an engine's mean time; engines that
+    were killed because another finished first are tracked as losses.
+    """
+    def __init__(self, path=STATS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def record(self, design_key, timings):
+        """timings: {engine: {"status": str, "time_s": float, "killed": bool}}"""
+        with self._lock:
+            d = self._load().setdefault(design_key, {})
+            for eng, t in timings.items():
+                s = d.setdefault(eng, {"runs": 0, "wins": 0, "losses": 0, "total_s": 0.0})
+                if t.get("killed"):
+                    s["losses"] += 1
+                elif t.get("status") in CONCLUSIVE:
+                    s["runs"] += 1
+                    s["total_s"] += t["time_s"]
+                    s["wins"] += int(bool(t.get("winner")))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._data))
+            tmp.replace(self.path)
+
+    def best(self, design_key, allowed=None):
+        """Historically fastest conclusive engine for this design, or None."""
+        with self._lock:
+            d = self._load().get(design_key, {})
+        cands = [(s["total_s"] / s["runs"], e) for e, s in d.items()
+                 if s["runs"] and (allowed is None or e in allowed)]
+        return min(cands)[1] if cands else None
+
+    def snapshot(self, design_key=None):
+        with self._lock:
+            data = self._load()
+            return data.get(design_key, {}) if design_key else dict(data)
+
+STATS = EngineStats()
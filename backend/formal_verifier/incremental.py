@@ -0,0 +1,208 @@
+# backend/formal_verifier/incremental.py
+import re, json, time, hashlib, threading
+from pathlib import Path
+from .cache import tool_identity
+from .workspace import WORKSPACE
+
+PROOFS_PATH = Path("data/cache/formal_proofs.json")
+MAX_PROOFS = 2048
+GLOBAL = "<global>"  # text outside any module (`define, `include, packages): part of every cone
+
+_COMMENTS = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_MODULE = re.compile(r"\b(?:macro)?module\s+(\w+)(.*?)\bendmodule\b", re.S)
+_PROPERTY = re.compile(r"\b(assert|cover)\s*(?:property\s*)?\((.*?)\)\s*;", re.S)
+
+def _norm(text):
+    # Comment / whitespace-only edits must not invalidate a proof
+    return " ".join(_COMMENTS.sub(" ", text).split())
+
+def split_modules(src: str):
+    """{module name: normalized source}, plus GLOBAL for everything between modules."""
+    src = _COMMENTS.sub(" ", src)
+    mods, rest, pos = {}, [], 0
+    for m in _MODULE.finditer(src):
+        mods[m.group(1)] = " ".join(m.group(0).split())
+        rest.append(src[pos:m.start()])
+        pos = m.end()
+    rest.append(src[pos:])
+    mods[GLOBAL] = " ".join("".join(rest).split())
+    return mods
+
+def module_hashes(modules):
+    return {name: hashlib.sha256(text.encode()).hexdigest()[:16] for name, text in modules.items()}
+
+def cone(top, modules):
+    """
+    Modules reachable from `top` (split_modules output) by name reference;
+    over-approximates instantiation, so it stays sound.
+    """
+    names = [n for n in modules if n != GLOBAL]
+    if top not in modules:
+        return sorted(modules)  # unknown top (e.g. a testbench name): everything counts
+    refs = {n: {o for o in names if o != n and re.search(rf"\b{re.escape(o)}\b", modules[n])} for n in names}
+    seen, todo = {top}, [top]
+    while todo:
+        for o in refs[todo.pop()] - seen:
+            seen.add(o)
+            todo.append(o)
+    return sorted(seen | {GLOBAL})
+
+def _blank(text):
+    # drop comments but keep their newlines, so match offsets still give source lines
+    return _COMMENTS.sub(lambda m: "\n" * m.group(0).count("\n"), text)
+
+def properties(harness, src, members):
+    """
+    assert/cover statements checked by this run: the harness's and those embedded
+    in the cone, located as sby reports them ("harness.sv:12" / "design.sv:40").
+    """
+    out = []
+    for name, text in (("harness.sv", _blank(harness)), ("design.sv", _blank(src))):
+        spans = [(m.start(), m.end(), m.group(1)) for m in _MODULE.finditer(text)] if name == "design.sv" else []
+        for m in _PROPERTY.finditer(text):
+            where = "harness" if not spans else next((n for a, b, n in spans if a <= m.start() < b), GLOBAL)
+            if where == "harness" or (where != GLOBAL and where in members):
+                out.append({"kind": m.group(1), "expr": " ".join(m.group(2).split()), "where": where,
+                            "location": f"{name}:{text.count(chr(10), 0, m.start()) + 1}"})
+    return out
+
+class ProofStore:
+    """
+    Verdicts keyed by the hash of a run's cone of influence (normalized source
+    of the modules reachable from `top` + harness + mode + toolchain), so an
+    edit outside the cone, or a comment-only edit, keeps the earlier proof.
+    Also remembers each (rtl_path, top, mode) lineage's last module hashes to
+    report what changed. One JSON file, like EngineStats.
+    """
+    def __init__(self, path=PROOFS_PATH, max_proofs=MAX_PROOFS):
+        self.path = Path(path)
+        self.max_proofs = max_proofs
+        self._lock = threading.Lock()
+        self._data = None
+        self.reused = 0
+
+    def _load(self):
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._data = {}
+            self._data.setdefault("proofs", {})
+            self._data.setdefault("lineage", {})
+        return self._data
+
+    def _save(self):
+        proofs = self._data["proofs"]
+        if len(proofs) > self.max_proofs:
+            for k, _ in sorted(proofs.items(), key=lambda kv: kv[1]["at"])[:len(proofs) - self.max_proofs]:
+                del proofs[k]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._data))
+        tmp.replace(self.path)
+
+    def plan(self, rtl_path, rtl_bytes, top, harness, mode, depth, engines=()):
+        """
+        What an incremental run has to do:
+          reuse - earlier record that already answers this request (no sby run)
+          skip  - cover mode, same cone, deeper than an earlier unreached run:
+                  BMC resumes from the depth already searched (sby `skip`, smtbmc only)
+        """
+        src = rtl_bytes.decode(errors="ignore")
+        texts = split_modules(src)
+        modules = module_hashes(texts)
+        members = cone(top, texts)
+        h = hashlib.sha256()
+        for part in [harness, mode, tool_identity()] + [f"{n}:{modules[n]}" for n in members]:
+            h.update(part.encode() + b"\0")
+        cone_key = h.hexdigest()
+        lineage = f"{rtl_path}|{top}|{mode}"
+        with self._lock:
+            data = self._load()
+            prev = data["proofs"].get(cone_key)
+            before = data["lineage"].get(lineage, {}).get("modules", {})
+        changed = sorted(n for n in modules if before.get(n) != modules[n])
+        reuse, skip = None, None
+        if prev is not None:
+            st = prev["status"]
+            if mode == "prove" and st == "PASSED":
+                reuse = prev  # an unbounded proof holds at any requested depth
+            elif mode == "bmc" and st == "PASSED":
+                reuse = prev if prev["depth"] >= depth else None  # bounded: only as deep as was checked
+            elif mode == "cover" and st == "FAILED":
+                # nothing reached up to prev["depth"]: enough if that bound covers this request,
+                # otherwise search only the new steps
+                if prev["depth"] >= depth:
+                    reuse = prev
+                elif all(e.startswith("smtbmc") for e in (engines or ["smtbmc"])):
+                    skip = prev["depth"]
+            elif (prev.get("step") if prev.get("step") is not None else prev["depth"]) <= depth:
+                reuse = prev  # counterexample / cover trace fits within the requested depth
+        return {
+            "cone_key": cone_key, "lineage": lineage, "modules": modules, "cone": members,
+            "changed_modules": [n for n in changed if n in members],
+            "changed_outside_cone": [n for n in changed if n not in members],
+            "properties": properties(harness, src, members),
+            "mode": mode, "depth": depth, "reuse": reuse, "skip": skip,
+        }
+
+    def _report(self, plan, how, result):
+        """
+        Per-property outcome: what the log says about that statement (sby names
+        failed asserts and reached/unreached covers), else what the verdict implies
+        (a PASSED run holds every assert), else "undetermined".
+        """
+        logged = {}
+        for p in result.get("properties") or []:
+            name, _, pos = (p.get("location") or "").partition(":")
+            logged[f"{name}:{pos.split('.', 1)[0]}"] = p
+        props = []
+        for p in plan["properties"]:
+            hit = logged.get(p["location"])
+            if hit is not None:
+                status, step = hit["status"], hit.get("step")
+            elif p["kind"] == "assert" and result.get("status") == "PASSED":
+                status, step = "proved" if plan["mode"] == "prove" else "passed", None
+            else:
+                status, step = "undetermined", None
+            props.append({**p, "status": status, "step": step, "checked": how})
+        return {
+            "cone": plan["cone"], "changed_modules": plan["changed_modules"],
+            "changed_outside_cone": plan["changed_outside_cone"], "reused": how == "reused",
+            "skip": plan["skip"], "verdict": result.get("status"), "properties": props,
+            "reverified": 0 if how == "reused" else len(props),
+        }
+
+    def _remember_lineage(self, plan):
+        self._load()["lineage"][plan["lineage"]] = {"modules": plan["modules"], "cone_key": plan["cone_key"],
+                                                   "at": time.time()}
+
+    def reused_result(self, plan):
+        rec = plan["reuse"]
+        with self._lock:
+            self._remember_lineage(plan)
+            self._save()
+            self.reused += 1
+        result = {k: v for k, v in rec.items() if k not in ("at", "depth", "step", "mode")}
+        result["artifacts"] = [a for a in rec.get("artifacts") or [] if WORKSPACE.exists(a)]
+        return {**result, "cached": True, "incremental": self._report(plan, "reused", rec)}
+
+    def record(self, plan, result, step=None, reused=False):
+        """Store a run's verdict under its cone (reused: it came from the exact-content cache); returns the report."""
+        status = result.get("status")
+        if status in ("PASSED", "FAILED", "COVERED"):
+            rec = {k: result.get(k) for k in ("status", "proved", "failed", "covered", "undetermined",
+                                              "walltime", "engine", "run_id", "artifacts", "properties")}
+            rec.update(mode=plan["mode"], depth=plan["depth"], step=step, at=time.time())
+            with self._lock:
+                self._load()["proofs"][plan["cone_key"]] = rec
+                self._remember_lineage(plan)
+                self._save()
+        return self._report(plan, "reused" if reused else "extended" if plan["skip"] else "reverified", result)
+
+    def stats(self):
+        with self._lock:
+            data = self._load()
+            return {"proofs": len(data["proofs"]), "lineages": len(data["lineage"]), "reused": self.reused}
+
+PROOFS = ProofStore()
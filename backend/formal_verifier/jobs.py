@@ -0,0 +1,331 @@
+# backend/formal_verifier/jobs.py
+import os, re, json, time, uuid, asyncio, itertools
+from collections import OrderedDict, deque
+from pathlib import Path
+from .runner import (
+    SBY_TIMEOUT, TAIL_LINES, CancelToken, sby_binary, prepare_run, cached_result, make_workdir,
+    collect_result, run_portfolio, kill_proc, _run_sby, _tail_text
+)
+from .coverage import SbyLogParser
+from .depth import run_adaptive
+from .workspace import WORKSPACE
+from ..common import tracing
+
+MAX_PARALLEL = int(os.environ.get("AEGIS_FORMAL_PARALLEL", 0)) or (os.cpu_count() or 1)
+KEEP_FINISHED = 1000
+TERMINAL = {"done", "error", "cancelled"}
+# Set (by `run.sh serve`) so every worker process sees every job: owners publish
+# <id>.json snapshots here, other workers read them and drop <id>.cancel markers
+SHARED_DIR = os.environ.get("AEGIS_FORMAL_JOBS_DIR", "")
+PUBLISH_S = 0.5    # live progress is republished at most this often (status changes always)
+POLL_S = 0.5       # owners check for cancel markers, remote streams re-read snapshots
+_JOB_ID = re.compile(r"[0-9a-f]{12}")
+
+class FormalJob:
+    def __init__(self, params, priority=0, force=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params            # rtl_path/top/clk/rst (+ kind for reporting)
+        self.priority = priority
+        self.force = force
+        self.status = "queued"          # queued | running | done | error | cancelled
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = CancelToken()    # kills every solver process this job starts
+        self.live = None                # SbyLogParser while sby is running
+        self._changed = asyncio.Event()
+        self._publish = None            # JobScheduler._publish when job state is shared
+        self._published = (None, 0.0)   # (status, monotonic time) of the last shared snapshot
+
+    def _touch(self):
+        # Wake anyone streaming this job, then re-arm for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+        if self._publish is not None:
+            self._publish(self)
+
+    def snapshot(self):
+        return {
+            "job_id": self.id, "status": self.status, "priority": self.priority,
+            "params": self.params, "created": self.created, "started": self.started,
+            "finished": self.finished, "error": self.error, "result": self.result,
+            "live": self.live.live() if self.live is not None else None,
+        }
+
+class SharedJob:
+    """Read-only view of a job owned by another worker process: its last published snapshot."""
+    def __init__(self, snap):
+        self.id, self.status, self._snap = snap["job_id"], snap["status"], snap
+
+    def snapshot(self):
+        return self._snap
+
+def _alive(pid):
+    try:
+        os.kill(int(pid), 0)
+    except (TypeError, ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobScheduler:
+    """
+    Async formal job queue. Jobs run SBY via asyncio.create_subprocess_exec
+    with at most `max_parallel` concurrent processes; higher priority first,
+    FIFO within a priority. Workers start lazily on the caller's event loop.
+    With `shared_dir`, jobs stay owned (queued and run) by the process that
+    accepted them, but get/list/cancel/stream work from any process.
+    """
+    def __init__(self, max_parallel=MAX_PARALLEL, keep_finished=KEEP_FINISHED, shared_dir=SHARED_DIR):
+        self.max_parallel = max_parallel
+        self.keep_finished = keep_finished
+        self.shared = Path(shared_dir) if shared_dir else None
+        self.jobs = OrderedDict()
+        self._queue = None
+        self._workers = []
+        self._seq = itertools.count()
+        self.on_finish = None           # optional callback(job), e.g. metrics
+
+    def _ensure_started(self):
+        if self._workers and not all(w.done() for w in self._workers):
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.max_parallel)]
+        if self.shared is not None:
+            self._workers.append(loop.create_task(self._watch()))
+        for job in self.jobs.values():  # re-queue anything left behind by dead workers
+            if job.status == "queued":
+                self._queue.put_nowait((-job.priority, next(self._seq), job))
+
+    def submit(self, params, priority=0, force=False):
+        self._ensure_started()
+        job = FormalJob(params, priority=priority, force=force)
+        self.jobs[job.id] = job
+        if self.shared is not None:
+            job._publish = self._publish
+            self._publish(job)
+        self._queue.put_nowait((-priority, next(self._seq), job))
+        self._trim()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id) or self._shared_job(job_id)
+
+    def list(self, status=None):
+        snaps = [j.snapshot() for j in self.jobs.values()]
+        if self.shared is not None:
+            for p in self.shared.glob("*.json"):
+                if p.stem not in self.jobs:
+                    job = self._shared_job(p.stem)
+                    if job is not None:
+                        snaps.append(job.snapshot())
+            snaps.sort(key=lambda s: s["created"])
+        return [s for s in snaps if status is None or s["status"] == status]
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            # Owned by another worker: leave a marker its watcher acts on
+            job = self._shared_job(job_id)
+            if job is not None and job.status not in TERMINAL:
+                (self.shared / f"{job_id}.cancel").touch()
+                job.snapshot()["cancel_requested"] = True
+            return job
+        if job.status in TERMINAL:
+            return job
+        job.status = "cancelled"
+        job._cancel.cancel()
+        job.finished = time.time()
+        job._touch()
+        return job
+
+    def _trim(self):
+        finished = [k for k, j in self.jobs.items() if j.status in TERMINAL]
+        for k in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[k]
+            if self.shared is not None:
+                (self.shared / f"{k}.json").unlink(missing_ok=True)
+
+    # ---- shared state (multi-worker serving) ----
+    def _publish(self, job):
+        now = time.monotonic()
+        if job.status == job._published[0] and job.status not in TERMINAL and now - job._published[1] < PUBLISH_S:
+            return
+        job._published = (job.status, now)
+        snap = {**job.snapshot(), "owner": os.getpid()}
+        tmp = self.shared / f"{job.id}.{os.getpid()}.tmp"
+        try:
+            self.shared.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(snap, default=str))
+            tmp.replace(self.shared / f"{job.id}.json")
+        except OSError:
+            pass
+
+    def _shared_job(self, job_id):
+        if self.shared is None or not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            snap = json.loads((self.shared / f"{job_id}.json").read_text())
+        except (OSError, ValueError):
+            return None
+        if snap["status"] not in TERMINAL and not _alive(snap.get("owner")):
+            snap = {**snap, "status": "error", "error": f"worker {snap.get('owner')} exited before the job finished"}
+        return SharedJob(snap)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(POLL_S)
+            for p in self.shared.glob("*.cancel"):
+                if p.stem in self.jobs:
+                    self.cancel(p.stem)
+                    p.unlink(missing_ok=True)
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            if job.status != "queued":
+                continue
+            # Jobs outlive the request that queued them: sampled on their own, as "formal.job"
+            trace, token = tracing.begin("formal.job") if tracing.sampled() else (None, None)
+            try:
+                await self._run(job)
+            except Exception as e:
+                if job.status != "cancelled":
+                    job.status, job.error = "error", repr(e)
+            finally:
+                job.finished = job.finished or time.time()
+                job._touch()
+                if trace is not None:
+                    tracing.finish(trace, token)
+                if self.on_finish is not None and job.status in {"done", "error"}:
+                    try:
+                        self.on_finish(job)
+                    except Exception:
+                        pass
+
+    async def _run(self, job):
+        # cancel() may land during any await below: re-check after each one, and
+        # never spawn a solver or report "done" for a cancelled job
+        job.status = "running"
+        job.started = time.time()
+        job._touch()
+        p = job.params
+        if p.get("adaptive"):
+            # Depth ladder: a sequence of runs, each through the cache; runs off the loop
+            result = await asyncio.to_thread(
+                run_adaptive, p["rtl_path"], p["top"], p["clk"], p["rst"], mode=p.get("mode"), force=job.force,
+                engines=p.get("engines"), portfolio=bool(p.get("portfolio")) and sby_binary() is not None,
+                incremental=bool(p.get("incremental")), properties=p.get("properties"), cancel=job._cancel,
+                **{k: p[k] for k in ("budget_s", "max_depth") if p.get(k) is not None},
+            )
+            self._done(job, result)
+            return
+        prep = await asyncio.to_thread(
+            prepare_run, p["rtl_path"], p["top"], p["clk"], p["rst"], mode=p.get("mode"), depth=p.get("depth", 20),
+            engines=p.get("engines"), portfolio=bool(p.get("portfolio")) and sby_binary() is not None,
+            incremental=bool(p.get("incremental")), properties=p.get("properties"),
+        )
+        if job.status == "cancelled":
+            return
+        if not job.force:
+            hit = cached_result(prep)
+            if hit is not None:
+                self._done(job, hit)
+                return
+
+        with tracing.span("formal.workdir"):
+            run_id, work_dir = await asyncio.to_thread(make_workdir, prep)
+        if job.status == "cancelled":
+            await asyncio.to_thread(WORKSPACE.finalize, run_id, work_dir, status="CANCELLED")
+            return
+        if prep.get("variants"):
+            # Portfolio lanes manage their own processes; run them off the loop
+            result = await asyncio.to_thread(run_portfolio, prep, run_id, work_dir, job._cancel)
+            self._done(job, result)
+            return
+        job.live = parser = SbyLogParser()
+        sby_bin = sby_binary()
+        if sby_bin is None:
+            # No local sby: fall back to the blocking docker path off the loop
+            out, err, ok = await asyncio.to_thread(_run_sby, work_dir, parser, job._cancel)
+        else:
+            with tracing.span("sby.spawn", job="job.sby"):
+                proc = await asyncio.create_subprocess_exec(
+                    sby_bin, "-f", "job.sby", cwd=str(work_dir), limit=1 << 20,
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+            job._cancel.register(proc)  # killed right away if cancel() came in during the spawn
+            out_tail, err_tail = deque(maxlen=TAIL_LINES), deque(maxlen=TAIL_LINES)
+
+            async def pump_out():
+                async for raw in proc.stdout:
+                    line = raw.decode(errors="ignore")
+                    out_tail.append(line)
+                    if parser.feed(line):
+                        job._touch()
+
+            async def pump_err():
+                async for raw in proc.stderr:
+                    err_tail.append(raw.decode(errors="ignore"))
+
+            try:
+                with tracing.span("sby.wait", job="job.sby"):
+                    await asyncio.wait_for(asyncio.gather(pump_out(), pump_err(), proc.wait()), SBY_TIMEOUT)
+            except asyncio.TimeoutError:
+                kill_proc(proc)
+                await proc.wait()
+                job.status, job.error = "error", f"sby timed out after {SBY_TIMEOUT}s"
+                await asyncio.to_thread(WORKSPACE.finalize, run_id, work_dir, status="ERROR")
+                return
+            out, err, ok = _tail_text(out_tail), _tail_text(err_tail), proc.returncode == 0
+        if job.status == "cancelled":
+            # Index the partial run so retention can reclaim it; a killed run has no verdict to cache
+            await asyncio.to_thread(WORKSPACE.finalize, run_id, work_dir, status="CANCELLED")
+            return
+
+        self._done(job, await asyncio.to_thread(collect_result, prep, run_id, work_dir, out, err, ok, parser))
+
+    @staticmethod
+    def _done(job, result):
+        if job.status != "cancelled":
+            job.result, job.status = result, "done"
+
+    async def stream(self, job_id, timeout=None):
+        """Yield job snapshots on every state change until the job is terminal."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            async for snap in self._stream_shared(job_id, timeout):
+                yield snap
+            return
+        while True:
+            changed = job._changed
+            yield job.snapshot()
+            if job.status in TERMINAL:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _stream_shared(self, job_id, timeout=None):
+        # Another worker's job: poll its published snapshot
+        last, waited = None, 0.0
+        while True:
+            job = self._shared_job(job_id)
+            if job is None:
+                return
+            snap = job.snapshot()
+            if snap != last or (timeout is not None and waited >= timeout):
+                yield snap
+                last, waited = snap, 0.0
+            if job.status in TERMINAL:
+                return
+            await asyncio.sleep(POLL_S)
+            waited += POLL_S
+
+SCHEDULER = JobScheduler()
@@ -0,0 +1,100 @@
+# backend/formal_verifier/logreport.py
+# python -m backend.formal_verifier.logreport data/tmp --out report.json
+import os, sys, json, time, argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from .coverage import parse_log
+from .workspace import WORK_ROOT
+from ..common import tracing
+
+CHUNK = 64               # logs per worker task
+PARALLEL_ABOVE = 256     # below this, process start-up costs more than it saves
+
+def find_logs(root=WORK_ROOT):
+    """<root>/<run>/<job>/logfile.txt for every sby job dir (job, job_0, ... for portfolio lanes)."""
+    return sorted(str(p) for p in Path(root).glob("*/*/logfile.txt"))
+
+def _parse_chunk(paths):
+    out = []
+    for p in paths:
+        try:
+            rec = parse_log(p).record()
+        except OSError as e:
+            rec = {"status": "UNREADABLE", "errors": [repr(e)]}
+        rec["log"] = p
+        out.append(rec)
+    return out
+
+def parse_many(paths, workers=None):
+    paths = list(paths)
+    chunks = [paths[i:i + CHUNK] for i in range(0, len(paths), CHUNK)]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1 or len(paths) < PARALLEL_ABOVE:
+        return [r for c in chunks for r in _parse_chunk(c)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [r for rs in pool.map(_parse_chunk, chunks) for r in rs]
+
+def aggregate(records, top=20):
+    """Fold per-log records into one regression summary."""
+    engines = defaultdict(lambda: {"runs": 0, "total_s": 0.0, "max_s": 0.0, "by_status": Counter()})
+    props, errors, steps = Counter(), Counter(), []
+    for r in records:
+        for e in (r.get("engines") or {}).values():
+            s = engines[e.get("engine") or "?"]
+            s["runs"] += 1
+            s["total_s"] += e["time_s"]
+            s["max_s"] = max(s["max_s"], e["time_s"])
+            s["by_status"][e.get("status") or "NONE"] += 1
+        for p in r.get("properties") or []:
+            if p["status"] != "reached":
+                props[(p["kind"], p["location"], p["status"])] += 1
+        for msg in r.get("errors") or []:
+            errors[msg.split(": ", 1)[-1][:160]] += 1
+        if r.get("step") is not None:
+            steps.append(r["step"])
+    return {
+        "logs": len(records),
+        "by_status": dict(Counter(r["status"] for r in records)),
+        "by_mode": dict(Counter(r.get("mode") for r in records)),
+        "traces": sum(len(r.get("traces") or []) for r in records),
+        "walltime_s": sum(r.get("walltime_s") or 0 for r in records),
+        "depth": {"max": max(steps), "mean": round(sum(steps) / len(steps), 2)} if steps else None,
+        "engines": {name: {"runs": s["runs"], "mean_s": round(s["total_s"] / s["runs"], 3), "max_s": s["max_s"],
+                           "by_status": dict(s["by_status"])} for name, s in engines.items()},
+        "failing_properties": [{"kind": k, "location": loc, "status": st, "runs": n}
+                               for (k, loc, st), n in props.most_common(top)],
+        "errors": [{"error": msg, "runs": n} for msg, n in errors.most_common(top)],
+    }
+
+def report(root=WORK_ROOT, workers=None, records=False, top=20):
+    t0 = time.perf_counter()
+    with tracing.span("logreport.scan"):
+        recs = parse_many(find_logs(root), workers=workers)
+    out = {"root": str(root), **aggregate(recs, top=top)}
+    dt = time.perf_counter() - t0
+    out["scan_s"] = round(dt, 4)
+    out["logs_per_s"] = round(len(recs) / dt, 1) if dt > 0 else None
+    if records:
+        out["records"] = recs
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m backend.formal_verifier.logreport",
+                                 description="Summarize every SBY logfile under a workspace root.")
+    ap.add_argument("root", nargs="?", default=str(WORK_ROOT))
+    ap.add_argument("--workers", type=int, help="parser processes (default: cpu count)")
+    ap.add_argument("--records", action="store_true", help="include the per-log records")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--out", help="write the JSON report here")
+    args = ap.parse_args(argv)
+    rep = report(args.root, workers=args.workers, records=args.records, top=args.top)
+    print(f"{rep['logs']} logs in {rep['scan_s']:.3f}s  {json.dumps(rep['by_status'])}", file=sys.stderr)
+    if args.out:
+        Path(args.out).write_text(json.dumps(rep, indent=2))
+    else:
+        print(json.dumps(rep, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
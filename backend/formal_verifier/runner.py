@@ -1,26 +1,113 @@
 # backend/formal_verifier/runner.py
-import subprocess, shutil, uuid, shutil as _shutil
+import os, time, signal, hashlib, subprocess, shutil, threading, shutil as _shutil
+from collections import deque
 from pathlib import Path
-from .templates import (
-    harness_sva, harness_sva_fsm, sby_file, sby_file_cover, write_file
-)
-from .coverage import parse_status_and_coverage
+from .templates import render_harness, sby_file, sby_file_bmc, sby_file_cover, write_file
+from .coverage import parse_log, SbyLogParser
+from .cache import CACHE, cache_key, sby_binary
+from .workspace import WORKSPACE
+from .engines import STATS as ENGINE_STATS, DEFAULT_ENGINE, CONCLUSIVE, portfolio_for
+from .incremental import PROOFS
+from ..common.history import HISTORY
+from ..common import tracing
 
 # Docker fallback image (only used if local sby not found / fails)
 DOCKER_IMAGE = "ghcr.io/yosyshq/oss-cad-suite:latest"  # harmless if unreachable
 
-def _run_local_sby(work_dir: Path):
-    sby_bin = _shutil.which("sby") or "/opt/homebrew/bin/sby"
-    if not Path(sby_bin).exists():
+SBY_TIMEOUT = 600  # seconds
+TAIL_LINES = 200   # stdout/stderr lines kept per run (only the last 2000 chars are returned)
+
+def kill_proc(proc):
+    """Kill sby and the solver processes it spawned (it runs in its own session)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+class Cancelled(Exception):
+    pass
+
+class CancelToken:
+    """
+    Cancellation for a run that spans threads and processes: every solver
+    process is register()ed as it starts; cancel() kills those already
+    running, and any registered afterwards is killed on the spot.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._procs = []
+        self.cancelled = False
+
+    def register(self, proc):
+        with self._lock:
+            self._procs.append(proc)
+            dead = self.cancelled
+        if dead:
+            kill_proc(proc)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            procs, self._procs = self._procs, []
+        for proc in procs:
+            if proc.returncode is None:
+                kill_proc(proc)
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+def _tail_text(lines, n=2000):
+    return "".join(lines)[-n:]
+
+def _run_local_sby(work_dir: Path, parser=None, sby_name="job.sby", on_start=None):
+    sby_bin = sby_binary()
+    if sby_bin is None:
         return None, None, False
-    proc = subprocess.run([sby_bin, "-f", "job.sby"],
-                          cwd=str(work_dir), capture_output=True, text=True, timeout=600)
-    return proc.stdout[-2000:], proc.stderr[-2000:], (proc.returncode == 0)
+    # Stream stdout line by line (sby echoes its log there) into `parser`,
+    # keeping only a bounded tail of each stream in memory.
+    trace = tracing.current()
+    with tracing.span("sby.spawn", job=sby_name):
+        proc = subprocess.Popen([sby_bin, "-f", sby_name], cwd=str(work_dir), text=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, errors="ignore",
+                                start_new_session=True)
+    t_wait, parse_s = time.perf_counter(), 0.0
+    if on_start is not None:
+        on_start(proc)
+    out_tail, err_tail = deque(maxlen=TAIL_LINES), deque(maxlen=TAIL_LINES)
+    err_reader = threading.Thread(target=err_tail.extend, args=(proc.stderr,), daemon=True)
+    err_reader.start()
+    killer = threading.Timer(SBY_TIMEOUT, kill_proc, args=(proc,))
+    killer.start()
+    try:
+        for line in proc.stdout:
+            out_tail.append(line)
+            if parser is not None:
+                if trace is None:
+                    parser.feed(line)
+                else:
+                    t = time.perf_counter()
+                    parser.feed(line)
+                    parse_s += time.perf_counter() - t
+        proc.wait()
+    finally:
+        killer.cancel()
+        err_reader.join(timeout=1.0)
+    if trace is not None:
+        t_end = time.perf_counter()
+        trace.add("sby.wait", t_wait, t_end, job=sby_name, returncode=proc.returncode)
+        if parser is not None:
+            # streamed parsing is interleaved with the wait; reported as its summed time
+            trace.add("log.parse", t_end - parse_s, t_end, streamed=True)
+    return _tail_text(out_tail), _tail_text(err_tail), (proc.returncode == 0)
 
 # At top or near _run_sby()
 USE_DOCKER_FALLBACK = False
 
-def _run_docker_sby(work_dir: Path):
+def _run_docker_sby(work_dir: Path, on_start=None):
     if not _shutil.which("docker"):
         return "", "docker not installed", False
     # Try to pull (ignore errors), then run sby from the toolkit path
@@ -31,52 +118,245 @@ def _run_docker_sby(work_dir: Path):
         "-w","/work",
         DOCKER_IMAGE, "bash","-lc","/opt/oss-cad-suite/bin/sby -f job.sby"
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-    return proc.stdout[-2000:], proc.stderr[-2000:], (proc.returncode == 0)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+    if on_start is not None:
+        on_start(proc)
+    try:
+        out, err = proc.communicate(timeout=SBY_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        kill_proc(proc)
+        out, err = proc.communicate()
+    return out[-2000:], err[-2000:], (proc.returncode == 0)
 
-def _run_sby(work_dir: Path):
+def _run_sby(work_dir: Path, parser=None, cancel=None):
+    on_start = cancel.register if cancel is not None else None
     # 1) Prefer local Homebrew sby
-    out, err, ok = _run_local_sby(work_dir)
+    out, err, ok = _run_local_sby(work_dir, parser=parser, on_start=on_start)
     if ok:
         return out or "", err or "", True
+    if cancel is not None:
+        cancel.check()
     # 2) Fallback to docker image (if reachable)
-    out2, err2, ok2 = _run_docker_sby(work_dir)
+    out2, err2, ok2 = _run_docker_sby(work_dir, on_start=on_start)
     return (out2 or out or ""), (err2 or err or ""), ok2
 
-def run_formal(rtl_path: str, top="counter", clk="clk", rst="rst", mode="prove"):
-    run_id = str(uuid.uuid4())[:8]
-    work_dir = Path("data/tmp") / f"formal_{run_id}"
-    work_dir.mkdir(parents=True, exist_ok=True)
+def _run_portfolio(work_dir: Path, variants, on_start=None):
+    """
+    Run one sby per engine variant ({job_name: engine}) in parallel. The first
+    conclusive verdict wins and the remaining processes are killed.
+    on_start(proc) sees every lane's process (e.g. CancelToken.register).
+    Returns (winner_name, {name: (out, err, ok, parser)}, timings).
+    """
+    procs, lanes, timings, killed = {}, {}, {}, set()
+    lock, decided = threading.Lock(), threading.Event()
+    winner = []
 
-    shutil.copy(rtl_path, work_dir / "design.sv")
+    def started(name, proc):
+        with lock:
+            procs[name] = proc
+            if decided.is_set():
+                kill_proc(proc)
+                killed.add(name)
+        if on_start is not None:
+            on_start(proc)
 
-    if top == "fsm_buggy":
-        harness = harness_sva_fsm(top_module=top, clk=clk, rst=rst)
-        sby = sby_file_cover(top_tb=f"{top}_tb", design_sv="design.sv", harness_sv="harness.sv")
-    else:
-        harness = harness_sva(top_module=top, clk=clk, rst=rst)
-        sby = sby_file(top_tb=f"{top}_tb", design_sv="design.sv", harness_sv="harness.sv")
+    def lane(name):
+        parser = SbyLogParser()
+        t0 = time.perf_counter()
+        out, err, ok = _run_local_sby(work_dir, parser=parser, sby_name=f"{name}.sby",
+                                      on_start=lambda p: started(name, p))
+        with lock:
+            lanes[name] = (out or "", err or "", ok, parser)
+            timings[name] = {"engine": variants[name], "status": parser.status,
+                             "time_s": round(time.perf_counter() - t0, 4)}
+            if parser.status in CONCLUSIVE and not winner:
+                winner.append(name)
+                timings[name]["winner"] = True
+                decided.set()
+            if len(lanes) == len(variants):
+                decided.set()
+
+    threads = [threading.Thread(target=lane, args=(n,), daemon=True) for n in variants]
+    for t in threads:
+        t.start()
+    decided.wait(SBY_TIMEOUT)
+    with lock:
+        decided.set()
+        for name, proc in procs.items():
+            if name not in lanes and proc.poll() is None:
+                kill_proc(proc)
+                killed.add(name)
+    for t in threads:
+        t.join(timeout=5.0)
+    for name in killed:
+        if name in timings:
+            timings[name]["killed"] = True
+    return (winner[0] if winner else next(iter(variants))), lanes, timings
+
+def _render(rtl_bytes, top, clk, rst, mode=None, depth=20, engines=None, skip=None, properties=None):
+    # Harness from the design's ports + property templates (mode=None: chosen from the interface);
+    # both harness and .sby are memoized in templates.py
+    h = render_harness(rtl_bytes, top, clk=clk, rst=rst, mode=mode, properties=properties)
+    mode = h["mode"]
+    kw = {"skip": skip} if mode == "cover" else {}
+    make_sby = {"cover": sby_file_cover, "bmc": sby_file_bmc}.get(mode, sby_file)
+    sby = make_sby(top_tb=f"{top}_tb", design_sv="design.sv", harness_sv="harness.sv",
+                   depth=depth, engines=engines, **kw)
+    return h["harness"], sby, mode
+
+def prepare_run(rtl_path: str, top="counter", clk="clk", rst="rst", mode=None, depth=20,
+                rtl_bytes=None, engines=None, portfolio=False, incremental=False, properties=None):
+    """
+    Render harness/.sby and compute the cache key without touching disk.
+    portfolio=True renders one .sby per engine (job_<i>.sby); otherwise a single
+    job.sby using `engines`, else the design's historically fastest engine,
+    else smtbmc z3.
+    incremental=True plans against earlier verdicts for the same cone of
+    influence (see incremental.ProofStore): reuse one outright, or resume a
+    cover search from the depth already reached.
+    properties: property template names (templates.PROPERTY_TEMPLATES); default per mode.
+    Raises ValueError if `top` isn't a module of the design.
+    """
+    with tracing.span("formal.prepare", top=top):
+        return _prepare_run(rtl_path, top, clk, rst, mode, depth, rtl_bytes, engines, portfolio, incremental,
+                            properties)
 
-    write_file(work_dir / "harness.sv", harness)
-    write_file(work_dir / "job.sby", sby)
+def _prepare_run(rtl_path, top, clk, rst, mode, depth, rtl_bytes, engines, portfolio, incremental, properties):
+    if rtl_bytes is None:
+        rtl_bytes = Path(rtl_path).read_bytes()
+    harness, _, mode = _render(rtl_bytes, top, clk, rst, mode=mode, depth=depth, properties=properties)
+    design_key = hashlib.sha256(rtl_bytes + harness.encode() + mode.encode()).hexdigest()
+    inc = None
+    if incremental:
+        lanes = portfolio_for(mode, engines) if portfolio else engines
+        inc = PROOFS.plan(rtl_path, rtl_bytes, top, harness, mode, depth, engines=lanes)
+    skip = inc["skip"] if inc else None
 
-    out, err, ok = _run_sby(work_dir)
+    if portfolio:
+        variants = {f"job_{i}": e for i, e in enumerate(portfolio_for(mode, engines))}
+        sbys = {n: _render(rtl_bytes, top, clk, rst, mode=mode, depth=depth, engines=[e], skip=skip,
+                           properties=properties)[1]
+                for n, e in variants.items()}
+        return {"rtl_bytes": rtl_bytes, "harness": harness, "sby": None, "sbys": sbys,
+                "variants": variants, "design_key": design_key, "incremental": inc,
+                "meta": {"rtl_path": str(rtl_path), "top": top, "mode": mode, "depth": depth},
+                "key": cache_key(rtl_bytes, harness, "\n".join(sbys.values()))}
 
-    jobdir = work_dir / "job"
+    if not engines:
+        best = ENGINE_STATS.best(design_key, allowed=portfolio_for(mode))
+        engines = [best] if best else None
+        if skip and best and not best.startswith("smtbmc"):
+            engines = None  # `skip` needs smtbmc
+    _, sby, _ = _render(rtl_bytes, top, clk, rst, mode=mode, depth=depth, engines=engines, skip=skip,
+                        properties=properties)
+    return {"rtl_bytes": rtl_bytes, "harness": harness, "sby": sby,
+            "engine": (engines or [DEFAULT_ENGINE])[0], "design_key": design_key, "incremental": inc,
+            "meta": {"rtl_path": str(rtl_path), "top": top, "mode": mode, "depth": depth},
+            "key": cache_key(rtl_bytes, harness, sby)}
+
+def _record_history(prep, result):
+    # Every verdict (fresh or cached) lands in the run history; enqueue only
+    meta = prep.get("meta") or {}
+    HISTORY.record_formal(Path(meta.get("rtl_path") or "").name, hashlib.sha256(prep["rtl_bytes"]).hexdigest()[:16],
+                          meta.get("top"), meta.get("mode"), result, depth=meta.get("depth"))
+    return result
+
+def cached_result(prep):
+    with tracing.span("formal.cache_lookup"):
+        return _cached_result(prep)
+
+def _cached_result(prep):
+    inc = prep.get("incremental")
+    if inc is not None and inc["reuse"] is not None:
+        return _record_history(prep, {**PROOFS.reused_result(inc), "cache_key": prep["key"]})
+    hit = CACHE.get(prep["key"])
+    if hit is None:
+        return None
+    if inc is not None:
+        hit = {**hit, "incremental": PROOFS.record(inc, hit, reused=True)}
+    return _record_history(prep, {**hit, "cached": True, "cache_key": prep["key"]})
+
+def make_workdir(prep):
+    run_id, work_dir = WORKSPACE.create()
+
+    (work_dir / "design.sv").write_bytes(prep["rtl_bytes"])
+    write_file(work_dir / "harness.sv", prep["harness"])
+    if prep.get("sbys"):
+        for name, sby in prep["sbys"].items():
+            write_file(work_dir / f"{name}.sby", sby)
+    else:
+        write_file(work_dir / "job.sby", prep["sby"])
+    return run_id, work_dir
+
+def _metrics(parser):
+    # verdict + counts, plus per-property results, reached depth and trace paths
+    rec = parser.record()
+    return {k: rec[k] for k in ("status", "proved", "failed", "covered", "undetermined", "walltime",
+                                "walltime_s", "step", "properties", "traces", "errors")}
+
+def collect_result(prep, run_id, work_dir: Path, out, err, ok, parser=None, job="job", extra=None):
+    jobdir = work_dir / job
     logfile = jobdir / "logfile.txt"
 
-    if logfile.exists():
-        metrics = parse_status_and_coverage(logfile)
+    if parser is not None and parser.done:
+        # Already parsed while streaming; skip re-reading the logfile
+        metrics = _metrics(parser)
+    elif logfile.exists():
+        with tracing.span("log.parse", streamed=False):
+            metrics = _metrics(parse_log(logfile))
     else:
         metrics = {
             "status": "ERROR" if not ok else "UNKNOWN",
             "proved": 0, "failed": 0, "covered": 0, "undetermined": 0, "walltime": None
         }
 
-    artifacts = []
-    if jobdir.exists():
-        for p in jobdir.rglob("*"):
-            if p.is_file() and p.suffix.lower() in {".vcd", ".txt"}:
-                artifacts.append(str(p.relative_to(Path("data"))))
+    with tracing.span("workspace.finalize"):
+        artifacts = WORKSPACE.finalize(run_id, work_dir, job=job, status=metrics["status"])
+
+    result = {"run_id": run_id, "stdout": out, "stderr": err, "artifacts": artifacts, **metrics,
+              "engine": prep.get("engine"), **(extra or {})}
+    CACHE.put(prep["key"], result)
+    if prep.get("incremental") is not None:
+        step = parser.step if parser is not None else None
+        result = {**result, "incremental": PROOFS.record(prep["incremental"], result, step=step)}
+    return _record_history(prep, {**result, "cached": False, "cache_key": prep["key"]})
+
+def _finalize_cancelled(run_id, work_dir, cancel):
+    # A killed run has no verdict: index the partial workdir for retention, cache nothing
+    if cancel is not None and cancel.cancelled:
+        WORKSPACE.finalize(run_id, work_dir, status="CANCELLED")
+        raise Cancelled()
+
+def run_portfolio(prep, run_id, work_dir: Path, cancel=None):
+    winner, lanes, timings = _run_portfolio(work_dir, prep["variants"],
+                                            on_start=cancel.register if cancel is not None else None)
+    _finalize_cancelled(run_id, work_dir, cancel)
+    ENGINE_STATS.record(prep["design_key"], {t["engine"]: t for t in timings.values()})
+    out, err, ok, parser = lanes.get(winner, ("", "", False, None))
+    return collect_result(prep, run_id, work_dir, out, err, ok, parser=parser, job=winner,
+                          extra={"engine": prep["variants"][winner], "portfolio": timings})
+
+def run_formal(rtl_path: str, top="counter", clk="clk", rst="rst", mode=None, force=False, depth=20,
+               engines=None, portfolio=False, incremental=False, properties=None, cancel=None):
+    # Identical RTL + harness + .sby + toolchain => reuse the stored verdict
+    # (incremental: identical cone of influence => reuse, see incremental.py)
+    # cancel: CancelToken; a cancelled run kills its solvers and raises Cancelled
+    prep = prepare_run(rtl_path, top=top, clk=clk, rst=rst, mode=mode, depth=depth,
+                       engines=engines, portfolio=portfolio and sby_binary() is not None,
+                       incremental=incremental, properties=properties)
+    if not force:
+        hit = cached_result(prep)
+        if hit is not None:
+            return hit
 
-    return {"run_id": run_id, "stdout": out, "stderr": err, "artifacts": artifacts, **metrics}
+    if cancel is not None:
+        cancel.check()
+    with tracing.span("formal.workdir"):
+        run_id, work_dir = make_workdir(prep)
+    if prep.get("variants"):
+        with tracing.span("sby.portfolio", lanes=len(prep["variants"])):
+            return run_portfolio(prep, run_id, work_dir, cancel=cancel)
+    parser = SbyLogParser()
+    out, err, ok = _run_sby(work_dir, parser=parser, cancel=cancel)
+    _finalize_cancelled(run_id, work_dir, cancel)
+    return collect_result(prep, run_id, work_dir, out, err, ok, parser=parser)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# backend/formal_verifier/sby_stub.py
+# Stand-in for `sby -f job.sby` (tests, load tests, CI without a toolchain):
+#   AEGIS_SBY_BIN=$PWD/backend/formal_verifier/sby_stub.py ./run.sh serve
+# Writes a SymbiYosys-shaped log (stdout + <job>/logfile.txt) after AEGIS_STUB_DELAY_S,
+# with the verdict from AEGIS_STUB_VERDICT (PASS | FAIL | UNKNOWN; cover jobs report reached covers).
+# Portfolio testing: engines matching AEGIS_STUB_SLOW_ENGINES (comma-separated substrings) take
+# AEGIS_STUB_SLOW_FACTOR x longer; with AEGIS_STUB_PIDDIR set, each run drops "<job>.<pid>" there
+# on start and "<job>.<pid>.done" when it finishes normally.
+import os, re, sys, time
+from pathlib import Path
+
+def main(argv):
+    if "--version" in argv:
+        print("SBY stub")
+        return 0
+    sby = Path(argv[argv.index("-f") + 1] if "-f" in argv else argv[-1])
+    text = sby.read_text()
+    mode = (re.search(r"^mode\s+(\w+)", text, re.M) or [None, "prove"])[1]
+    depth = int((re.search(r"^depth\s+(\d+)", text, re.M) or [None, 20])[1])
+    engine = (re.search(r"\[engines\]\s*\n\s*(.+)", text) or [None, "smtbmc"])[1].strip()
+    verdict = os.environ.get("AEGIS_STUB_VERDICT", "PASS").upper()
+    delay = float(os.environ.get("AEGIS_STUB_DELAY_S", "0.05"))
+    if any(e.strip() and e.strip() in engine for e in os.environ.get("AEGIS_STUB_SLOW_ENGINES", "").split(",")):
+        delay *= float(os.environ.get("AEGIS_STUB_SLOW_FACTOR", "100"))
+    pid_dir = os.environ.get("AEGIS_STUB_PIDDIR")
+    if pid_dir:
+        Path(pid_dir, f"{sby.stem}.{os.getpid()}").write_text("")
+
+    job = Path(sby.stem)
+    (job / "engine_0").mkdir(parents=True, exist_ok=True)
+    with open(job / "logfile.txt", "w") as log:
+        def emit(msg):
+            line = f"SBY {time.strftime('%H:%M:%S')} [{job.name}] {msg}"
+            print(line, flush=True)
+            log.write(line + "\n")
+
+        emit(f"engine_0: {engine}")
+        for step in range(depth):
+            emit(f"engine_0: ##   0:00:00  Checking assertions in step {step}..")
+            time.sleep(delay / max(depth, 1))
+        if mode == "cover":
+            emit("engine_0: ##   0:00:00  Reached cover statement at top_tb: harness.sv:1.1-1.2 (_witness_.cover) "
+                 f"in step {max(depth - 1, 0)}.")
+            verdict = "PASS"
+        elif verdict == "FAIL":
+            emit("engine_0: ##   0:00:00  Assert failed in top_tb: harness.sv:1.1-1.2 (_witness_.check)")
+            emit("engine_0: ##   0:00:00  Writing trace to VCD file: engine_0/trace.vcd")
+            (job / "engine_0" / "trace.vcd").write_text(
+                "$timescale 1ns $end\n$scope module top_tb $end\n$var wire 1 ! clk $end\n$upscope $end\n"
+                "$enddefinitions $end\n#0\n0!\n#1\n1!\n")
+        emit(f"engine_0: ##   0:00:00  Status: {'failed' if verdict == 'FAIL' else 'passed'}")
+        secs = int(delay)
+        emit(f"summary: Elapsed clock time [H:MM:SS (secs)]: 0:00:{secs:02d} ({secs})")
+        emit(f"summary: engine_0 ({engine}) returned {verdict.lower()}")
+        rc = {"PASS": 0, "FAIL": 2}.get(verdict, 16)
+        emit(f"DONE ({verdict}, rc={rc})")
+    (job / verdict).write_text("")
+    if pid_dir:
+        Path(pid_dir, f"{sby.stem}.{os.getpid()}.done").write_text("")
+    return rc
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
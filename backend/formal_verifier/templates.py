@@ -1,88 +1,335 @@
 # backend/formal_verifier/templates.py
+import re, ast, hashlib, operator, threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 
+MAX_DESIGNS = 256         # parsed RTL files kept (keyed by content hash)
+MAX_HARNESSES = 1024      # rendered harnesses kept
+MAX_CONST = 1 << 64       # parameter / width arithmetic bound (operands and results)
+MAX_EXPR_LEN = 256        # longer constant expressions aren't evaluated
+
 def write_file(path: Path, text: str):
     path.write_text(text)
 
-# -------- harnesses (no SVA property blocks) --------
-def harness_sva(top_module="counter", clk="clk", rst="rst"):
-    return f"""
-module {top_module}_tb;
-    reg {clk} = 0;
-    reg {rst} = 1;
-    wire [3:0] q;
-
-    {top_module} dut(.{clk}({clk}), .{rst}({rst}), .q(q));
-
-    always @(*) if ($initstate) assume({rst});
-
-    always @(posedge {clk}) begin
-        if ($past({rst})) assume(!{rst});
-        if ({rst}) begin
-            assert(q == 0);
-        end else begin
-            assert(q == $past(q) + 1);
-        end
-    end
-endmodule
-"""
+# -------- SV port parser --------
+_COMMENTS = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_MODULE_KW = re.compile(r"\b(?:macro)?module\s+(\w+)")
+_DIR = re.compile(r"\b(input|output|inout)\b")
+_PARAM = re.compile(r"\b(?:parameter|localparam)\b(?:\s+(?:integer|int|logic|bit|signed|unsigned))*"
+                    r"(?:\s*\[[^\]]*\])?\s+(\w+)\s*=\s*([^,;)]+)")
+_RANGE = re.compile(r"\[([^\]:]+):([^\]]+)\]")
+_SIZED = re.compile(r"\d*'[sS]?([bBoOdDhH])([0-9a-fA-F_xXzZ]+)")
+_BODY_DECL = re.compile(r"\b(input|output|inout)\b([^;]*);")
+_KEYWORDS = {"wire", "reg", "logic", "bit", "signed", "unsigned", "var", "tri", "integer", "int"}
 
-def harness_sva_fsm(top_module="fsm_buggy", clk="clk", rst="rst"):
-    return f"""
-module {top_module}_tb;
-    reg {clk} = 0;
-    reg {rst} = 1;
-    wire [1:0] state;
-    wire out;
-
-    {top_module} dut(.{clk}({clk}), .{rst}({rst}), .state(state), .out(out));
-
-    // Hold reset only at init, then release
-    always @(*) if ($initstate) assume({rst});
-
-    always @(posedge {clk}) begin
-        if ($past({rst})) assume(!{rst}); // deassert reset after step 0
-        if ({rst}) begin
-            assert(state == 0);
-        end else begin
-            // Choose a cover point that is guaranteed reachable (state==3)
-            cover(state == 2'b11);
-        end
-    end
-endmodule
-"""
+def _balanced(src, i):
+    """Index just past the parenthesis group opening at src[i]."""
+    depth = 0
+    for j in range(i, len(src)):
+        if src[j] == "(":
+            depth += 1
+        elif src[j] == ")":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    raise ValueError("unbalanced parentheses in module header")
 
+def _split_top(text, sep=","):
+    # split on `sep` outside (), [], {}
+    out, depth, cur = [], 0, []
+    for ch in text:
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        if ch == sep and depth == 0:
+            out.append("".join(cur))
+            cur = []
+        else:
+            cur.append(ch)
+    out.append("".join(cur))
+    return [s.strip() for s in out if s.strip()]
 
-# -------- SBY files (no [prove]/[cover] sections) --------
-def sby_file(top_tb="counter_tb", design_sv="design.sv", harness_sv="harness.sv"):
-    return f"""
-[options]
-mode prove
-depth 20
+_BINOPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod}
 
-[engines]
-smtbmc z3
+def _eval_node(node, params):
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        v = node.value
+    elif isinstance(node, ast.Name) and node.id in params:
+        v = params[node.id]
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        v = _eval_node(node.operand, params)
+        v = -v if isinstance(node.op, ast.USub) else v
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        a, b = _eval_node(node.left, params), _eval_node(node.right, params)
+        if isinstance(node.op, (ast.FloorDiv, ast.Mod)) and b == 0:
+            raise ValueError("division by zero")
+        v = _BINOPS[type(node.op)](a, b)
+    elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "_clog2"
+          and len(node.args) == 1 and not node.keywords):
+        v = max(0, (_eval_node(node.args[0], params) - 1).bit_length())
+    else:
+        raise ValueError(f"unsupported expression {type(node).__name__}")
+    if abs(v) > MAX_CONST:  # operands and results alike: no runaway products
+        raise ValueError("constant out of range")
+    return v
 
-[script]
-read -formal -sv {design_sv} {harness_sv}
-prep -top {top_tb}
-flatten
-setundef -zero
-clk2fflogic
+def _eval(expr, params):
+    """
+    Integer value of a constant width expression (parameters by default value), or None.
+    Walks the AST instead of eval(): only + - * / % (integer), unary minus,
+    parentheses, known parameter names and $clog2; no `**`.
+    """
+    if len(expr) > MAX_EXPR_LEN:
+        return None
+    expr = _SIZED.sub(lambda m: str(int(m.group(2).replace("_", ""),
+                                        {"b": 2, "o": 8, "d": 10, "h": 16}[m.group(1).lower()])), expr)
+    expr = re.sub(r"\$clog2\s*\(", "_clog2(", expr)
+    if "**" in expr or "//" in expr:
+        return None
+    try:
+        return _eval_node(ast.parse(expr.replace("/", "//").strip(), mode="eval").body, params)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
 
-[files]
-{design_sv}
-{harness_sv}
-"""
+def _width(decl, params):
+    w = 1
+    for msb, lsb in _RANGE.findall(decl):
+        a, b = _eval(msb, params), _eval(lsb, params)
+        if a is None or b is None:
+            return None
+        w *= abs(a - b) + 1
+    return w
+
+def _port(direction, decl, name, params):
+    rng = " ".join(f"[{a}:{b}]" for a, b in _RANGE.findall(decl))
+    return {"name": name, "dir": direction, "width": _width(decl, params), "range": rng or None}
+
+def _parse_module(src, name, start):
+    i = start
+    params = {}
+    header_params = None
+    m = re.compile(r"\s*#\s*\(").match(src, i)
+    if m:
+        end = _balanced(src, m.end() - 1)
+        header_params = src[m.end():end - 1]
+        i = end
+    ports, names = [], []
+    m = re.compile(r"\s*\(").match(src, i)
+    if m:
+        end = _balanced(src, m.end() - 1)
+        port_list = src[m.end():end - 1]
+        i = end
+    else:
+        port_list = ""
+    body_end = src.find("endmodule", i)
+    body = src[i:body_end if body_end >= 0 else len(src)]
+    for text in filter(None, [header_params, body]):
+        for p in _PARAM.finditer(text):
+            v = _eval(p.group(2).strip(), params)
+            if v is not None:
+                params[p.group(1)] = v
+
+    direction, decl = None, ""
+    for item in _split_top(port_list):
+        d = _DIR.search(item)
+        ident = re.findall(r"[A-Za-z_]\w*", _RANGE.sub(" ", item))
+        ident = [t for t in ident if t not in _KEYWORDS and t not in ("input", "output", "inout")]
+        if d:  # ANSI: direction / type / range carry over to following bare names
+            direction, decl = d.group(1), item[d.end():]
+        if not ident:
+            continue
+        if direction is None:
+            names.append(ident[-1])  # non-ANSI: declared in the body
+        else:
+            ports.append(_port(direction, decl, ident[-1], params))
+    if names:
+        declared = {}
+        for b in _BODY_DECL.finditer(body):
+            decls = _split_top(b.group(2))
+            head = decls[0] if decls else ""
+            for k, item in enumerate(decls):
+                ident = [t for t in re.findall(r"[A-Za-z_]\w*", _RANGE.sub(" ", item)) if t not in _KEYWORDS]
+                if ident:
+                    declared[ident[-1]] = _port(b.group(1), head if k else item, ident[-1], params)
+        ports += [declared.get(n, {"name": n, "dir": None, "width": None, "range": None}) for n in names]
+    return {"name": name, "ports": ports, "params": params}
+
+def parse_modules(src: str):
+    """{module name: {"ports": [{name, dir, width, range}], "params": {name: default}}} for an SV source."""
+    src = _COMMENTS.sub(" ", src)
+    return {m.group(1): _parse_module(src, m.group(1), m.end()) for m in _MODULE_KW.finditer(src)}
 
-def sby_file_cover(top_tb="fsm_buggy_tb", design_sv="design.sv", harness_sv="harness.sv"):
+_DESIGNS = OrderedDict()
+_LOCK = threading.Lock()
+STATS = {"parse_hits": 0, "parse_misses": 0, "render_hits": 0, "render_misses": 0}
+
+def design_modules(rtl_bytes: bytes, digest=None):
+    """parse_modules() once per distinct file content."""
+    digest = digest or hashlib.sha256(rtl_bytes).hexdigest()
+    with _LOCK:
+        mods = _DESIGNS.get(digest)
+        if mods is not None:
+            _DESIGNS.move_to_end(digest)
+            STATS["parse_hits"] += 1
+            return mods
+    mods = parse_modules(rtl_bytes.decode(errors="ignore"))
+    with _LOCK:
+        STATS["parse_misses"] += 1
+        _DESIGNS[digest] = mods
+        while len(_DESIGNS) > MAX_DESIGNS:
+            _DESIGNS.popitem(last=False)
+    return mods
+
+# -------- property templates --------
+_COUNTER_NAMES = re.compile(r"(q|count|cnt|counter)(_o|_out)?$", re.I)
+_CLK_NAMES = re.compile(r"(clk|clock)", re.I)
+_RST_NAMES = re.compile(r"(rst|reset)", re.I)
+_ACTIVE_LOW = re.compile(r"(_n|_ni|n|_b)$", re.I)
+
+class PropertyTemplate:
+    """
+    A reusable check: the ports it applies to and one SV statement per port,
+    placed in the reset branch (phase="reset") or the post-reset branch
+    (phase="run") of the harness's clocked block.
+    """
+    def __init__(self, name, phase, modes, applies, statement, doc):
+        self.name, self.phase, self.modes = name, phase, modes
+        self.applies, self.statement, self.doc = applies, statement, doc
+
+    def lines(self, ports):
+        return [self.statement(p) for p in ports if self.applies(p)]
+
+def _is_out(p):
+    return p["dir"] == "output" and p["width"] is not None
+
+PROPERTY_TEMPLATES = {t.name: t for t in [
+    PropertyTemplate("reset_zero", "reset", ("prove", "cover"), _is_out,
+                     lambda p: f"assert({p['name']} == 0);", "outputs read 0 while reset is held"),
+    PropertyTemplate("counter_step", "run", ("prove",),
+                     lambda p: _is_out(p) and p["width"] > 1 and _COUNTER_NAMES.match(p["name"]),
+                     lambda p: f"assert({p['name']} == $past({p['name']}) + 1);",
+                     "counter-like outputs (q, count, cnt) increment every cycle out of reset"),
+    PropertyTemplate("reach_max", "run", ("cover",), lambda p: _is_out(p) and p["width"] > 1,
+                     lambda p: f"cover({p['name']} == {p['width']}'b{'1' * p['width']});",
+                     "multi-bit outputs reach all-ones"),
+    PropertyTemplate("toggle", "run", ("cover",), _is_out,
+                     lambda p: f"cover({p['name']} != $past({p['name']}));", "every output changes at least once"),
+]}
+DEFAULT_PROPERTIES = {"prove": ("reset_zero", "counter_step"), "cover": ("reset_zero", "reach_max")}
+
+def _pick(ports, wanted, pattern, what, required=True):
+    ins = [p for p in ports if p["dir"] == "input" and p["width"] == 1]
+    if any(p["name"] == wanted for p in ins):
+        return wanted
+    # requested name isn't a port: fall back to the design's own clock/reset input
+    for p in ins:
+        if pattern.search(p["name"]):
+            return p["name"]
+    if required:
+        raise ValueError(f"no {what} input found (asked for {wanted!r})")
+    return None
+
+def _decl(p):
+    w = p["width"]
+    return f"[{w - 1}:0] " if w and w > 1 else "" if w == 1 else f"{p['range'] or ''} "
+
+def _auto_mode(ports):
+    # prove when a post-reset assertion applies to this interface, otherwise look for cover points
+    run = [PROPERTY_TEMPLATES[n] for n in DEFAULT_PROPERTIES["prove"] if PROPERTY_TEMPLATES[n].phase == "run"]
+    return "prove" if any(t.lines(ports) for t in run) else "cover"
+
+_HARNESSES = OrderedDict()
+
+def render_harness(rtl_bytes: bytes, top, clk="clk", rst="rst", mode=None, properties=None):
+    """
+    Harness module `<top>_tb` generated from `top`'s ports: clock/reset driven
+    as before (reset held only at init), other inputs free (anyseq), every port
+    wired to the dut, and the selected property templates (default per mode).
+    mode=None picks prove if a run-phase assertion applies, else cover;
+    "bmc" uses the prove templates. Memoized on (design hash, arguments). Returns {harness, mode, clk, rst, properties}.
+    """
+    digest = hashlib.sha256(rtl_bytes).hexdigest()
+    key = (digest, top, clk, rst, mode, tuple(properties) if properties else None)
+    with _LOCK:
+        hit = _HARNESSES.get(key)
+        if hit is not None:
+            _HARNESSES.move_to_end(key)
+            STATS["render_hits"] += 1
+            return hit
+
+    mods = design_modules(rtl_bytes, digest)
+    if top not in mods:
+        raise ValueError(f"module {top!r} not found in design (modules: {', '.join(mods) or 'none'})")
+    ports = mods[top]["ports"]
+    clk_name = _pick(ports, clk, _CLK_NAMES, "clock")
+    rst_name = _pick(ports, rst, _RST_NAMES, "reset", required=False)
+    mode = mode or _auto_mode(ports)
+    pmode = "prove" if mode == "bmc" else mode
+    if pmode not in DEFAULT_PROPERTIES:
+        raise ValueError(f"unknown mode: {mode}")
+    names = list(properties or DEFAULT_PROPERTIES[pmode])
+    unknown = [n for n in names if n not in PROPERTY_TEMPLATES]
+    if unknown:
+        raise ValueError(f"unknown property templates: {', '.join(unknown)}")
+    temps = [PROPERTY_TEMPLATES[n] for n in names if pmode in PROPERTY_TEMPLATES[n].modes]
+    checked = [p for p in ports if p["name"] not in (clk_name, rst_name)]
+
+    decls = [f"    reg {clk_name} = 0;"]
+    active = None
+    if rst_name:
+        low = bool(_ACTIVE_LOW.search(rst_name))
+        decls.append(f"    reg {rst_name} = {0 if low else 1};")
+        active = f"!{rst_name}" if low else rst_name
+    for p in checked:
+        if p["dir"] == "input":
+            decls.append(f"    (* anyseq *) reg {_decl(p)}{p['name']};")
+        else:
+            decls.append(f"    wire {_decl(p)}{p['name']};")
+    conns = ", ".join(f".{p['name']}({p['name']})" for p in ports)
+
+    reset_lines = [l for t in temps if t.phase == "reset" for l in t.lines(checked)] if active else []
+    run_lines = [l for t in temps if t.phase == "run" for l in t.lines(checked)]
+    body = []
+    if active:
+        body.append(f"        if ($past({active})) assume(!({active}));")
+        body.append(f"        if ({active}) begin")
+        body += [f"            {l}" for l in reset_lines]
+        body.append("        end else begin")
+        body += [f"            {l}" for l in run_lines]
+        body.append("        end")
+    else:
+        body += [f"        {l}" for l in run_lines]
+
+    harness = "\n".join([
+        "", f"module {top}_tb;", *decls, "", f"    {top} dut({conns});", "",
+        *([f"    always @(*) if ($initstate) assume({active});", ""] if active else []),
+        f"    always @(posedge {clk_name}) begin", *body, "    end", "endmodule", "",
+    ])
+    out = {"harness": harness, "mode": mode, "clk": clk_name, "rst": rst_name,
+           "properties": [t.name for t in temps if (active or t.phase == "run") and t.lines(checked)]}
+    with _LOCK:
+        STATS["render_misses"] += 1
+        _HARNESSES[key] = out
+        while len(_HARNESSES) > MAX_HARNESSES:
+            _HARNESSES.popitem(last=False)
+    return out
+
+# -------- SBY files --------
+@lru_cache(maxsize=1024)
+def _sby(mode, top_tb, design_sv, harness_sv, depth, engines, skip):
+    # skip N (cover): steps 0..N-1 were already searched (incremental runs), BMC starts at N
+    skip = f"skip {skip}\n" if skip and mode == "cover" else ""
+    engines = "\n".join(engines or ("smtbmc z3",))
     return f"""
 [options]
-mode cover
-depth 20
-
+mode {mode}
+depth {depth}
+{skip}
 [engines]
-smtbmc z3
+{engines}
 
 [script]
 read -formal -sv {design_sv} {harness_sv}
@@ -95,3 +342,23 @@ clk2fflogic
 {design_sv}
 {harness_sv}
 """
+
+def sby_file(top_tb="counter_tb", design_sv="design.sv", harness_sv="harness.sv", depth=20, engines=None):
+    return _sby("prove", top_tb, design_sv, harness_sv, depth, tuple(engines or ()), None)
+
+def sby_file_bmc(top_tb="counter_tb", design_sv="design.sv", harness_sv="harness.sv", depth=20, engines=None):
+    # Bounded check only: asserts hold for `depth` steps, no induction
+    return _sby("bmc", top_tb, design_sv, harness_sv, depth, tuple(engines or ()), None)
+
+def sby_file_cover(top_tb="fsm_buggy_tb", design_sv="design.sv", harness_sv="harness.sv", depth=20, engines=None,
+                   skip=None):
+    return _sby("cover", top_tb, design_sv, harness_sv, depth, tuple(engines or ()), skip)
+
+def template_stats():
+    info = _sby.cache_info()
+    with _LOCK:
+        return {**STATS, "designs": len(_DESIGNS), "harnesses": len(_HARNESSES),
+                "sby_hits": info.hits, "sby_misses": info.misses,
+                "templates": {n: {"phase": t.phase, "modes": list(t.modes), "doc": t.doc}
+                              for n, t in PROPERTY_TEMPLATES.items()},
+                "defaults": {m: list(v) for m, v in DEFAULT_PROPERTIES.items()}}
@@ -0,0 +1,191 @@
+# backend/formal_verifier/vcd.py
+import re, mmap, threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from .artifacts import VARIANTS, file_key
+from ..common import tracing
+
+MAX_INDEXES = 16          # VcdIndex objects kept in memory (times/offsets arrays)
+SCAN_WINDOW = 1 << 20     # first backward window when looking for initial values; doubles each step
+CHUNK = 1 << 20
+
+_ENDDEFS = re.compile(rb"\$enddefinitions\s+\$end")
+_VAR = re.compile(rb"\$var\s+(\S+)\s+(\d+)\s+(\S+)\s+(\S+)(?:\s+(\[[^\]]*\]))?\s+\$end")
+_VAR_TEXT = re.compile(r"\$var\s+\S+\s+\d+\s+(\S+)\s+.*?\$end\s*", re.S)
+_SCOPE = re.compile(rb"\$(scope)\s+\S+\s+(\S+)\s+\$end|\$(upscope)\s+\$end")
+_TIMESCALE = re.compile(rb"\$timescale\s+(.*?)\s*\$end", re.S)
+_TIME = re.compile(rb"^#(\d+)", re.M)
+
+def _changes(ids=None):
+    """Value-change lines ("0!", "b1010 !", "r1.5 !") for `ids`, or for any id."""
+    ident = b"|".join(re.escape(i) for i in ids) if ids else rb"\S+"
+    return re.compile(rb"^(?:([01xzXZ])|([bBrR]\S+)[ \t]+)(" + ident + rb")[ \t\r]*$", re.M)
+
+class VcdIndex:
+    """
+    Byte-offset index of one VCD file version: the $var table from the header
+    and, for every `#<time>` marker, its time and file offset (found with one
+    regex pass over an mmap, persisted next to the compressed variants). A
+    time window then maps to a byte range with two binary searches.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.key = file_key(self.path)
+        self.size = self.path.stat().st_size
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = _ENDDEFS.search(mm)
+            if end is None:
+                raise ValueError(f"not a VCD file (no $enddefinitions): {self.path.name}")
+            self.header = mm[:end.end()]
+            self.body_start = end.end()
+            self._parse_header()
+            cached = VARIANTS.root / f"{self.key}.npz"
+            try:
+                with np.load(cached) as z:
+                    self.times, self.offsets = z["times"], z["offsets"]
+            except (OSError, KeyError, ValueError):
+                self.times, self.offsets = self._scan(mm)
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cached.with_name(cached.stem + f".{threading.get_ident()}.tmp.npz")
+                np.savez(tmp, times=self.times, offsets=self.offsets)
+                tmp.replace(cached)
+
+    def _parse_header(self):
+        self.vars = []            # {id, name, width, type, range}
+        scope = []
+        ts = _TIMESCALE.search(self.header)
+        self.timescale = " ".join(ts.group(1).decode(errors="ignore").split()) if ts else None
+        pos = 0
+        for m in re.finditer(rb"\$(?:scope|upscope|var)\b", self.header):
+            if m.start() < pos:
+                continue
+            if m.group(0) == b"$var":
+                v = _VAR.match(self.header, m.start())
+                if v:
+                    self.vars.append({"id": v.group(3).decode(), "name": ".".join(scope + [v.group(4).decode()]),
+                                      "width": int(v.group(2)), "type": v.group(1).decode(),
+                                      "range": v.group(5).decode() if v.group(5) else None})
+                    pos = v.end()
+            else:
+                s = _SCOPE.match(self.header, m.start())
+                if s and s.group(1):
+                    scope.append(s.group(2).decode())
+                elif s and scope:
+                    scope.pop()
+                pos = s.end() if s else m.end()
+        self._by_name = {}
+        for v in self.vars:
+            self._by_name.setdefault(v["name"], v["id"])
+
+    def _scan(self, mm):
+        times, offsets = [], []
+        for m in _TIME.finditer(mm, self.body_start):
+            times.append(int(m.group(1)))
+            offsets.append(m.start())
+        return np.asarray(times, dtype=np.int64), np.asarray(offsets, dtype=np.int64)
+
+    def select(self, signals):
+        """VCD ids for signal names: full hierarchical name, or any unambiguous suffix (`dut.q`, `q`)."""
+        ids = []
+        for s in signals:
+            if s in self._by_name:
+                ids.append(self._by_name[s])
+                continue
+            hits = {v["id"] for v in self.vars if v["name"].endswith("." + s)}
+            if not hits:
+                raise KeyError(f"unknown signal: {s}")
+            if len(hits) > 1:
+                raise KeyError(f"ambiguous signal: {s}")
+            ids.append(hits.pop())
+        return list(dict.fromkeys(ids))
+
+    def _offset_after(self, t):
+        # byte offset of the first time marker strictly after t (file end if none)
+        i = int(np.searchsorted(self.times, t, side="right"))
+        return int(self.offsets[i]) if i < len(self.offsets) else self.size
+
+    def _values_before(self, mm, off, ids):
+        """Last value of each id written before byte `off`: scan backwards in growing windows."""
+        pattern = _changes(ids)
+        want = set(ids) if ids else {v["id"].encode() for v in self.vars}
+        found, hi, width = {}, off, SCAN_WINDOW
+        while hi > self.body_start and len(found) < len(want):
+            lo = max(self.body_start, hi - width)
+            if lo > self.body_start:
+                lo = mm.find(b"\n", lo, hi) + 1 or hi   # start on a line boundary
+            window = {}
+            for m in pattern.finditer(mm, lo, hi):
+                window[m.group(3)] = m.group(1) or m.group(2)
+            for k, v in window.items():
+                found.setdefault(k, v)
+            hi, width = lo, width * 2
+        return found
+
+    def window(self, t0=0, t1=None, signals=None):
+        """Yield a standalone VCD covering [t0, t1]: the header (only the selected $vars),
+        the value of every selected signal at t0 as $dumpvars, then the changes up to t1."""
+        ids = self.select(signals) if signals else None
+        keep = set(ids) if ids else None
+        header = self.header.decode(errors="ignore")
+        if keep is not None:
+            header = _VAR_TEXT.sub(lambda m: m.group(0) if m.group(1) in keep else "", header)
+        yield (header + "\n").encode()
+        start = self._offset_after(t0)
+        end = self._offset_after(t1) if t1 is not None else self.size
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            init = self._values_before(mm, start, [i.encode() for i in ids] if ids else None)
+            lines = [f"#{t0}", "$dumpvars"]
+            for i, v in init.items():
+                lines.append((v + b" " + i if len(v) > 1 else v + i).decode(errors="ignore"))
+            yield ("\n".join(lines + ["$end", ""])).encode()
+            if keep is None:
+                for pos in range(start, end, CHUNK):
+                    yield mm[pos:min(pos + CHUNK, end)]
+                return
+            # Signal subset: only timestamps that carry a kept change
+            pattern = re.compile(_TIME.pattern + rb"|" + _changes([i.encode() for i in ids]).pattern, re.M)
+            pos, stamp = start, None
+            while pos < end:
+                hi = min(end, pos + CHUNK)
+                if hi < end:
+                    hi = mm.find(b"\n", hi, end) + 1 or end
+                out = []
+                for m in pattern.finditer(mm, pos, hi):
+                    if m.group(0).startswith(b"#"):
+                        stamp = m.group(0)
+                        continue
+                    if stamp is not None:
+                        out.append(stamp)
+                        stamp = None
+                    out.append(m.group(0).rstrip())
+                if out:
+                    yield b"\n".join(out) + b"\n"
+                pos = hi
+
+    def summary(self):
+        return {
+            "size": self.size, "timescale": self.timescale, "timestamps": len(self.times),
+            "t_min": int(self.times[0]) if len(self.times) else None,
+            "t_max": int(self.times[-1]) if len(self.times) else None,
+            "signals": [{"name": v["name"], "width": v["width"]} for v in self.vars],
+        }
+
+_INDEXES = OrderedDict()
+_LOCK = threading.Lock()
+
+def vcd_index(path: Path):
+    """VcdIndex for the file's current version; built once, then served from memory or disk."""
+    key = file_key(Path(path))
+    with _LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None:
+            _INDEXES.move_to_end(key)
+            return idx
+    with tracing.span("vcd.index"):
+        idx = VcdIndex(path)
+    with _LOCK:
+        _INDEXES[key] = idx
+        while len(_INDEXES) > MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    return idx
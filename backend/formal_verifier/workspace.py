@@ -0,0 +1,206 @@
+# backend/formal_verifier/workspace.py
+import os, json, time, uuid, shutil, threading
+from pathlib import Path
+
+# Scratch root for formal runs. Point AEGIS_WORK_ROOT at a tmpfs (e.g. /dev/shm/aegis)
+# to keep solver scratch off disk; artifacts are addressed through the index either way.
+WORK_ROOT = Path(os.environ.get("AEGIS_WORK_ROOT", "data/tmp"))
+ARTIFACT_PREFIX = "tmp"           # artifacts are reported as tmp/<run dir>/<path>
+ARTIFACT_SUFFIXES = {".vcd", ".txt"}
+INDEX_NAME = "index.json"
+PASSING = {"PASSED", "COVERED"}
+
+class RetentionPolicy:
+    def __init__(self, keep_latest=50, max_bytes=1 << 30, ttl_pass_s=24 * 3600.0,
+                 ttl_fail_s=7 * 24 * 3600.0, gc_interval_s=300.0):
+        self.keep_latest = keep_latest      # always keep the N most recent runs
+        self.max_bytes = max_bytes          # total budget across runs
+        self.ttl_pass_s = ttl_pass_s        # passes / covers expire sooner ...
+        self.ttl_fail_s = ttl_fail_s        # ... than failures and errors
+        self.gc_interval_s = gc_interval_s
+
+    def ttl(self, status):
+        return self.ttl_pass_s if status in PASSING else self.ttl_fail_s
+
+class Workspace:
+    """
+    Owns formal run directories: creates them, writes an artifact index when a
+    run completes (work_dir/index.json, mirrored in memory), resolves artifact
+    paths in O(1) from that index and garbage-collects by retention policy.
+    The root is scanned once, lazily, to pick up runs from earlier processes.
+    """
+    def __init__(self, root=WORK_ROOT, policy=None):
+        self.root = Path(root)
+        self.policy = policy or RetentionPolicy()
+        self._lock = threading.Lock()
+        self._index = {}          # run_id -> entry
+        self._artifacts = {}      # "tmp/<dir>/<rel>" -> absolute Path
+        self._active = set()      # run_ids created but not yet finalized
+        self._loaded = False
+        self._gc_thread = None
+
+    # ---- lifecycle ----
+    def create(self):
+        self._ensure_loaded()
+        run_id = str(uuid.uuid4())[:8]
+        work_dir = self.root / f"formal_{run_id}"
+        work_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._active.add(run_id)
+        return run_id, work_dir
+
+    def finalize(self, run_id, work_dir: Path, job="job", status="UNKNOWN"):
+        """Index the run's artifacts and persist the entry; returns artifact rel paths."""
+        jobdir = work_dir / job
+        files = []
+        # SBY puts logs at the top of the job dir and traces in engine_*/; skip src/ and model/
+        if jobdir.is_dir():
+            for d in [jobdir] + [e for e in jobdir.iterdir() if e.is_dir() and e.name.startswith("engine_")]:
+                files += [f for f in d.iterdir() if f.is_file() and f.suffix.lower() in ARTIFACT_SUFFIXES]
+        artifacts = {f"{ARTIFACT_PREFIX}/{work_dir.name}/{f.relative_to(work_dir).as_posix()}": f.stat().st_size
+                     for f in files}
+        entry = {
+            "run_id": run_id, "dir": work_dir.name, "status": status, "finished": time.time(),
+            "bytes": _du(work_dir), "artifacts": artifacts,
+        }
+        (work_dir / INDEX_NAME).write_text(json.dumps(entry))
+        with self._lock:
+            self._active.discard(run_id)
+            self._add(entry, work_dir)
+        return list(artifacts)
+
+    def _add(self, entry, work_dir):
+        self._index[entry["run_id"]] = {**entry, "path": str(work_dir)}
+        for rel in entry["artifacts"]:
+            self._artifacts[rel] = work_dir / rel.split("/", 2)[2]
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for d in (os.scandir(self.root) if self.root.is_dir() else ()):
+                if not (d.is_dir() and d.name.startswith("formal_")):
+                    continue
+                work_dir = Path(d.path)
+                try:
+                    entry = json.loads((work_dir / INDEX_NAME).read_text())
+                except (OSError, ValueError):
+                    entry = _legacy_entry(work_dir)
+                self._add(entry, work_dir)
+            self._loaded = True
+
+    # ---- lookups ----
+    def resolve(self, rel_path: str):
+        self._ensure_loaded()
+        rel = rel_path.lstrip("/")
+        p = self._artifacts.get(rel)
+        if p is None:
+            p = self._reload(rel)
+        return p if p is not None and p.is_file() else None
+
+    def _reload(self, rel):
+        # Miss: another process (multi-worker serving) may have finalized the run
+        # since our scan; pick up just that run's index.json from disk
+        prefix, _, rest = rel.partition("/")
+        name = rest.split("/", 1)[0]
+        if prefix != ARTIFACT_PREFIX or not name.startswith("formal_"):
+            return None
+        work_dir = self.root / name
+        try:
+            entry = json.loads((work_dir / INDEX_NAME).read_text())
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._add(entry, work_dir)
+            return self._artifacts.get(rel)
+
+    def exists(self, rel_path: str):
+        return self.resolve(rel_path) is not None
+
+    def get(self, run_id):
+        self._ensure_loaded()
+        return self._index.get(run_id)
+
+    def runs(self, status=None, limit=100):
+        self._ensure_loaded()
+        with self._lock:
+            entries = sorted(self._index.values(), key=lambda e: e["finished"], reverse=True)
+        return [e for e in entries if status is None or e["status"] == status][:limit]
+
+    # ---- retention ----
+    def gc(self, now=None):
+        """Apply the retention policy; returns removed run ids."""
+        self._ensure_loaded()
+        now = now or time.time()
+        pol = self.policy
+        with self._lock:
+            entries = sorted(self._index.values(), key=lambda e: e["finished"], reverse=True)
+            keep, doomed = entries[:pol.keep_latest], []
+            for e in entries[pol.keep_latest:]:
+                (doomed if now - e["finished"] > pol.ttl(e["status"]) else keep).append(e)
+            # Over budget: drop oldest passes first, then oldest failures (never the newest N)
+            total = sum(e["bytes"] for e in keep)
+            if total > pol.max_bytes:
+                spare = sorted(keep[pol.keep_latest:], key=lambda e: (e["status"] not in PASSING, e["finished"]))
+                for e in spare:
+                    if total <= pol.max_bytes:
+                        break
+                    doomed.append(e)
+                    total -= e["bytes"]
+            for e in doomed:
+                self._index.pop(e["run_id"], None)
+                for rel in e["artifacts"]:
+                    self._artifacts.pop(rel, None)
+        for e in doomed:
+            shutil.rmtree(e["path"], ignore_errors=True)
+        return [e["run_id"] for e in doomed]
+
+    def start_gc(self):
+        if self._gc_thread is not None and self._gc_thread.is_alive():
+            return
+        def loop():
+            while True:
+                try:
+                    self.gc()
+                except Exception:
+                    pass
+                time.sleep(self.policy.gc_interval_s)
+        self._gc_thread = threading.Thread(target=loop, name="formal-workspace-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stats(self):
+        self._ensure_loaded()
+        with self._lock:
+            return {"root": str(self.root), "runs": len(self._index), "active": len(self._active),
+                    "bytes": sum(e["bytes"] for e in self._index.values()),
+                    "artifacts": len(self._artifacts)}
+
+def _du(path: Path):
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, f)).st_size
+            except OSError:
+                pass
+    return total
+
+def _legacy_entry(work_dir: Path):
+    """Entry for a run dir written before the index existed (status from SBY marker files)."""
+    jobdir = work_dir / "job"
+    status = "UNKNOWN"
+    for marker, st in (("PASS", "PASSED"), ("FAIL", "FAILED"), ("ERROR", "ERROR")):
+        if (jobdir / marker).exists():
+            status = st
+            break
+    artifacts = {}
+    if jobdir.is_dir():
+        for p in jobdir.rglob("*"):
+            if p.is_file() and p.suffix.lower() in ARTIFACT_SUFFIXES:
+                artifacts[f"{ARTIFACT_PREFIX}/{work_dir.name}/{p.relative_to(work_dir).as_posix()}"] = p.stat().st_size
+    return {"run_id": work_dir.name.split("_", 1)[-1], "dir": work_dir.name, "status": status,
+            "finished": work_dir.stat().st_mtime, "bytes": _du(work_dir), "artifacts": artifacts}
+
+WORKSPACE = Workspace()
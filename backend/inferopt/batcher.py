@@ -0,0 +1,195 @@
+# backend/inferopt/batcher.py
+import asyncio, time
+import numpy as np
+from ..common import tracing
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT_MS = 2.0
+
+def _fail(pending, exc):
+    for _, fut, _, _, _ in pending:
+        if not fut.done():
+            fut.set_exception(exc)
+
+class MicroBatcher:
+    """
+    Dynamic request-coalescing batcher in front of InferService.forward.
+    Concurrent submits are queued and flushed as one forward pass once
+    max_batch rows are pending or max_wait_ms has passed since the first one.
+    When the service's tuner is enabled, each flush takes its max_batch /
+    max_wait_ms / workers / runtime from the arm selected for the current context
+    (queue depth, request rate) and reports latency and rows back. Up to
+    executor.workers flushes are in flight at once, read per flush, so an
+    executor resize takes effect right away.
+    Traced requests carry their trace through the queue; the flush adds the
+    shared stages (queue wait, gather, forward, tuner) to each of them.
+    """
+    def __init__(self, service, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS, runtime="eager"):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.runtime = runtime
+        self._queue = None
+        self._task = None
+        self._busy = 0              # flushes holding a lane
+        self._lane_freed = None
+        self._inflight = set()
+        self.flushes = 0
+        self.rows = 0
+        self.last_flush_rows = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._busy = 0
+            self._lane_freed = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    def _limits(self, arm):
+        if arm is None:
+            return self.max_batch, self.max_wait_ms
+        return arm.get("batch", self.max_batch), arm.get("max_wait_ms", self.max_wait_ms)
+
+    async def submit(self, x: np.ndarray, lanes=1):
+        """
+        Queue `x` (rows, in_dim) and wait for its slice of the coalesced output.
+        `lanes` is the caller's requested forward parallelism; it applies when
+        the tuner isn't choosing (the flush uses the largest request among its rows).
+        """
+        self._ensure_started()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((x, fut, time.perf_counter(), tracing.current(), max(1, int(lanes))))
+        return await fut
+
+    async def _loop(self):
+        pending = []
+        try:
+            await self._collect(pending)
+        except asyncio.CancelledError:
+            # close(): requests already taken off the queue fail too, not just the queued ones
+            _fail(pending, RuntimeError("batcher closed"))
+            raise
+
+    async def _collect(self, pending):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending.clear()
+            first = await self._queue.get()
+            tuner = self.service.tuner
+            t_sel = time.perf_counter()
+            ctx = tuner.context_of(self._queue.qsize() + 1, self.service.stats()["rps"])
+            arm = tuner.select_arm(ctx) if tuner.enabled else None
+            t_sel = (t_sel, time.perf_counter())
+            max_batch, max_wait_ms = self._limits(arm)
+
+            pending.append(first)
+            rows = first[0].shape[0]
+            deadline = loop.time() + max_wait_ms / 1000.0
+            while rows < max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += item[0].shape[0]
+
+            while self._busy >= self.service.executor.workers:
+                self._lane_freed.clear()
+                await self._lane_freed.wait()
+            self._busy += 1
+            task = loop.create_task(self._flush(list(pending), arm, tuner, ctx, t_sel))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _flush(self, pending, arm, tuner=None, ctx=None, t_sel=None):
+        # Single writable inputs go straight through; anything else is gathered
+        # into a pooled (rows, in_dim) buffer instead of a fresh concatenate.
+        traced = [p for p in pending if p[3] is not None]
+        t_start = time.perf_counter()
+        buf = None
+        # Everything from here to the forward can raise (mixed in_dim, dtype): any
+        # failure fails the whole flush and still releases the lane and the buffer
+        try:
+            if len(pending) == 1 and pending[0][0].flags.writeable:
+                x = pending[0][0]
+            else:
+                rows = sum(p[0].shape[0] for p in pending)
+                buf = self.service.buffers.acquire(rows, pending[0][0].shape[1])
+                x = buf.numpy()
+                np.concatenate([p[0] for p in pending], out=x)
+            lanes = arm.get("workers", 1) if arm is not None else max(p[4] for p in pending)
+            runtime = arm.get("runtime", self.runtime) if arm is not None else self.runtime
+            t_fwd = time.perf_counter()
+            y, forward_ms = await self.service.executor.forward_async(x, lanes=lanes, runtime=runtime)
+        except Exception as e:
+            _fail(pending, e)
+            return
+        finally:
+            self._busy -= 1
+            self._lane_freed.set()
+            if buf is not None:
+                self.service.buffers.release(buf)
+
+        done = time.perf_counter()
+        rows = x.shape[0]
+        for _, _, t_in, trace, _ in traced:
+            if t_sel is not None and arm is not None:
+                trace.add("tuner.select", *t_sel)
+            trace.add("batch.queue", t_in, t_start)
+            trace.add("batch.gather", t_start, t_fwd, requests=len(pending))
+            trace.add("model.forward", t_fwd, done, rows=rows, runtime=runtime)
+        self.flushes += 1
+        self.rows += rows
+        self.last_flush_rows = rows
+
+        latencies, sizes = [], []
+        start = 0
+        for xi, fut, t_in, _, _ in pending:
+            n = xi.shape[0]
+            latency_ms = (done - t_in) * 1000.0
+            latencies.append(latency_ms)
+            sizes.append(n)
+            if not fut.done():
+                fut.set_result({
+                    "output": y[start:start + n], "latency_ms": latency_ms,
+                    "forward_ms": forward_ms, "coalesced": rows, "requests": len(pending), "lanes": lanes,
+                })
+            start += n
+
+        self.service.telemetry.record_many(latencies, sizes, busy_ms=forward_ms)
+        self.service.history.record_infer(self.service.name, arm or {"batch": self.max_batch, "max_wait_ms": self.max_wait_ms,
+                                                        "runtime": self.runtime},
+                             latencies, sizes, coalesced=rows, forward_ms=forward_ms)
+        if arm is not None:
+            t_upd = time.perf_counter()
+            tuner.update(arm, sum(latencies) / len(latencies), rows=rows, context=ctx, worst_ms=max(latencies))
+            t_end = time.perf_counter()
+            for p in traced:
+                p[3].add("tuner.update", t_upd, t_end)
+
+    def close(self):
+        """Stop the loop (thread-safe); anything still queued fails instead of hanging."""
+        task = self._task
+        if task is None or task.done():
+            return
+        def stop():
+            task.cancel()
+            queued = []
+            while not self._queue.empty():
+                queued.append(self._queue.get_nowait())
+            _fail(queued, RuntimeError("batcher closed"))
+        try:
+            task.get_loop().call_soon_threadsafe(stop)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def snapshot(self):
+        return {
+            "max_batch": self.max_batch, "max_wait_ms": self.max_wait_ms, "runtime": self.runtime,
+            "flushes": self.flushes, "rows": self.rows,
+            "avg_rows_per_flush": (self.rows / self.flushes) if self.flushes else None,
+            "last_flush_rows": self.last_flush_rows,
+        }
@@ -0,0 +1,2 @@
+# backend/inferopt/bench/__init__.py
+from .harness import make_case, run_case, run_tuner, sweep, compare, accuracy_delta
@@ -0,0 +1,57 @@
+# backend/inferopt/bench/__main__.py
+# python -m backend.inferopt.bench --batches 1,4,16 --workers 1,2 --out bench.json
+import argparse, json, sys
+from pathlib import Path
+from .harness import DEFAULT_BASELINE, DEFAULT_TOLERANCE, sweep, compare, load_json, save_json
+
+def _ints(s):
+    return tuple(int(v) for v in s.split(",") if v)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m backend.inferopt.bench",
+                                 description="Sweep TinyNet inference configs and check for regressions.")
+    ap.add_argument("--batches", type=_ints, default=(1, 4, 16, 64))
+    ap.add_argument("--workers", type=_ints, default=(1, 2))
+    ap.add_argument("--threads", type=_ints, default=(1,))
+    ap.add_argument("--in-dims", type=_ints, default=(64,))
+    ap.add_argument("--executor", choices=["thread", "process"], default="thread")
+    ap.add_argument("--runtimes", default="eager", help="comma-separated: eager,script,compile,int8")
+    ap.add_argument("--iters", type=int, default=200)
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--policies", default="", help="comma-separated tuner policies to bench, e.g. ucb1,thompson")
+    ap.add_argument("--tuner-trials", type=int, default=200)
+    ap.add_argument("--tuner-kind", choices=["bandit", "contextual"], default="bandit")
+    ap.add_argument("--out", help="write JSON results here")
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = ap.parse_args(argv)
+
+    res = sweep(args.batches, args.workers, args.threads, args.in_dims, executor=args.executor,
+                iters=args.iters, warmup=args.warmup,
+                policies=tuple(p for p in args.policies.split(",") if p),
+                tuner_trials=args.tuner_trials, tuner_kind=args.tuner_kind,
+                runtimes=tuple(r for r in args.runtimes.split(",") if r), log=lambda m: print(m, file=sys.stderr))
+    for t in res["tuner"]:
+        print(f"tuner {t['kind']}/{t['policy']:<9} -> {t['final_arm']}  {t['throughput_rows_s']:.0f} rows/s  "
+              f"p95 {t['p95_ms']:.3f} ms", file=sys.stderr)
+
+    if args.out:
+        save_json(args.out, res)
+    if args.save_baseline:
+        save_json(args.baseline, res)
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if Path(args.baseline).exists():
+        regressions = compare(res, load_json(args.baseline), tolerance=args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['id']} {r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g}", file=sys.stderr)
+        if regressions:
+            return 1
+    if not args.out:
+        print(json.dumps(res, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# backend/inferopt/bench/harness.py
+import os, sys, time, json, platform, tracemalloc, itertools
+from pathlib import Path
+import numpy as np, torch
+from ..model import TinyNet, build_runtime
+from ..server import InferExecutor, InferService
+from ...common.history import HistoryStore
+
+DEFAULT_BASELINE = Path("data/bench/inferopt_baseline.json")
+DEFAULT_TOLERANCE = 0.15  # fractional slack before a case counts as a regression
+
+def case_id(c):
+    cid = f"b{c['batch']}-w{c['workers']}-t{c['threads']}-d{c['in_dim']}-{c['executor']}"
+    # eager ids keep their pre-runtime form so existing baselines still match
+    return cid if c.get("runtime", "eager") == "eager" else f"{cid}-{c['runtime']}"
+
+def make_case(batch=4, workers=1, threads=1, in_dim=64, executor="thread", runtime="eager"):
+    """
+    Build one benchmark case and return (fn, close). `fn()` runs a single
+    forward of `batch` rows split over `workers` lanes, so it can be handed
+    straight to pytest-benchmark: `benchmark(fn)`.
+    """
+    torch.manual_seed(0)  # same weights for every case, so accuracy deltas line up
+    model = TinyNet(in_dim=in_dim).eval()
+    ex = InferExecutor(model, workers=workers, kind=executor, threads_per_worker=threads, runtimes=(runtime,))
+    x = torch.randn(batch, in_dim).numpy()
+    return (lambda: ex.forward(x, lanes=workers, runtime=runtime)), ex.shutdown
+
+def accuracy_delta(runtime, in_dim=64, rows=1024):
+    """Output error of `runtime` against the fp32 eager model on random inputs."""
+    torch.manual_seed(0)
+    model = TinyNet(in_dim=in_dim).eval()
+    x = torch.randn(rows, in_dim)
+    with torch.inference_mode():
+        ref = model(x)
+        out = build_runtime(model, runtime)(x)
+    err = (out - ref).abs()
+    return {"max_abs_err": float(err.max()), "mean_abs_err": float(err.mean()),
+            "top1_agree": float((out.argmax(1) == ref.argmax(1)).float().mean())}
+
+def _alloc_per_call(fn, calls=20):
+    tracemalloc.start()
+    try:
+        fn()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(calls):
+            fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"alloc_bytes_per_call": max(0, after - before) / calls, "peak_bytes": peak - before}
+
+def run_case(batch=4, workers=1, threads=1, in_dim=64, executor="thread", iters=200, warmup=20,
+             runtime="eager"):
+    fn, close = make_case(batch, workers, threads, in_dim, executor, runtime)
+    try:
+        for _ in range(warmup):
+            fn()
+        lat = np.empty(iters)
+        t_start = time.perf_counter()
+        for i in range(iters):
+            t0 = time.perf_counter()
+            fn()
+            lat[i] = (time.perf_counter() - t0) * 1000.0
+        wall = time.perf_counter() - t_start
+        allocs = _alloc_per_call(fn)
+    finally:
+        close()
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {
+        "batch": batch, "workers": workers, "threads": threads, "in_dim": in_dim,
+        "executor": executor, "runtime": runtime, "iters": iters,
+        "throughput_rows_s": batch * iters / wall, "throughput_calls_s": iters / wall,
+        "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+        "mean_ms": float(lat.mean()), **allocs,
+    }
+
+def run_tuner(policy="ucb1", trials=200, kind="bandit"):
+    """Drive InferService.auto_infer under one policy and summarise what it converged to."""
+    # Always start from zero, and keep bench trials out of the serving history (learned_depth, reports)
+    svc = InferService(tuner=kind, tuner_state="", name="bench", history=HistoryStore(path=""))
+    svc.tuner.policy = policy
+    try:
+        t0 = time.perf_counter()
+        r = svc.auto_infer(trials=trials)
+        wall = time.perf_counter() - t0
+    finally:
+        svc.close()
+    lat = np.array([o["latency_ms"] for o in r["results"]])
+    rows = sum(o["batch"] for o in r["results"])
+    return {
+        "policy": policy, "kind": kind, "trials": trials, "final_arm": r["tuner"]["current"],
+        "throughput_rows_s": rows / wall, "mean_ms": float(lat.mean()),
+        "p95_ms": float(np.percentile(lat, 95)),
+    }
+
+def sweep(batches=(1, 4, 16, 64), workers=(1, 2), threads=(1,), in_dims=(64,),
+          executor="thread", iters=200, warmup=20, policies=(), tuner_trials=200, tuner_kind="bandit",
+          runtimes=("eager",), log=None):
+    results = []
+    accuracy = {(rt, d): accuracy_delta(rt, d) for rt in runtimes for d in in_dims if rt != "eager"}
+    for b, w, t, d, rt in itertools.product(batches, workers, threads, in_dims, runtimes):
+        r = run_case(b, w, t, d, executor=executor, iters=iters, warmup=warmup, runtime=rt)
+        r["id"] = case_id(r)
+        if rt != "eager":
+            r["accuracy"] = accuracy[(rt, d)]
+        results.append(r)
+        if log:
+            acc = f"  max|err| {r['accuracy']['max_abs_err']:.2e}" if "accuracy" in r else ""
+            log(f"{r['id']:<34} {r['throughput_rows_s']:>12.0f} rows/s  "
+                f"p50 {r['p50_ms']:.3f}  p95 {r['p95_ms']:.3f}  p99 {r['p99_ms']:.3f} ms{acc}")
+    tuner = [run_tuner(p, tuner_trials, kind=tuner_kind) for p in policies]
+    return {
+        "meta": {
+            "created": time.time(), "python": sys.version.split()[0], "torch": torch.__version__,
+            "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        },
+        "results": results, "tuner": tuner,
+    }
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return a list of regressions: cases whose throughput dropped or whose p95
+    grew by more than `tolerance` relative to the baseline. Cases missing
+    from either side are ignored.
+    """
+    base = {r["id"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in current.get("results", []):
+        b = base.get(r["id"])
+        if b is None:
+            continue
+        if r["throughput_rows_s"] < b["throughput_rows_s"] * (1.0 - tolerance):
+            regressions.append({"id": r["id"], "metric": "throughput_rows_s",
+                                "baseline": b["throughput_rows_s"], "current": r["throughput_rows_s"]})
+        if r["p95_ms"] > b["p95_ms"] * (1.0 + tolerance):
+            regressions.append({"id": r["id"], "metric": "p95_ms",
+                                "baseline": b["p95_ms"], "current": r["p95_ms"]})
+    return regressions
+
+def load_json(path):
+    return json.loads(Path(path).read_text())
+
+def save_json(path, obj):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, indent=2))
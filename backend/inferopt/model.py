@@ -1,4 +1,5 @@
 # backend/inferopt/model.py
+import warnings
 import torch, torch.nn as nn
 class TinyNet(nn.Module):
     def __init__(self, in_dim=64, hidden=128, out_dim=10):
@@ -13,3 +14,34 @@ def load_model():
     m = TinyNet(); 
     m.eval(); 
     return m
+
+# Execution backends selectable per forward (and per tuner arm)
+RUNTIMES = ("eager", "script", "compile", "int8")
+
+def build_runtime(model, runtime="eager", warmup=3, example_batch=8):
+    """
+    Return a callable module for `runtime`, warmed up on a random batch:
+      eager   - the fp32 model as-is
+      script  - TorchScript trace, frozen and optimized for inference
+      compile - torch.compile(dynamic=True); warm-up absorbs the compile
+      int8    - dynamic int8 quantization of the Linear layers
+    """
+    in_dim = next(m for m in model.modules() if isinstance(m, nn.Linear)).in_features
+    example = torch.randn(example_batch, in_dim)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # jit / ao.quantization deprecation notices
+        if runtime == "eager":
+            m = model
+        elif runtime == "script":
+            with torch.no_grad():
+                m = torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.trace(model, example)))
+        elif runtime == "compile":
+            m = torch.compile(model, dynamic=True)
+        elif runtime == "int8":
+            m = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+        else:
+            raise ValueError(f"unknown runtime: {runtime}")
+        with torch.inference_mode():
+            for _ in range(warmup):
+                m(example)
+    return m
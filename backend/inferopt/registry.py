@@ -0,0 +1,221 @@
+# backend/inferopt/registry.py
+# Deliberately torch-free at import time: torch (and the InferService stack)
+# is imported on the first model load, so formal-only processes never pay for it.
+import os, re, json, time, asyncio, threading
+from collections import OrderedDict
+from pathlib import Path
+
+MODELS_DIR = Path(os.environ.get("AEGIS_MODELS_DIR", "data/models"))
+DEFAULT_MODEL = os.environ.get("AEGIS_DEFAULT_MODEL", "tinynet")
+MAX_RESIDENT = int(os.environ.get("AEGIS_MODELS_MAX", 4))
+MAX_BYTES = int(float(os.environ.get("AEGIS_MODELS_MAX_MB", 2048)) * 1024 * 1024)
+CHECKPOINT_SUFFIXES = (".pt", ".pth")
+WARMUP_ROWS = 8
+RESOLVE_TTL_S = 5.0  # how long a spec -> checkpoint resolution is trusted before re-listing the dir
+
+def _version_key(v):
+    # "v10" sorts after "v9"
+    return [int(p) if p.isdigit() else p for p in re.split(r"(\d+)", v)]
+
+class ModelEntry:
+    def __init__(self, name, version, path):
+        self.name = name
+        self.version = version
+        self.path = path                # checkpoint file, or None for the built-in model
+        self.state = "loading"          # loading | ready | error
+        self.service = None
+        self.error = None
+        self.bytes = 0
+        self.loaded_at = None
+        self.last_used = time.time()
+        self.load_ms = None
+        self.warmup_ms = None
+        self.hits = 0
+        self.ready = threading.Event()
+
+    def snapshot(self):
+        return {
+            "name": self.name, "version": self.version, "path": str(self.path) if self.path else None,
+            "state": self.state, "error": self.error, "bytes": self.bytes, "loaded_at": self.loaded_at,
+            "last_used": self.last_used, "load_ms": self.load_ms, "warmup_ms": self.warmup_ms, "hits": self.hits,
+        }
+
+class ModelRegistry:
+    """
+    Lazily loads models by "name" or "name@version" and keeps an LRU of
+    resident ones, each behind its own InferService (executor, batcher,
+    tuner, telemetry). Checkpoints live at <root>/<name>/<version>.pt
+    (state_dicts, loaded with mmap where the file format allows), with an
+    optional <root>/<name>/model.json giving the architecture kwargs.
+    DEFAULT_MODEL without a checkpoint falls back to load_model().
+    A model is only handed out after a warm-up forward; residency is capped
+    by count and by estimated bytes, evicting least recently used first.
+    """
+    def __init__(self, root=MODELS_DIR, max_resident=MAX_RESIDENT, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.max_resident = max_resident
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._resident = OrderedDict()  # "name@version" -> ModelEntry, LRU order (oldest first)
+        self._resolved = {}             # spec -> (resolved_at, (name, version, path))
+        self.evictions = 0
+
+    # ---- lookup ----
+    def resolve(self, spec=None):
+        """spec -> (name, version, checkpoint path or None). KeyError if unknown."""
+        spec = spec or DEFAULT_MODEL
+        hit = self._resolved.get(spec)
+        if hit is not None and time.monotonic() - hit[0] < RESOLVE_TTL_S:
+            return hit[1]
+        res = self._resolve(spec)
+        self._resolved[spec] = (time.monotonic(), res)
+        return res
+
+    def _resolve(self, spec):
+        name, _, version = spec.partition("@")
+        d = self.root / name
+        versions = sorted((p for p in d.glob("*") if p.suffix in CHECKPOINT_SUFFIXES),
+                          key=lambda p: _version_key(p.stem)) if d.is_dir() else []
+        if version in ("", "latest"):
+            if versions:
+                return name, versions[-1].stem, versions[-1]
+            if name == DEFAULT_MODEL:
+                return name, "builtin", None
+            raise KeyError(f"unknown model: {name}")
+        for p in versions:
+            if p.stem == version:
+                return name, version, p
+        raise KeyError(f"unknown model version: {name}@{version}")
+
+    def available(self):
+        out = {DEFAULT_MODEL: ["builtin"]}
+        if self.root.is_dir():
+            for d in sorted(p for p in self.root.iterdir() if p.is_dir()):
+                vs = sorted((p.stem for p in d.glob("*") if p.suffix in CHECKPOINT_SUFFIXES), key=_version_key)
+                if vs:
+                    out[d.name] = vs
+        return out
+
+    def get(self, spec=None):
+        """Ready InferService for `spec`, loading (and warming) it on first use. Blocking."""
+        name, version, path = self.resolve(spec)
+        key = f"{name}@{version}"
+        with self._lock:
+            entry = self._resident.get(key)
+            owner = entry is None or entry.state == "error"
+            if owner:
+                entry = self._resident[key] = ModelEntry(name, version, path)
+            self._resident.move_to_end(key)
+        if owner:
+            self._load(entry)
+        else:
+            entry.ready.wait()
+        if entry.state != "ready":
+            raise RuntimeError(f"model {key} failed to load: {entry.error}")
+        entry.hits += 1
+        entry.last_used = time.time()
+        return entry.service
+
+    async def aget(self, spec=None):
+        # Fast path without a thread hop when the model is already resident
+        name, version, _ = self.resolve(spec)
+        key = f"{name}@{version}"
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is not None and entry.state == "ready":
+                self._resident.move_to_end(key)
+                entry.hits += 1
+                entry.last_used = time.time()
+                return entry.service
+        return await asyncio.to_thread(self.get, spec)
+
+    # ---- load / evict ----
+    def _load(self, entry):
+        t0 = time.perf_counter()
+        try:
+            from .server import InferService, TUNER_STATE
+            model = _build_model(entry.name, entry.path)
+            t1 = time.perf_counter()
+            state = TUNER_STATE
+            if state and entry.name != DEFAULT_MODEL:
+                p = Path(state)
+                state = str(p.with_name(f"{entry.name}_{p.name}"))
+            svc = InferService(model=model, tuner_state=state, name=f"{entry.name}@{entry.version}")
+            t2 = time.perf_counter()
+            svc.warmup(rows=WARMUP_ROWS)
+            entry.warmup_ms = (time.perf_counter() - t2) * 1000.0
+            entry.load_ms = (t1 - t0) * 1000.0
+            entry.bytes = svc.resident_bytes()
+            entry.service = svc
+            entry.loaded_at = time.time()
+            entry.state = "ready"
+        except Exception as e:
+            entry.state, entry.error = "error", repr(e)
+        finally:
+            entry.ready.set()
+        if entry.state == "ready":
+            self._evict(keep=entry)
+
+    def _evict(self, keep=None):
+        doomed = []
+        with self._lock:
+            def over():
+                ready = [e for e in self._resident.values() if e.state == "ready"]
+                return len(ready) > self.max_resident or sum(e.bytes for e in ready) > self.max_bytes
+            for key in list(self._resident):
+                if not over():
+                    break
+                e = self._resident[key]
+                if e is keep or e.state == "loading":
+                    continue
+                doomed.append(self._resident.pop(key))
+        for e in doomed:
+            self.evictions += 1
+            if e.service is not None:
+                e.service.close()  # in-flight requests still hold the service and finish
+        return [f"{e.name}@{e.version}" for e in doomed]
+
+    def unload(self, spec):
+        name, version, _ = self.resolve(spec)
+        with self._lock:
+            e = self._resident.pop(f"{name}@{version}", None)
+        if e is not None and e.service is not None:
+            e.service.close()
+        return e is not None
+
+    def resident(self):
+        with self._lock:
+            return [e.service for e in self._resident.values() if e.state == "ready"]
+
+    def shutdown(self):
+        for svc in self.resident():
+            svc.close()
+
+    def snapshot(self):
+        with self._lock:
+            entries = [e.snapshot() for e in reversed(self._resident.values())]  # most recent first
+        return {
+            "default": DEFAULT_MODEL, "root": str(self.root), "max_resident": self.max_resident,
+            "max_bytes": self.max_bytes, "resident_bytes": sum(e["bytes"] for e in entries if e["state"] == "ready"),
+            "evictions": self.evictions, "resident": entries, "available": self.available(),
+        }
+
+def _build_model(name, path):
+    import torch
+    from .model import TinyNet, load_model
+    if path is None:
+        return load_model()
+    cfg_path = path.parent / "model.json"
+    cfg = json.loads(cfg_path.read_text()) if cfg_path.exists() else {}
+    if cfg.get("arch", "tinynet") != "tinynet":
+        raise ValueError(f"unsupported arch: {cfg['arch']}")
+    try:
+        # mmap maps tensor storage straight from the file (zipfile checkpoints, torch>=2.1)
+        state = torch.load(path, map_location="cpu", weights_only=True, mmap=True)
+    except (RuntimeError, TypeError):
+        state = torch.load(path, map_location="cpu", weights_only=True)
+    model = TinyNet(**cfg.get("kwargs", {}))
+    model.load_state_dict(state, assign=True)  # adopt the (mmap'd) tensors instead of copying
+    return model.eval()
+
+REGISTRY = ModelRegistry()
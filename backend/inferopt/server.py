@@ -1,52 +1,290 @@
 # backend/inferopt/server.py
-import time, numpy as np, torch
-from .model import load_model
-from .tuner import BanditTuner
+import os, time, asyncio, threading, itertools, multiprocessing as mp
+import numpy as np, torch
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .model import load_model, build_runtime
+from .tuner import TUNERS
+from .shared import SHARED_DIR
+from .batcher import MicroBatcher
+from .buffers import BufferPool, decode_payload
+from .telemetry import Telemetry
+from ..common.history import HISTORY
+from ..common import tracing
 
-CPU_COST_PER_HOUR = 0.04  # toy model for cost
-REQS_ACCUM_WINDOW = 60.0  # seconds
+EXECUTOR_KIND = os.environ.get("AEGIS_INFER_EXECUTOR", "thread")  # "thread" | "process"
+TUNER_KIND = os.environ.get("AEGIS_INFER_TUNER", "bandit")        # "bandit" | "contextual"
+# Learned tuner statistics persist here ("" disables); {kind} keeps each tuner's state apart
+TUNER_STATE = os.environ.get("AEGIS_TUNER_STATE", "data/cache/tuner_{kind}.json")
+
+# ---- process-pool worker side: one model copy per process ----
+_worker_model = None
+_worker_runtimes = {}
+
+def _proc_init(state_dict, threads, runtimes=()):
+    global _worker_model
+    torch.set_num_threads(threads)
+    _worker_model = load_model()
+    _worker_model.load_state_dict(state_dict)
+    for rt in runtimes:
+        _worker_module(rt)
+
+def _worker_module(runtime):
+    m = _worker_runtimes.get(runtime)
+    if m is None:
+        try:
+            m = build_runtime(_worker_model, runtime)
+        except Exception:
+            m = _worker_model  # backend unavailable here: run eager
+        _worker_runtimes[runtime] = m
+    return m
+
+def _timed_forward(model, x):
+    t0 = time.perf_counter()
+    with torch.inference_mode():
+        y = model(torch.from_numpy(x))
+    return y.numpy(), (time.perf_counter() - t0) * 1000.0
+
+def _proc_forward(x, runtime="eager"):
+    return _timed_forward(_worker_module(runtime), x)
+
+class InferExecutor:
+    """
+    N parallel forward lanes.
+    kind="thread": threads sharing the model, intra-op threads partitioned as cores // N.
+    kind="process": processes each holding a model loaded via load_model (parent weights).
+    Each forward names a runtime (see model.RUNTIMES); runtimes are built and
+    warmed up once per executor (per process for kind="process"), falling back
+    to eager if a backend can't be built.
+    """
+    def __init__(self, model, workers=1, kind="thread", threads_per_worker=None, runtimes=()):
+        self.model = model
+        self.kind = kind
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.runtimes = {"eager": model}
+        self.runtime_errors = {}
+        self._rt_lock = threading.Lock()
+        self._prebuild = tuple(runtimes)
+        self._pool = self._make_pool()
+        self.prepare(runtimes)
+
+    def _make_pool(self):
+        if self.kind == "process":
+            state = {k: v.detach().clone() for k, v in self.model.state_dict().items()}
+            return ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                initializer=_proc_init, initargs=(state, self.threads_per_worker, self._prebuild),
+            )
+        if self.kind != "thread":
+            raise ValueError(f"unknown executor kind: {self.kind}")
+        return ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="infer-lane",
+            initializer=torch.set_num_threads, initargs=(self.threads_per_worker,),
+        )
+
+    def resize(self, workers, kind=None):
+        old = self._pool
+        self.workers = max(1, int(workers))
+        self.kind = kind or self.kind
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool = self._make_pool()
+        old.shutdown(wait=False)
+
+    def module(self, runtime="eager"):
+        m = self.runtimes.get(runtime)
+        if m is None:
+            with self._rt_lock:
+                m = self.runtimes.get(runtime)
+                if m is None:
+                    try:
+                        m = build_runtime(self.model, runtime)
+                    except Exception as e:
+                        self.runtime_errors[runtime] = repr(e)
+                        m = self.model
+                    self.runtimes[runtime] = m
+        return m
+
+    def prepare(self, runtimes):
+        """Build + warm up runtimes ahead of traffic (process workers do it in their initializer)."""
+        self._prebuild = tuple(dict.fromkeys(self._prebuild + tuple(runtimes)))
+        if self.kind == "thread":
+            for rt in runtimes:
+                self.module(rt)
+
+    def submit(self, x, runtime="eager"):
+        if self.kind == "process":
+            return self._pool.submit(_proc_forward, x, runtime)
+        return self._pool.submit(_timed_forward, self.module(runtime), x)
+
+    def _split(self, x, lanes):
+        lanes = max(1, min(int(lanes), self.workers, x.shape[0]))
+        return [x] if lanes == 1 else np.array_split(x, lanes)
+
+    @staticmethod
+    def _join(parts):
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate([y for y, _ in parts]), max(ms for _, ms in parts)
+
+    def forward(self, x, lanes=1, runtime="eager"):
+        futs = [self.submit(p, runtime) for p in self._split(x, lanes)]
+        return self._join([f.result() for f in futs])
+
+    async def forward_async(self, x, lanes=1, runtime="eager"):
+        futs = [asyncio.wrap_future(self.submit(p, runtime)) for p in self._split(x, lanes)]
+        return self._join(await asyncio.gather(*futs))
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def snapshot(self):
+        return {"kind": self.kind, "workers": self.workers, "threads_per_worker": self.threads_per_worker,
+                "runtimes": list(self.runtimes) if self.kind == "thread" else list(self._prebuild),
+                "runtime_errors": self.runtime_errors}
 
 class InferService:
-    def __init__(self):
-        self.model = load_model()
-        self.tuner = BanditTuner(policy="ucb1")
-        self._req_count = 0
-        self._window_start = time.time()
-        self.utilization = 0.0
-        self.cost_per_1k = 0.0
-
-    def _update_window(self, latency_ms, batch):
-        self._req_count += batch
-        now = time.time()
-        dt = now - self._window_start
-        if dt >= REQS_ACCUM_WINDOW:
-            rps = self._req_count / dt
-            # toy utilization: assume 100 rps max capacity
-            self.utilization = min(100.0, (rps / 100.0) * 100.0)
-            # cost per 1k requests = hourly_cost / (rps*3600/1000)
-            denom = max(1e-6, (rps * 3600.0 / 1000.0))
-            self.cost_per_1k = CPU_COST_PER_HOUR / denom
-            self._req_count = 0
-            self._window_start = now
-
-    def infer_once(self, batch=4, workers=1, in_dim=64):
-        x = torch.from_numpy(np.random.randn(batch, in_dim).astype("float32"))
+    def __init__(self, workers=None, executor=EXECUTOR_KIND, tuner=TUNER_KIND, tuner_state=TUNER_STATE,
+                 model=None, name="tinynet", history=HISTORY):
+        self.name = name  # "name@version" label in the run history
+        self.history = history  # where auto_infer and batcher flushes record latencies
+        self.model = model if model is not None else load_model()
+        self.in_dim = next(m for m in self.model.modules() if isinstance(m, torch.nn.Linear)).in_features
+        self.tuner_state = tuner_state
+        self.tuner = self._make_tuner(tuner, policy="ucb1")
+        # Pool is sized for the widest arm so `workers=N` maps onto N real lanes
+        lanes = workers or max(a.get("workers", 1) for a in self.tuner.arms)
+        self.executor = InferExecutor(self.model, workers=lanes, kind=executor,
+                                      runtimes=self._arm_runtimes(self.tuner))
+        self.telemetry = Telemetry()
+        self.buffers = BufferPool()
+        self.batcher = MicroBatcher(self)
+
+    def set_tuner(self, kind, **kw):
+        """Swap in a fresh tuner (keeps enabled/policy); grows the executor if its arms need more lanes."""
+        old = self.tuner
+        old.save()  # a new tuner of the same kind resumes from this
+        tuner = self._make_tuner(kind, policy=kw.pop("policy", old.policy), **kw)
+        old.close()  # releases its shared slot, if any
+        tuner.enabled = old.enabled
+        self.executor.prepare(self._arm_runtimes(tuner))
+        lanes = max(a.get("workers", 1) for a in tuner.arms)
+        if lanes > self.executor.workers:
+            self.executor.resize(lanes)
+        self.tuner = tuner
+        return tuner
+
+    @staticmethod
+    def _arm_runtimes(tuner):
+        return tuple(dict.fromkeys(a.get("runtime", "eager") for a in tuner.arms))
+
+    def _make_tuner(self, kind, **kw):
+        path = self.tuner_state.format(kind=kind) if self.tuner_state else None
+        # Multi-worker serving: stats shared through <SHARED_DIR>/<state file stem>-*.bin
+        shared = os.path.join(SHARED_DIR, os.path.splitext(os.path.basename(path))[0]) if SHARED_DIR and path else None
+        tuner = TUNERS[kind](state_path=path, shared=shared, **kw)
+        if path and tuner.fresh_store:
+            tuner.load()  # seeds a new shared file from the last JSON snapshot
+        return tuner
+
+    def warmup(self, rows=8):
+        """One forward per prepared runtime so the first real request doesn't pay for lazy init."""
+        x = self.buffers.synthetic(rows, self.in_dim)
+        for rt in self._arm_runtimes(self.tuner) + (self.batcher.runtime,):
+            self.executor.forward(x, runtime=rt)
+
+    def resident_bytes(self):
+        # Parameters + buffers, counted once per built runtime (each holds its own weights)
+        per = sum(t.numel() * t.element_size() for t in itertools.chain(self.model.parameters(), self.model.buffers()))
+        return per * max(1, len(self.executor.runtimes))
+
+    def close(self):
+        self.tuner.close()
+        self.batcher.close()
+        self.executor.shutdown(wait=False)
+
+    def stats(self, window_s=None, max_age_s=None):
+        """Sliding-window telemetry (rps, p50/p95/p99, utilization, capacity, cost)."""
+        return self.telemetry.stats(window_s=window_s, lanes=self.executor.workers, max_age_s=max_age_s)
+
+    @property
+    def utilization(self):
+        return self.stats()["utilization_percent"]
+
+    @property
+    def cost_per_1k(self):
+        return self.stats()["cost_per_1k_requests"]
+
+    def _check_rows(self, x):
+        if x.ndim != 2 or x.shape[1] != self.in_dim:
+            raise ValueError(f"rows of {x.shape[-1]} features; {self.name} takes {self.in_dim}")
+
+    def forward(self, x: np.ndarray, lanes=1, runtime="eager"):
+        return self.executor.forward(x, lanes=lanes, runtime=runtime)
+
+    async def infer_batched(self, batch=4, workers=1, in_dim=None, payload=None,
+                            content_type="application/octet-stream"):
+        in_dim = in_dim or self.in_dim
+        # Caller payloads are mapped (not copied) onto float32 rows; without one we
+        # reuse the pool's synthetic buffer for this shape.
+        with tracing.span("infer.tensor", payload=payload is not None):
+            if payload is None:
+                x = self.buffers.synthetic(batch, in_dim)
+            else:
+                x = decode_payload(payload, in_dim=in_dim, content_type=content_type)
+                batch = x.shape[0]
+            self._check_rows(x)  # before the batcher: a bad request must not fail the flush it joins
+        r = await self.batcher.submit(x, lanes=workers)
+        st = self.stats()
+        return {
+            # workers: lanes the coalesced forward actually ran on (tuner arm, else the largest request)
+            "batch": batch, "workers": r["lanes"], "latency_ms": r["latency_ms"],
+            "forward_ms": r["forward_ms"], "coalesced": r["coalesced"],
+            "utilization_percent": st["utilization_percent"], "cost_per_1k_requests": st["cost_per_1k_requests"],
+            "output": r["output"],
+        }
+
+    def infer_once(self, batch=4, workers=1, in_dim=None, payload=None,
+                   content_type="application/octet-stream", runtime="eager"):
+        in_dim = in_dim or self.in_dim
+        with tracing.span("infer.tensor", payload=payload is not None):
+            if payload is None:
+                x = self.buffers.synthetic(batch, in_dim)
+            else:
+                x = decode_payload(payload, in_dim=in_dim, content_type=content_type)
+                batch = x.shape[0]
+            self._check_rows(x)
+            buf = None
+            if not x.flags.writeable:  # torch.from_numpy needs a writable array
+                buf = self.buffers.acquire(batch, in_dim)
+                np.copyto(buf.numpy(), x)
+                x = buf.numpy()
         t0 = time.perf_counter()
-        with torch.no_grad():
-            _ = self.model(x)
+        try:
+            _ = self.executor.forward(x, lanes=workers, runtime=runtime)
+        finally:
+            if buf is not None:
+                self.buffers.release(buf)
         t1 = time.perf_counter()
+        trace = tracing.current()
+        if trace is not None:
+            trace.add("model.forward", t0, t1, rows=batch, runtime=runtime)
         latency_ms = (t1 - t0) * 1000.0
-        self._update_window(latency_ms, batch)
+        self.telemetry.record(latency_ms, batch, busy_ms=latency_ms)
+        st = self.stats()
         return {
-            "batch": batch, "workers": workers, "latency_ms": latency_ms,
-            "utilization_percent": self.utilization, "cost_per_1k_requests": self.cost_per_1k
+            "batch": batch, "workers": workers, "runtime": runtime, "latency_ms": latency_ms,
+            "utilization_percent": st["utilization_percent"], "cost_per_1k_requests": st["cost_per_1k_requests"],
         }
 
     def auto_infer(self, trials=20):
         results=[]
         for _ in range(trials):
-            arm = self.tuner.select_arm()
-            out = self.infer_once(batch=arm["batch"], workers=arm["workers"])
-            self.tuner.update(arm, out["latency_ms"])
+            with tracing.span("tuner.select"):
+                arm = self.tuner.select_arm()
+            out = self.infer_once(batch=arm["batch"], workers=arm["workers"], runtime=arm.get("runtime", "eager"))
+            with tracing.span("tuner.update"):
+                self.tuner.update(arm, out["latency_ms"], rows=out["batch"])
+            self.history.record_infer(self.name, arm, [out["latency_ms"]], [out["batch"]], coalesced=out["batch"],
+                                 forward_ms=out["latency_ms"], source="auto")
             results.append(out)
         return {"results": results, "tuner": self.tuner.snapshot()}
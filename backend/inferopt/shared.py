@@ -0,0 +1,68 @@
+# backend/inferopt/shared.py
+import os, json, time, fcntl, hashlib
+import numpy as np
+from pathlib import Path
+
+# Set (by `run.sh serve`) to share tuner statistics between uvicorn worker processes
+SHARED_DIR = os.environ.get("AEGIS_TUNER_SHARED_DIR", "")
+MAX_SLOTS = int(os.environ.get("AEGIS_TUNER_SLOTS", 64))
+SLOT_SCAN_S = 1.0  # how often readers re-count the slots ever claimed
+
+class SharedArrays:
+    """
+    float64 statistics shared across processes through one np.memmap file of
+    shape (slots, *shape) at <prefix>-<layout digest>.bin.
+    Each process claims a slot (flock on a per-slot file, held until close())
+    and only ever writes its own slot, so updates take no cross-process lock;
+    readers sum over slots. The file outlives the processes: a restarted
+    worker claims a free slot and the learned totals are still there, so it
+    doubles as the persistent state. `created` says whether this open made it.
+    """
+    def __init__(self, prefix, shape, layout, slots=MAX_SLOTS):
+        digest = hashlib.sha1(json.dumps(layout, sort_keys=True).encode()).hexdigest()[:12]
+        base = Path(f"{prefix}-{digest}")
+        base.parent.mkdir(parents=True, exist_ok=True)
+        self.path = base.with_name(base.name + ".bin")
+        self.shape = (slots,) + tuple(shape)
+        nbytes = 8 * int(np.prod(self.shape))
+        with open(base.with_name(base.name + ".lock"), "a") as lk:
+            fcntl.flock(lk, fcntl.LOCK_EX)  # one creator; the others wait and map the finished file
+            self.created = not self.path.exists() or self.path.stat().st_size != nbytes
+            if self.created:
+                tmp = base.with_name(base.name + ".tmp")
+                with open(tmp, "wb") as f:
+                    f.truncate(nbytes)  # sparse, reads as zeros
+                tmp.replace(self.path)
+        self.all = np.memmap(self.path, dtype=np.float64, mode="r+", shape=self.shape)
+        self._base = base
+        self.slot, self._fd = self._claim(base, slots)
+        self.own = self.all[self.slot]
+        self._used, self._scanned_at = self.slot + 1, float("-inf")
+
+    @staticmethod
+    def _claim(base, slots):
+        for i in range(slots):
+            fd = os.open(base.with_name(f"{base.name}.slot{i}"), os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return i, fd
+            except OSError:
+                os.close(fd)
+        raise RuntimeError(f"all {slots} tuner slots in use for {base}")
+
+    def _slots_used(self):
+        # Slot files are never removed, so the highest one bounds every slot that holds data
+        if time.monotonic() - self._scanned_at > SLOT_SCAN_S:
+            ids = [int(p.suffix[5:]) for p in self._base.parent.glob(self._base.name + ".slot*")]
+            self._used, self._scanned_at = max([self._used] + [i + 1 for i in ids]), time.monotonic()
+        return self._used
+
+    def total(self, index=()):
+        """Sum over all slots of self.all[slot][index]."""
+        return self.all[(slice(0, self._slots_used()),) + tuple(index)].sum(axis=0)
+
+    def close(self):
+        if self._fd is not None:
+            self.all.flush()
+            os.close(self._fd)  # releases the slot
+            self._fd = None
@@ -0,0 +1,104 @@
+# backend/inferopt/telemetry.py
+import time, threading
+import numpy as np
+
+CPU_COST_PER_HOUR = 0.04  # toy model for cost
+DEFAULT_CAPACITY = 1 << 16
+DEFAULT_WINDOW_S = 60.0
+QUANTILES = (50, 95, 99)
+
+class Telemetry:
+    """
+    Fixed-size ring buffer of inference events (timestamp, rows, latency_ms,
+    busy_ms). Writers take a short lock to claim slots and store scalars;
+    all aggregation (sliding-window rps, latency percentiles, utilization,
+    measured capacity, cost) is computed vectorized over the ring on demand,
+    and memoized for `refresh_s` so hot-path readers stay cheap.
+
+    busy_ms is executor time spent on the event; a coalesced flush spreads its
+    forward time over its requests by row share, so sums stay exact.
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY, window_s=DEFAULT_WINDOW_S,
+                 cost_per_hour=CPU_COST_PER_HOUR, refresh_s=0.25):
+        self.capacity = int(capacity)
+        self.window_s = window_s
+        self.cost_per_hour = cost_per_hour
+        self.refresh_s = refresh_s
+        self._t = np.zeros(self.capacity, dtype=np.float64)
+        self._rows = np.zeros(self.capacity, dtype=np.float32)
+        self._lat = np.zeros(self.capacity, dtype=np.float32)
+        self._busy = np.zeros(self.capacity, dtype=np.float32)
+        self._n = 0                     # events ever written; slot = n % capacity
+        self._lock = threading.Lock()
+        self._cached = None             # (computed_at, window_s, lanes, stats)
+
+    def record(self, latency_ms, rows=1, busy_ms=0.0, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            i = self._n % self.capacity
+            self._n += 1
+            self._t[i] = now
+            self._rows[i] = rows
+            self._lat[i] = latency_ms
+            self._busy[i] = busy_ms
+
+    def record_many(self, latencies_ms, rows, busy_ms=0.0, now=None):
+        """One event per request of a flush; `busy_ms` is the flush's total forward time."""
+        lat = np.asarray(latencies_ms, dtype=np.float32)
+        rows = np.broadcast_to(np.asarray(rows, dtype=np.float32), lat.shape)
+        k = lat.shape[0]
+        if k == 0:
+            return
+        total = float(rows.sum()) or 1.0
+        busy = rows * np.float32(busy_ms / total)
+        now = time.time() if now is None else now
+        with self._lock:
+            idx = np.arange(self._n, self._n + k) % self.capacity
+            self._n += k
+            self._t[idx] = now
+            self._rows[idx] = rows
+            self._lat[idx] = lat
+            self._busy[idx] = busy
+
+    def stats(self, window_s=None, lanes=1, now=None, max_age_s=None):
+        """Window aggregates; reuses the last result if younger than max_age_s (default refresh_s)."""
+        window_s = window_s or self.window_s
+        max_age_s = self.refresh_s if max_age_s is None else max_age_s
+        c = self._cached
+        if now is None and c is not None and c[1] == window_s and c[2] == lanes \
+                and time.time() - c[0] < max_age_s:
+            return c[3]
+        t_now = time.time() if now is None else now
+        with self._lock:
+            n = min(self._n, self.capacity)
+            total_events = self._n
+            t = self._t[:n].copy()
+            m = t >= t_now - window_s
+            rows, lat, busy = self._rows[:n][m], self._lat[:n][m], self._busy[:n][m]
+        t = t[m]
+        out = {"window_s": window_s, "events": int(m.sum()), "total_events": total_events,
+               "rows": 0, "rps": 0.0, "utilization_percent": 0.0, "capacity_rps": None,
+               "cost_per_1k_requests": 0.0, **{f"p{q}_ms": None for q in QUANTILES}}
+        if t.size:
+            # Rate over the span actually covered (a young ring shouldn't look idle)
+            span = max(1e-3, min(window_s, t_now - float(t.min())))
+            n_rows = float(rows.sum())
+            busy_s = float(busy.sum()) / 1000.0
+            rps = n_rows / span
+            out.update({
+                "rows": int(n_rows), "rps": rps,
+                "utilization_percent": min(100.0, 100.0 * busy_s / (span * max(1, lanes))),
+                # Measured service rate: rows per busy second, scaled by parallel lanes
+                "capacity_rps": (n_rows / busy_s) * max(1, lanes) if busy_s > 0 else None,
+                # cost per 1k requests = hourly_cost / (rps*3600/1000)
+                "cost_per_1k_requests": self.cost_per_hour / max(1e-6, rps * 3600.0 / 1000.0),
+                **{f"p{q}_ms": float(v) for q, v in zip(QUANTILES, np.percentile(lat, QUANTILES))},
+            })
+        if now is None:
+            self._cached = (time.time(), window_s, lanes, out)
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._n = 0
+            self._cached = None
@@ -1,62 +1,322 @@
 # backend/inferopt/tuner.py
-import math, random
-from collections import defaultdict
+import os, json, math, time, random, bisect, itertools, threading
+import numpy as np
+from pathlib import Path
+from .shared import SharedArrays
 
-class BanditTuner:
+SAVE_EVERY_S = 30.0
+
+def _arm_key(arm):
+    return tuple(sorted(arm.items()))
+
+def _write_json(path, obj):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(obj))
+    tmp.replace(path)
+
+class _Persistent:
+    """save/load/throttled autosave for tuners exposing state() and restore(st)."""
+    state_path = None
+    _saved_at = 0.0
+    _shared = None  # SharedArrays when statistics are shared across processes
+
+    def save(self, path=None):
+        path = path or self.state_path
+        if path:
+            _write_json(path, self.state())
+            self._saved_at = time.monotonic()
+
+    def load(self, path=None):
+        path = path or self.state_path
+        try:
+            self.restore(json.loads(Path(path).read_text()))
+            return True
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            return False
+
+    def _maybe_save(self):
+        if self.state_path and time.monotonic() - self._saved_at > SAVE_EVERY_S:
+            self.save()
+
+    @property
+    def fresh_store(self):
+        """True unless stats came from an existing shared file (then a JSON load would double count)."""
+        return self._shared is None or self._shared.created
+
+    def close(self):
+        self.save()
+        if self._shared is not None:
+            self._shared.close()
+
+class BanditTuner(_Persistent):
     """
     Supports epsilon-greedy, UCB1, Thompson Sampling over discrete arms.
     Reward = -latency_ms.
+    Arms also carry max_wait_ms, used by MicroBatcher as its coalescing deadline
+    (with batch as the max coalesced rows).
+    Statistics live in numpy arrays indexed by arm id, so selection is a few
+    vectorized ops; `state_path` persists them (throttled) so a restart resumes
+    from what was learned. With `shared` (a file prefix) they live in this
+    process's slot of a SharedArrays file and selection uses the totals over
+    all worker processes.
     """
-    def __init__(self, arms=None, policy="ucb1", epsilon=0.2):
+    def __init__(self, arms=None, policy="ucb1", epsilon=0.2, state_path=None, shared=None):
         self.arms = arms or [
-            {"batch":1,"workers":1}, {"batch":4,"workers":1},
-            {"batch":8,"workers":2}, {"batch":16,"workers":2}
+            {"batch":1,"workers":1,"max_wait_ms":0.0}, {"batch":4,"workers":1,"max_wait_ms":1.0},
+            {"batch":8,"workers":2,"max_wait_ms":2.0}, {"batch":16,"workers":2,"max_wait_ms":4.0}
         ]
+        self._ids = {_arm_key(a): i for i, a in enumerate(self.arms)}
         self.policy = policy
         self.epsilon = epsilon
-        self.n = defaultdict(int)
-        self.sum_reward = defaultdict(float)
-        self.sum_sq = defaultdict(float)
+        k = len(self.arms)
+        if shared:
+            self._shared = SharedArrays(shared, (3, k), {"kind": "bandit", "arms": self.arms})
+        own = self._shared.own if self._shared is not None else np.zeros((3, k))
+        self.n, self.sum_reward, self.sum_sq = own  # row views: updates write straight into the store
         self.t = 0
         self.enabled = True
         self.current = self.arms[0]
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+        self.state_path = state_path
+        self._saved_at = time.monotonic()
+
+    def arm_id(self, arm):
+        return arm if isinstance(arm, (int, np.integer)) else self._ids[_arm_key(arm)]
+
+    @staticmethod
+    def context_of(queue_depth=0, rps=0.0):
+        return None  # context-free
 
-    def _avg(self, arm): 
-        k=str(arm); return self.sum_reward[k]/self.n[k] if self.n[k]>0 else -9999.0
+    def _totals(self):
+        if self._shared is None:
+            return self.n, self.sum_reward, self.sum_sq
+        return self._shared.total()
 
-    def select_arm(self):
+    def select_arm(self, context=None):
         if not self.enabled: return self.current
-        self.t += 1
-        if self.policy == "epsilon":
-            if random.random()<self.epsilon: self.current=random.choice(self.arms)
-            else:
-                self.current=max(self.arms, key=self._avg)
-        elif self.policy == "thompson":
-            # Gaussian Thompson Sampling
-            best=None; best_s=-1e9
-            for a in self.arms:
-                k=str(a)
-                mu = self._avg(a) if self.n[k]>0 else -50.0
-                var = (self.sum_sq[k]/self.n[k] - (mu**2)) if self.n[k]>1 else 25.0
-                sample = random.gauss(mu, math.sqrt(max(var,1e-6)))
-                if sample>best_s: best_s=sample; best=a
-            self.current = best
-        else: # UCB1
-            def ucb(a):
-                k=str(a)
-                if self.n[k]==0: return float("inf")
-                mu=self._avg(a); return mu + math.sqrt(2*math.log(self.t)/self.n[k])
-            self.current = max(self.arms,key=ucb)
+        with self._lock:
+            self.t += 1
+            n, sum_reward, sum_sq = self._totals()
+            tried = n > 0
+            safe = np.maximum(n, 1)
+            avg = np.where(tried, sum_reward / safe, -9999.0)
+            if self.policy == "epsilon":
+                i = random.randrange(len(self.arms)) if random.random() < self.epsilon else int(np.argmax(avg))
+            elif self.policy == "thompson":
+                # Gaussian Thompson Sampling
+                mu = np.where(tried, avg, -50.0)
+                var = np.where(n > 1, sum_sq / safe - mu ** 2, 25.0)
+                i = int(np.argmax(mu + np.sqrt(np.maximum(var, 1e-6)) * self._rng.standard_normal(len(mu))))
+            else: # UCB1
+                t = max(self.t, n.sum())  # other workers' pulls count too
+                ucb = np.where(tried, avg + np.sqrt(2 * math.log(t) / safe), np.inf)
+                i = int(np.argmax(ucb))
+            self.current = self.arms[i]
         return self.current
 
-    def update(self, arm, latency_ms):
-        k=str(arm); r = -float(latency_ms)
-        self.n[k]+=1; self.sum_reward[k]+=r; self.sum_sq[k]+=r*r
+    def update(self, arm, latency_ms, **_):
+        self.update_many((arm,), (latency_ms,))
+
+    def update_many(self, arms, latencies_ms):
+        """Fold a batch of (arm, latency) observations in with one locked scatter-add."""
+        ids = np.fromiter((self.arm_id(a) for a in arms), dtype=np.intp)
+        r = -np.asarray(latencies_ms, dtype=np.float64)
+        with self._lock:
+            np.add.at(self.n, ids, 1)
+            np.add.at(self.sum_reward, ids, r)
+            np.add.at(self.sum_sq, ids, r * r)
+        self._maybe_save()
+
+    # ---- persistence ----
+    def state(self):
+        with self._lock:
+            n, sum_reward, sum_sq = self._totals()
+            return {"kind": "bandit", "t": self.t, "arms": self.arms, "n": n.tolist(),
+                    "sum_reward": sum_reward.tolist(), "sum_sq": sum_sq.tolist()}
+
+    def restore(self, st):
+        # Matched by arm, so stats survive a changed arm list
+        with self._lock:
+            self.t = st.get("t", 0)
+            for j, a in enumerate(st.get("arms", [])):
+                i = self._ids.get(_arm_key(a))
+                if i is not None:
+                    self.n[i], self.sum_reward[i], self.sum_sq[i] = st["n"][j], st["sum_reward"][j], st["sum_sq"][j]
 
     def snapshot(self):
+        with self._lock:
+            n, sum_reward, _ = self._totals()
+            n, avg = n.tolist(), (sum_reward / np.maximum(n, 1)).tolist()
         return {
-            "enabled": self.enabled, "policy": self.policy,
-            "current": self.current,
-            "stats": {str(a): {"trials": self.n[str(a)], "avg_reward": (self.sum_reward[str(a)]/self.n[str(a)]) if self.n[str(a)]>0 else None}
-                      for a in self.arms}
+            "enabled": self.enabled, "policy": self.policy, "mode": "bandit",
+            "current": self.current, "shared_slot": self._shared.slot if self._shared is not None else None,
+            "stats": {str(a): {"trials": int(n[i]), "avg_reward": avg[i] if n[i] > 0 else None}
+                      for i, a in enumerate(self.arms)}
         }
+
+# ---- contextual tuner ----
+QUEUE_EDGES = (1, 4, 16)              # queue depth buckets: 0 | 1-3 | 4-15 | 16+
+RPS_EDGES = (100.0, 1000.0, 10000.0)  # request-rate buckets (rows/s)
+SLO_MS = float(os.environ.get("AEGIS_INFER_SLO_MS", 50.0))
+# Runtimes in the generated grid (see model.RUNTIMES). "compile" is opt-in: its first build takes tens of seconds.
+RUNTIME_ARMS = tuple(os.environ.get("AEGIS_INFER_RUNTIMES", "eager,script").split(","))
+
+# Fixed context index, so shared (memmap) stats can hold every bucket: None + queue x rps buckets
+CONTEXTS = [None] + list(itertools.product(range(len(QUEUE_EDGES) + 1), range(len(RPS_EDGES) + 1)))
+_CONTEXT_IDS = {c: i for i, c in enumerate(CONTEXTS)}
+
+def arm_grid(batches=(1, 4, 8, 16, 32), max_waits_ms=(0.0, 1.0, 2.0, 4.0), workers=(1, 2), runtimes=RUNTIME_ARMS):
+    """Cartesian arm grid; batch=1 never waits, so only its max_wait_ms=0 arm is kept."""
+    return [{"batch": b, "workers": w, "max_wait_ms": float(m), "runtime": rt}
+            for b, m, w, rt in itertools.product(batches, max_waits_ms, workers, runtimes) if b > 1 or m == 0]
+
+class ContextualTuner(_Persistent):
+    """
+    Discounted contextual bandit over a generated arm grid.
+    Context = (queue-depth bucket, request-rate bucket); each bucket keeps its
+    own per-arm statistics, decayed by `gamma` on every update there so old
+    observations fade as load shifts.
+    Objective: maximize rows/s (flush rows / mean request latency) subject to
+    the flush's worst request latency staying <= slo_ms in at least
+    (1 - slo_q) of flushes. Arms whose optimistic violation rate exceeds
+    slo_q are skipped while any arm is feasible.
+    With `shared`, each process discounts and updates its own slot and
+    selection reads the sum over worker slots.
+    """
+    def __init__(self, arms=None, policy="ucb1", epsilon=0.1, slo_ms=SLO_MS, slo_q=0.05, gamma=0.995,
+                 state_path=None, shared=None):
+        self.arms = arms or arm_grid()
+        self._ids = {_arm_key(a): i for i, a in enumerate(self.arms)}
+        self.policy = policy
+        self.epsilon = epsilon
+        self.slo_ms = slo_ms
+        self.slo_q = slo_q
+        self.gamma = gamma
+        self._stats = {}          # context -> (4, K): n, sum rows/s, sum (rows/s)^2, violations
+        self._scale = 1.0         # running max rows/s, keeps UCB bonus and means comparable
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+        self.t = 0
+        self.enabled = True
+        self.current = self.arms[0]
+        self.context = None
+        self.state_path = state_path
+        self._saved_at = time.monotonic()
+        if shared:
+            self._shared = SharedArrays(shared, (len(CONTEXTS), 4, len(self.arms)),
+                                        {"kind": "contextual", "arms": self.arms, "contexts": CONTEXTS})
+
+    def arm_id(self, arm):
+        return arm if isinstance(arm, (int, np.integer)) else self._ids[_arm_key(arm)]
+
+    @staticmethod
+    def context_of(queue_depth=0, rps=0.0):
+        return (bisect.bisect_right(QUEUE_EDGES, queue_depth), bisect.bisect_right(RPS_EDGES, rps))
+
+    def _bucket(self, context):
+        s = self._stats.get(context)
+        if s is None:
+            if self._shared is not None:
+                s = self._stats[context] = self._shared.own[_CONTEXT_IDS[context]]
+            else:
+                s = self._stats[context] = np.zeros((4, len(self.arms)))
+        return s
+
+    def _totals(self, context):
+        if self._shared is None:
+            return self._bucket(context)
+        return self._shared.total((_CONTEXT_IDS[context],))
+
+    def _contexts(self):
+        if self._shared is None:
+            return list(self._stats.items())
+        tot = self._shared.total()
+        return [(c, tot[i]) for i, c in enumerate(CONTEXTS) if tot[i, 0].any()]
+
+    def select_arm(self, context=None):
+        if not self.enabled:
+            return self.current
+        with self._lock:
+            self.t += 1
+            n, r, r2, v = self._totals(context)
+            untried = n <= 0
+            safe = np.maximum(n, 1e-9)
+            mu = r / safe / self._scale
+            bonus = np.sqrt(2.0 * math.log(max(n.sum(), math.e)) / safe)
+            feasible = untried | (v / safe - bonus <= self.slo_q)
+            if not feasible.any():
+                i = int(np.argmin(v / safe))    # nothing meets the SLO: least-violating arm
+            elif self.policy == "epsilon" and random.random() < self.epsilon:
+                i = int(random.choice(np.flatnonzero(feasible)))
+            else:
+                if self.policy == "thompson":
+                    var = np.maximum(r2 / safe / self._scale ** 2 - mu ** 2, 1e-4)
+                    score = mu + np.sqrt(var / safe) * self._rng.standard_normal(len(mu))
+                elif self.policy == "epsilon":
+                    score = mu.copy()
+                else:  # UCB1
+                    score = mu + bonus
+                score[untried] = np.inf
+                score[~feasible] = -np.inf
+                i = int(np.argmax(score))
+            self.current, self.context = self.arms[i], context
+        return self.current
+
+    def update(self, arm, latency_ms, rows=1, context=None, worst_ms=None):
+        self.update_many((arm,), (latency_ms,), rows=rows, context=context,
+                         worst_ms=None if worst_ms is None else (worst_ms,))
+
+    def update_many(self, arms, latencies_ms, rows=1, context=None, worst_ms=None):
+        """Batch of observations in one context, discounted exactly as sequential updates would be."""
+        ids = np.fromiter((self.arm_id(a) for a in arms), dtype=np.intp)
+        lat = np.maximum(np.asarray(latencies_ms, dtype=np.float64), 1e-3)
+        tput = np.broadcast_to(np.asarray(rows, dtype=np.float64), lat.shape) * 1000.0 / lat
+        worst = lat if worst_ms is None else np.asarray(worst_ms, dtype=np.float64)
+        m = ids.shape[0]
+        w = self.gamma ** np.arange(m - 1, -1, -1, dtype=np.float64)  # newest weighs 1
+        with self._lock:
+            self._scale = max(self._scale, float(tput.max(initial=0.0)))
+            s = self._bucket(context)
+            s *= self.gamma ** m
+            for row, vals in enumerate((np.ones(m), tput, tput * tput, (worst > self.slo_ms).astype(np.float64))):
+                np.add.at(s[row], ids, w * vals)
+        self._maybe_save()
+
+    # ---- persistence ----
+    def state(self):
+        with self._lock:
+            return {"kind": "contextual", "t": self.t, "scale": self._scale, "arms": self.arms,
+                    "contexts": {"none" if c is None else f"{c[0]},{c[1]}": s.tolist() for c, s in self._contexts()}}
+
+    def restore(self, st):
+        cols = [(j, self._ids.get(_arm_key(a))) for j, a in enumerate(st.get("arms", []))]
+        cols = [(j, i) for j, i in cols if i is not None]
+        with self._lock:
+            self.t = st.get("t", 0)
+            self._scale = st.get("scale", 1.0)
+            for key, rows in st.get("contexts", {}).items():
+                ctx = None if key == "none" else tuple(int(v) for v in key.split(","))
+                src, dst = np.asarray(rows, dtype=np.float64), self._bucket(ctx)
+                for j, i in cols:
+                    dst[:, i] = src[:, j]
+
+    def snapshot(self, top=5):
+        with self._lock:
+            contexts = {}
+            for ctx, (n, r, _, v) in self._contexts():
+                tried = np.flatnonzero(n > 0)
+                order = tried[np.argsort(-(r[tried] / n[tried]))][:top]
+                contexts[f"q{ctx[0]}r{ctx[1]}" if ctx else "none"] = [
+                    {"arm": self.arms[i], "weight": float(n[i]), "rows_per_s": float(r[i] / n[i]),
+                     "slo_violation_rate": float(v[i] / n[i])} for i in order]
+        return {
+            "enabled": self.enabled, "policy": self.policy, "mode": "contextual",
+            "current": self.current, "context": self.context, "arms": len(self.arms),
+            "slo_ms": self.slo_ms, "slo_q": self.slo_q, "gamma": self.gamma, "contexts": contexts,
+            "shared_slot": self._shared.slot if self._shared is not None else None,
+        }
+
+TUNERS = {"bandit": BanditTuner, "contextual": ContextualTuner}
@@ -0,0 +1,4 @@
+# backend/loadgen/__init__.py
+from .hdr import Histogram
+from .client import HttpPool
+from .driver import make_targets, open_loop, closed_loop, report, sweep
@@ -0,0 +1,52 @@
+# backend/loadgen/__main__.py
+# python -m backend.loadgen --rates 50,100,200,400 --mix infer=8,formal=1,metrics=1 --out load.json
+import argparse, json, sys
+from pathlib import Path
+from .driver import sweep
+
+def _nums(cast):
+    return lambda s: tuple(cast(v) for v in s.split(",") if v)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m backend.loadgen",
+                                 description="Drive the API at open-loop rates or closed-loop concurrency and "
+                                             "report throughput vs. latency (coordinated-omission corrected).")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--rates", type=_nums(float), default=(), help="open loop: arrivals/s per step, e.g. 50,100,200")
+    ap.add_argument("--concurrency", type=_nums(int), default=(), help="closed loop: clients per step, e.g. 1,4,16")
+    ap.add_argument("--mix", default="infer", help="target weights: infer, formal, metrics (e.g. infer=8,metrics=1)")
+    ap.add_argument("--duration", type=float, default=10.0, help="measured seconds per step")
+    ap.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each step")
+    ap.add_argument("--connections", type=int, default=64, help="keep-alive connection pool size")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="closed loop: pause between a client's requests")
+    ap.add_argument("--expected-interval-ms", type=float,
+                    help="closed loop: CO correction interval (default: the step's median service time)")
+    ap.add_argument("--max-inflight", type=int, default=10000, help="open loop: arrivals beyond this are dropped")
+    ap.add_argument("--infer-batch", type=int, default=4)
+    ap.add_argument("--formal-force", action="store_true", help="bypass the verdict cache (runs sby every time)")
+    ap.add_argument("--trace", action="store_true", help="send X-Aegis-Trace: see /debug/traces for the stages")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    try:
+        rep = sweep(args.url, rates=args.rates, concurrency=args.concurrency, mix=args.mix,
+                    duration_s=args.duration, warmup_s=args.warmup, connections=args.connections,
+                    timeout_s=args.timeout, arrivals=args.arrivals, think_ms=args.think_ms,
+                    expected_interval_ms=args.expected_interval_ms, max_inflight=args.max_inflight,
+                    seed=args.seed, infer_batch=args.infer_batch, formal_force=args.formal_force,
+                    trace=args.trace, log=lambda m: print(m, file=sys.stderr))
+    except ValueError as e:
+        ap.error(str(e))
+    if args.out:
+        path = Path(args.out)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(rep, indent=2))
+    else:
+        print(json.dumps(rep, indent=2))
+    return 1 if any(s["requests"] == 0 or s["errors"] == s["requests"] for s in rep["steps"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
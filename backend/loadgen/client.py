@@ -0,0 +1,116 @@
+# backend/loadgen/client.py
+import asyncio
+from urllib.parse import urlsplit
+
+MAX_HEADER_BYTES = 64 << 10
+
+class HttpError(Exception):
+    pass
+
+class _Conn:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+class HttpPool:
+    """
+    Minimal keep-alive HTTP/1.1 client on asyncio streams (stdlib only, so
+    the load generator adds no dependency and its own overhead stays small
+    and predictable). At most `size` connections; callers beyond that wait
+    for one, and that wait counts toward their latency.
+    Bodies are read fully (Content-Length or chunked) and only their size is kept.
+    """
+    def __init__(self, base_url, size=64, timeout_s=30.0):
+        u = urlsplit(base_url)
+        if u.scheme != "http":
+            raise ValueError("only http:// targets are supported")
+        self.host, self.port = u.hostname, u.port or 80
+        self.prefix = u.path.rstrip("/")
+        self.timeout_s = timeout_s
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _get(self):
+        while self._idle:
+            c = self._idle.pop()
+            if not c.reader.at_eof():
+                return c
+            c.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=MAX_HEADER_BYTES)
+        self.opened += 1
+        return _Conn(reader, writer)
+
+    async def request(self, method, path, body=b"", headers=None):
+        """Returns (status, body_bytes_len); raises HttpError / OSError / asyncio.TimeoutError."""
+        async with self._slots:
+            c = await self._get()
+            try:
+                status, n, keep = await asyncio.wait_for(self._roundtrip(c, method, path, body, headers),
+                                                         self.timeout_s)
+            except BaseException:
+                c.close()
+                raise
+            if keep:
+                self._idle.append(c)
+            else:
+                c.close()
+            return status, n
+
+    async def _roundtrip(self, c, method, path, body, headers):
+        head = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        c.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await c.writer.drain()
+
+        line = await c.reader.readline()
+        if not line:
+            raise HttpError("connection closed before response")
+        parts = line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise HttpError(f"bad status line {line[:80]!r}")
+        status = int(parts[1])
+        length, chunked, keep = None, False, parts[0] != b"HTTP/1.0"
+        while True:
+            h = await c.reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = h.partition(b":")
+            k, v = k.strip().lower(), v.strip().lower()
+            if k == b"content-length":
+                length = int(v)
+            elif k == b"transfer-encoding":
+                chunked = b"chunked" in v
+            elif k == b"connection":
+                keep = v != b"close"
+
+        n = 0
+        if chunked:
+            while True:
+                size = int((await c.reader.readline()).split(b";")[0], 16)
+                if size:
+                    await c.reader.readexactly(size)
+                    n += size
+                await c.reader.readline()  # CRLF after each chunk (and after the last, empty one)
+                if not size:
+                    break
+        elif length is not None:
+            if length:
+                await c.reader.readexactly(length)
+            n = length
+        elif method != "HEAD" and status not in (204, 304):
+            n = len(await c.reader.read())  # delimited by close
+            keep = False
+        return status, n, keep
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop().close()
@@ -0,0 +1,243 @@
+# backend/loadgen/driver.py
+import os, sys, json, time, random, asyncio, platform
+from urllib.parse import urlencode
+from .client import HttpPool, HttpError
+from .hdr import Histogram
+
+SPIN_S = 0.0015          # open loop: the last stretch before a send is yielded through, not slept
+
+class Target:
+    """One request kind: method, path and a body factory (called per request)."""
+    def __init__(self, name, method, path, body=None, headers=None):
+        self.name, self.method, self.path = name, method, path
+        self.body = body or (lambda: b"")
+        self.headers = headers or {}
+
+def make_targets(infer_batch=4, infer_model=None, formal_kind="prove", formal_force=False, trace=False):
+    """
+    /infer/once (form post; concurrent requests coalesce in the batcher),
+    /formal/run (built-in sample; point the server's AEGIS_SBY_BIN at
+    backend/formal_verifier/sby_stub.py when no toolchain is installed; without
+    formal_force every run after the first is a cache hit) and /metrics.
+    trace=True sends X-Aegis-Trace so every request shows up in /debug/traces.
+    """
+    form = {"batch": infer_batch, **({"model": infer_model} if infer_model else {})}
+    infer_body = urlencode(form).encode()
+    formal_body = json.dumps({"kind": formal_kind, "force": formal_force}).encode()
+    extra = {"X-Aegis-Trace": "1"} if trace else {}
+    return {
+        "infer": Target("infer", "POST", "/infer/once", lambda: infer_body,
+                        {"Content-Type": "application/x-www-form-urlencoded", **extra}),
+        "formal": Target("formal", "POST", "/formal/run", lambda: formal_body,
+                         {"Content-Type": "application/json", **extra}),
+        "metrics": Target("metrics", "GET", "/metrics", None, {"Accept-Encoding": "gzip", **extra}),
+    }
+
+def parse_mix(spec):
+    """"infer=8,formal=1,metrics=1" -> {"infer": 8.0, ...}; a bare name weighs 1."""
+    mix = {}
+    for part in (p.strip() for p in spec.split(",") if p.strip()):
+        name, _, w = part.partition("=")
+        mix[name] = float(w or 1)
+    return mix
+
+class StepStats:
+    """Per-target histograms for one load step (latency from intended start, and service time)."""
+    def __init__(self, names):
+        self.latency = {n: Histogram() for n in names}   # from the intended send time (CO-free in open loop)
+        self.service = {n: Histogram() for n in names}   # from the actual send: what a naive client reports
+        self.status = {n: {} for n in names}
+        self.errors = {n: 0 for n in names}
+        self.bytes = 0
+        self.late = 0                                     # open loop: sends that started behind schedule
+
+    def record(self, name, intended, sent, done, status=None, n=0, error=None):
+        if error is not None:
+            self.errors[name] += 1
+            key = type(error).__name__
+        else:
+            key = str(status)
+            self.bytes += n
+        self.status[name][key] = self.status[name].get(key, 0) + 1
+        self.latency[name].record((done - intended) * 1e6)
+        self.service[name].record((done - sent) * 1e6)
+
+async def _send(pool, target, stats, intended, record):
+    sent = time.perf_counter()
+    try:
+        status, n = await pool.request(target.method, target.path, target.body(), target.headers)
+        ok = 200 <= status < 400
+        if record:
+            stats.record(target.name, intended, sent, time.perf_counter(), status, n)
+            if not ok:
+                stats.errors[target.name] += 1
+    except (HttpError, OSError, EOFError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError) as e:
+        if record:
+            stats.record(target.name, intended, sent, time.perf_counter(), error=e)
+
+def _chooser(targets, mix, seed):
+    rng = random.Random(seed)
+    names = [n for n in mix if mix[n] > 0]
+    weights = [mix[n] for n in names]
+    return lambda: targets[rng.choices(names, weights)[0]]
+
+async def open_loop(pool, targets, mix, rate, duration_s, warmup_s=1.0, arrivals="poisson", seed=0,
+                    max_inflight=10000):
+    """
+    Requests arrive on a schedule at `rate`/s (poisson or uniform gaps)
+    regardless of how fast the server answers. Latency runs from each
+    request's scheduled time, so queueing in the client (pool full, loop
+    behind) is charged to the server the way a real arrival would be; that
+    is the coordinated-omission correction (wrk2 style). More than
+    `max_inflight` outstanding requests counts the arrival as dropped.
+    """
+    stats = StepStats(targets)
+    pick, rng = _chooser(targets, mix, seed), random.Random(seed + 1)
+    gap = 1.0 / rate
+    tasks, dropped = set(), 0
+    t0 = time.perf_counter()
+    measure_from, end = t0 + warmup_s, t0 + warmup_s + duration_s
+    nxt = t0
+    while nxt < end:
+        now = time.perf_counter()
+        if nxt > now:
+            # the selector wakes up to ~1 ms late; sleep short of the slot and yield the rest
+            if nxt - now > SPIN_S:
+                await asyncio.sleep(nxt - now - SPIN_S)
+            while time.perf_counter() < nxt:
+                await asyncio.sleep(0)
+        elif now - nxt > gap and nxt >= measure_from:
+            stats.late += 1
+        if len(tasks) >= max_inflight:
+            dropped += nxt >= measure_from
+        else:
+            task = asyncio.create_task(_send(pool, pick(), stats, nxt, nxt >= measure_from))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        nxt += rng.expovariate(rate) if arrivals == "poisson" else gap
+    if tasks:
+        await asyncio.wait(tasks)
+    return stats, {"mode": "open", "rate": rate, "arrivals": arrivals, "dropped": dropped,
+                   "wall_s": time.perf_counter() - measure_from}
+
+async def closed_loop(pool, targets, mix, concurrency, duration_s, warmup_s=1.0, think_ms=0.0, seed=0):
+    """
+    `concurrency` clients, each sending its next request only after the
+    previous answer (+ think time). Throughput is whatever the server
+    sustains; the raw latencies hide the requests a slow response held back,
+    so the report adds a coordinated-omission corrected view (see report()).
+    """
+    stats = StepStats(targets)
+    t0 = time.perf_counter()
+    measure_from, end = t0 + warmup_s, t0 + warmup_s + duration_s
+
+    async def client(i):
+        pick = _chooser(targets, mix, seed + i)
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                return
+            await _send(pool, pick(), stats, now, now >= measure_from)
+            if think_ms:
+                await asyncio.sleep(think_ms / 1000.0)
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return stats, {"mode": "closed", "concurrency": concurrency, "think_ms": think_ms,
+                   "wall_s": time.perf_counter() - measure_from}
+
+def report(stats, info, expected_interval_ms=None):
+    """
+    Step summary: throughput, errors and latency per target and overall.
+    Closed loop: "latency_corrected" replays each sample with HdrHistogram's
+    expected-interval correction; the interval defaults to the step's
+    median service time (what an unstalled client would have waited
+    between sends) unless expected_interval_ms is given.
+    """
+    wall = max(info["wall_s"], 1e-9)
+    total_lat, total_svc = Histogram(), Histogram()
+    per = {}
+    for name in stats.latency:
+        lat, svc = stats.latency[name], stats.service[name]
+        if not lat.total:
+            continue
+        total_lat.merge(lat)
+        total_svc.merge(svc)
+        per[name] = {"requests": lat.total, "throughput_rps": round(lat.total / wall, 2),
+                     "errors": stats.errors[name], "status": stats.status[name],
+                     "latency": lat.summary(), "service": svc.summary()}
+    out = {**info, "wall_s": round(wall, 3), "requests": total_lat.total,
+           "throughput_rps": round(total_lat.total / wall, 2),
+           "errors": sum(stats.errors.values()), "bytes": stats.bytes,
+           "latency": total_lat.summary(), "service": total_svc.summary(),
+           "distribution": total_lat.distribution(), "targets": per}
+    if info["mode"] == "open":
+        out["late_sends"] = stats.late
+        if info.get("rate"):
+            out["offered_rps"] = info["rate"]
+    elif total_lat.total:
+        interval_us = (expected_interval_ms * 1000.0) if expected_interval_ms else total_svc.percentile(50)
+        corrected = total_lat.corrected(int(interval_us))
+        out["expected_interval_ms"] = round(interval_us / 1000.0, 3)
+        out["latency_corrected"] = corrected.summary()
+        out["distribution"] = corrected.distribution()
+    return out
+
+async def _run_steps(base_url, steps, targets, mix, connections, timeout_s, log, **kw):
+    pool = HttpPool(base_url, size=connections, timeout_s=timeout_s)
+    results = []
+    try:
+        for step in steps:
+            if "rate" in step:
+                stats, info = await open_loop(pool, targets, mix, step["rate"], kw["duration_s"], kw["warmup_s"],
+                                              arrivals=kw["arrivals"], seed=kw["seed"],
+                                              max_inflight=kw["max_inflight"])
+            else:
+                stats, info = await closed_loop(pool, targets, mix, step["concurrency"], kw["duration_s"],
+                                                kw["warmup_s"], think_ms=kw["think_ms"], seed=kw["seed"])
+            r = report(stats, info, expected_interval_ms=kw.get("expected_interval_ms"))
+            results.append(r)
+            if log:
+                lat = r.get("latency_corrected") or r["latency"]
+                load = f"rate {info['rate']:>8g}/s" if "rate" in info else f"conc {info['concurrency']:>6d}  "
+                log(f"{load}  {r['throughput_rps']:>9.1f} rps  err {r['errors']:<5d} "
+                    f"p50 {lat['p50_ms']}  p90 {lat['p90_ms']}  p99 {lat['p99_ms']}  "
+                    f"p99.9 {lat['p99.9_ms']}  max {lat['max_ms']} ms")
+    finally:
+        await pool.close()
+    return results, pool.opened
+
+def sweep(base_url="http://127.0.0.1:8000", rates=(), concurrency=(), mix="infer", duration_s=10.0, warmup_s=2.0,
+          connections=64, timeout_s=30.0, arrivals="poisson", think_ms=0.0, expected_interval_ms=None,
+          max_inflight=10000, seed=0, infer_batch=4, formal_force=False, trace=False, log=None):
+    """
+    One step per open-loop rate, then one per closed-loop concurrency level;
+    the steps together are the throughput-vs-latency curve. Returns
+    {"meta", "steps", "curve"}.
+    """
+    targets = make_targets(infer_batch=infer_batch, formal_force=formal_force, trace=trace)
+    weights = parse_mix(mix) if isinstance(mix, str) else dict(mix)
+    unknown = set(weights) - set(targets)
+    if unknown:
+        raise ValueError(f"unknown target(s) {sorted(unknown)}; known: {sorted(targets)}")
+    steps = [{"rate": float(r)} for r in rates] + [{"concurrency": int(c)} for c in concurrency]
+    if not steps:
+        raise ValueError("give at least one open-loop rate or closed-loop concurrency")
+    results, opened = asyncio.run(_run_steps(
+        base_url, steps, targets, weights, connections, timeout_s, log, duration_s=duration_s, warmup_s=warmup_s,
+        arrivals=arrivals, think_ms=think_ms, expected_interval_ms=expected_interval_ms,
+        max_inflight=max_inflight, seed=seed))
+    curve = []
+    for r in results:
+        lat = r.get("latency_corrected") or r["latency"]
+        curve.append({"mode": r["mode"], "load": r.get("rate", r.get("concurrency")),
+                      "throughput_rps": r["throughput_rps"], "errors": r["errors"],
+                      **{k: lat[k] for k in ("p50_ms", "p90_ms", "p99_ms", "p99.9_ms", "max_ms")}})
+    return {
+        "meta": {
+            "created": time.time(), "base_url": base_url, "mix": weights, "duration_s": duration_s,
+            "warmup_s": warmup_s, "connections": connections, "connections_opened": opened,
+            "arrivals": arrivals, "infer_batch": infer_batch, "formal_force": formal_force,
+            "python": sys.version.split()[0], "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        },
+        "steps": results, "curve": curve,
+    }
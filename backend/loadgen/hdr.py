@@ -0,0 +1,125 @@
+# backend/loadgen/hdr.py
+import math
+
+SUB_BITS = 7                 # 128 sub-buckets per power of two: <= 1/64 (1.6%) relative error
+MAX_EXP = 40                 # values up to ~2^46 us (years); anything larger is clamped
+PERCENTILES = (50.0, 75.0, 90.0, 95.0, 99.0, 99.9, 99.99, 100.0)
+
+_SUB = 1 << SUB_BITS
+_HALF = _SUB >> 1
+
+def _index(v):
+    # values below _SUB are exact; above, the top SUB_BITS bits pick the bucket
+    if v < _SUB:
+        return v
+    e = min(v.bit_length() - SUB_BITS, MAX_EXP)
+    sub = min(v >> e, _SUB - 1)
+    return _SUB + (e - 1) * _HALF + (sub - _HALF)
+
+def _bounds(i):
+    if i < _SUB:
+        return i, i
+    e, sub = (i - _SUB) // _HALF + 1, (i - _SUB) % _HALF + _HALF
+    return sub << e, ((sub + 1) << e) - 1
+
+class Histogram:
+    """
+    HDR-style log-linear latency histogram over integer microseconds: fixed
+    memory, O(1) record, bounded relative error, mergeable across workers.
+    Percentiles report the highest value equivalent to the bucket (as
+    HdrHistogram does), min/max/mean are exact.
+    """
+    def __init__(self):
+        self.counts = [0] * (_SUB + MAX_EXP * _HALF)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, us, count=1):
+        v = max(0, int(us))
+        self.counts[_index(v)] += count
+        self.total += count
+        self.sum += v * count
+        self.min = v if self.min is None else min(self.min, v)
+        self.max = max(self.max, v)
+
+    def record_corrected(self, us, expected_interval_us):
+        """
+        record() plus the samples a stalled closed-loop client never sent: a
+        response that took N expected intervals also stands for the requests
+        that would have been waiting behind it (HdrHistogram's
+        recordValueWithExpectedInterval).
+        """
+        self.record(us)
+        if expected_interval_us and expected_interval_us > 0:
+            missing = int(us) - expected_interval_us
+            while missing >= expected_interval_us:
+                self.record(missing)
+                missing -= expected_interval_us
+
+    def corrected(self, expected_interval_us):
+        """Copy with coordinated-omission correction applied after the fact (bucket upper bounds)."""
+        out = Histogram()
+        for i, n in enumerate(self.counts):
+            if n:
+                v = min(_bounds(i)[1], self.max)
+                out.record(v, n)
+                if expected_interval_us and expected_interval_us > 0:
+                    missing = v - expected_interval_us
+                    while missing >= expected_interval_us:
+                        out.record(missing, n)
+                        missing -= expected_interval_us
+        return out
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, p):
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(p / 100.0 * self.total))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_bounds(i)[1], self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else None
+
+    def summary(self, percentiles=PERCENTILES):
+        """Milliseconds: count, min/mean/max and p50 ... p100."""
+        ms = lambda us: None if us is None else round(us / 1000.0, 3)
+        return {"count": self.total, "min_ms": ms(self.min), "mean_ms": ms(self.mean),
+                "max_ms": ms(self.max) if self.total else None,
+                **{f"p{p:g}_ms": ms(self.percentile(p)) for p in percentiles}}
+
+    def distribution(self, ticks_per_half=5):
+        """HdrHistogram-style percentile ladder: (value_ms, percentile, count_at_or_below) rows for plotting."""
+        rows, p, seen = [], 0.0, set()
+        while self.total and p < 100.0:
+            v = self.percentile(p)
+            if v not in seen:
+                seen.add(v)
+                rows.append([round(v / 1000.0, 3), round(p, 5), self._count_le(v)])
+            # steps shrink geometrically toward 100%, so the tail gets most of the rows
+            p += (100.0 - p) / 2.0 / ticks_per_half if 100.0 - p > 1e-3 else 100.0
+        if self.total:
+            rows = [r for r in rows if r[2] < self.total]
+            rows.append([round(self.max / 1000.0, 3), 100.0, self.total])
+        return rows
+
+    def _count_le(self, us):
+        idx = _index(int(us))
+        return sum(self.counts[:idx + 1])
@@ -1,4 +1,22 @@
 # run.sh
 #!/usr/bin/env bash
+#   ./run.sh                    dev: single process, --reload
+#   WORKERS=4 ./run.sh serve    N worker processes sharing tuner stats and metrics
+# In serve mode: `kill -HUP <pid>` restarts the workers one by one, SIGTERM drains
+# (in-flight requests get up to DRAIN_S seconds, then each worker saves its tuner state).
 source .venv/bin/activate
+if [ "${1:-dev}" = "serve" ]; then
+  WORKERS=${WORKERS:-$(nproc)}
+  export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-data/run/prometheus}
+  export AEGIS_TUNER_SHARED_DIR=${AEGIS_TUNER_SHARED_DIR:-data/run/tuner}
+  export AEGIS_FORMAL_JOBS_DIR=${AEGIS_FORMAL_JOBS_DIR:-data/run/jobs}
+  # Split the cores between workers instead of every worker's torch grabbing all of them
+  export OMP_NUM_THREADS=${OMP_NUM_THREADS:-$(( $(nproc) / WORKERS > 0 ? $(nproc) / WORKERS : 1 ))}
+  # Metric files from a previous run would be summed into this one, and its jobs died with it;
+  # tuner stats are meant to persist
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR" "$AEGIS_FORMAL_JOBS_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR" "$AEGIS_TUNER_SHARED_DIR" "$AEGIS_FORMAL_JOBS_DIR"
+  exec uvicorn backend.api.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS" \
+    --timeout-graceful-shutdown "${DRAIN_S:-30}"
+fi
 uvicorn backend.api.main:app --host 0.0.0.0 --port 8000 --reload
@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))  # `import backend` when run as plain `pytest`
+# Keep test traffic out of the persistent run history and tuner state
+os.environ.setdefault("AEGIS_HISTORY_DB", "")
+os.environ.setdefault("AEGIS_TUNER_STATE", "")
@@ -0,0 +1,21 @@
+# tests/test_api.py
+import pytest
+from conftest import ROOT
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.chdir(ROOT)  # static/ and templates/ mount relative to the repo root
+    from fastapi.testclient import TestClient
+    from backend.api.main import app
+    return TestClient(app)
+
+@pytest.mark.parametrize("route", ["/artifact", "/artifact/vcd", "/artifact/vcd/index"])
+@pytest.mark.parametrize("rel_path", ["../../../etc/hostname", "../README.md", "/etc/hostname",
+                                      "rtl_samples/../../README.md"])
+def test_artifact_paths_cannot_leave_data(client, route, rel_path):
+    assert client.get(route, params={"rel_path": rel_path}).status_code == 404
+
+def test_artifact_serves_files_under_data(client):
+    r = client.get("/artifact", params={"rel_path": "rtl_samples/counter.sv"})
+    assert r.status_code == 200
+    assert r.content == (ROOT / "data" / "rtl_samples" / "counter.sv").read_bytes()
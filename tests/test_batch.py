@@ -0,0 +1,29 @@
+# tests/test_batch.py
+from conftest import ROOT
+from backend.formal_verifier.batch import run_batch
+
+STUB = ROOT / "backend" / "formal_verifier" / "sby_stub.py"
+COUNTER = str(ROOT / "data" / "rtl_samples" / "counter.sv")
+
+def test_bad_entries_are_reported_and_the_rest_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    monkeypatch.setenv("AEGIS_STUB_DELAY_S", "0.05")
+    manifest = {"rtl": COUNTER, "entries": [{"rtl_path": str(tmp_path / "missing.sv")}, {"top": "counter"},
+                                            {"rtl_path": COUNTER}]}
+    for adaptive in (False, True):
+        rep = run_batch({**manifest, "adaptive": adaptive, "max_depth": 4}, parallel=2, force=True)
+        by_top = [(r["top"], r["status"]) for r in rep["entries"]]
+        assert by_top[:3] == [("counter", "PASSED"), ("missing", "ERROR"), ("counter", "ERROR")]
+        errors = [r["error"] for r in rep["entries"] if r["status"] == "ERROR"]
+        assert "missing.sv" in errors[0] and "rtl_path" in errors[1]
+        assert rep["summary"]["by_status"]["ERROR"] == 2
+
+def test_identical_entries_run_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    monkeypatch.setenv("AEGIS_STUB_DELAY_S", "0.05")
+    rep = run_batch({"rtl": COUNTER, "entries": [{"rtl_path": COUNTER}]}, force=True)
+    assert rep["summary"]["unique_runs"] == 1
+    assert [r["shared"] for r in rep["entries"]] == [False, True]
+    assert rep["entries"][0]["run_id"] == rep["entries"][1]["run_id"]
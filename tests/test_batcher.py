@@ -0,0 +1,79 @@
+# tests/test_batcher.py
+import asyncio
+import numpy as np, pytest, torch
+from backend.inferopt.model import TinyNet
+from backend.inferopt.server import InferService
+
+IN_DIM = 8
+
+@pytest.fixture
+def svc():
+    torch.manual_seed(0)
+    s = InferService(workers=2, model=TinyNet(in_dim=IN_DIM, hidden=16, out_dim=4).eval())
+    s.tuner.enabled = False          # flush limits come from the batcher itself
+    s.batcher.max_wait_ms = 50.0     # wide enough that concurrent submits always meet
+    yield s
+    s.close()
+
+def _rows(n, seed):
+    return np.random.default_rng(seed).standard_normal((n, IN_DIM)).astype(np.float32)
+
+def test_concurrent_requests_share_one_forward_and_get_their_own_rows(svc):
+    xs = [_rows(2, 1), _rows(3, 2), _rows(1, 3)]
+
+    async def go():
+        return await asyncio.gather(*(svc.batcher.submit(x) for x in xs))
+    outs = asyncio.run(go())
+    assert svc.batcher.flushes == 1 and svc.batcher.last_flush_rows == 6
+    for x, r in zip(xs, outs):
+        assert r["coalesced"] == 6 and r["requests"] == 3
+        with torch.inference_mode():
+            np.testing.assert_allclose(r["output"], svc.model(torch.from_numpy(x)).numpy(), rtol=1e-5, atol=1e-6)
+    assert svc.buffers.snapshot()["free"] == {"6x8": 1}  # gather buffer went back to the pool
+
+def test_max_batch_splits_flushes(svc):
+    svc.batcher.max_batch = 4
+
+    async def go():
+        return await asyncio.gather(*(svc.batcher.submit(_rows(2, i)) for i in range(4)))
+    outs = asyncio.run(go())
+    assert svc.batcher.flushes == 2 and [r["coalesced"] for r in outs] == [4, 4, 4, 4]
+
+def test_failed_flush_fails_its_requests_and_releases_lane_and_buffer(svc):
+    async def go():
+        bad = await asyncio.gather(svc.batcher.submit(_rows(2, 1)),
+                                   svc.batcher.submit(np.ones((2, IN_DIM + 1), np.float32)),
+                                   return_exceptions=True)
+        lanes = svc.batcher._busy
+        ok = await svc.batcher.submit(_rows(3, 2))
+        return bad, lanes, ok
+    bad, lanes, ok = asyncio.run(go())
+    assert all(isinstance(e, Exception) for e in bad)
+    assert lanes == 0
+    assert svc.buffers.snapshot()["allocated"] == 1 and svc.buffers.snapshot()["free"] == {"4x8": 1}
+    assert ok["output"].shape == (3, 4)
+
+def test_close_fails_queued_and_collected_requests(svc, monkeypatch):
+    svc.executor.resize(1)
+    svc.batcher.max_wait_ms = 1.0
+    gate = None
+
+    async def stuck(x, lanes=1, runtime="eager"):
+        await gate.wait()
+        return np.zeros((x.shape[0], 4), np.float32), 0.0
+    monkeypatch.setattr(svc.executor, "forward_async", stuck)
+
+    async def go():
+        nonlocal gate
+        gate = asyncio.Event()
+        first = asyncio.ensure_future(svc.batcher.submit(_rows(1, 0)))
+        await asyncio.sleep(0.05)    # first flush holds the only lane
+        rest = [asyncio.ensure_future(svc.batcher.submit(_rows(1, i))) for i in range(1, 4)]
+        await asyncio.sleep(0.05)    # one is collected by the loop waiting for a lane, the rest queue
+        svc.batcher.close()
+        out = await asyncio.wait_for(asyncio.gather(*rest, return_exceptions=True), 5)
+        gate.set()
+        return out, await first
+    rest, first = asyncio.run(go())
+    assert [str(e) for e in rest] == ["batcher closed"] * 3
+    assert first["output"].shape == (1, 4)
@@ -0,0 +1,14 @@
+# tests/test_bench.py
+from backend.common.history import HISTORY
+from backend.inferopt import server
+from backend.inferopt.bench import harness
+
+def test_run_tuner_closes_its_service_and_skips_the_history(monkeypatch):
+    recorded, closed = [], []
+    monkeypatch.setattr(HISTORY, "record_infer", lambda *a, **kw: recorded.append(a))
+    close = server.InferService.close
+    monkeypatch.setattr(server.InferService, "close", lambda self: (closed.append(self), close(self)))
+    r = harness.run_tuner("ucb1", trials=6)
+    assert r["trials"] == 6 and r["final_arm"] is not None
+    assert len(closed) == 1 and closed[0].history is not HISTORY
+    assert recorded == []
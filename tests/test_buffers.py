@@ -0,0 +1,67 @@
+# tests/test_buffers.py
+import numpy as np, pytest
+from backend.inferopt import buffers
+from backend.inferopt.buffers import BufferPool, decode_payload
+
+MSGPACK = "application/msgpack"
+
+def test_raw_float32_rows_are_mapped_without_copying():
+    rows = np.arange(12, dtype=np.float32).reshape(3, 4)
+    payload = bytearray(rows.tobytes())
+    x = decode_payload(payload, in_dim=4)
+    assert x.shape == (3, 4) and np.array_equal(x, rows)
+    payload[:4] = np.float32(99).tobytes()
+    assert x[0, 0] == 99                 # a view over the request body
+    assert not decode_payload(rows.tobytes(), in_dim=4).flags.writeable
+
+def test_numpy_payloads_are_reshaped_and_cast():
+    x = decode_payload(np.arange(8, dtype=np.float64), in_dim=4)
+    assert x.dtype == np.float32 and x.shape == (2, 4)
+
+@pytest.mark.parametrize("payload", [b"", b"\0" * 6, np.zeros(5, np.float32).tobytes()])
+def test_partial_rows_are_rejected(payload):
+    with pytest.raises(ValueError, match="float32"):
+        decode_payload(payload, in_dim=4)
+
+def test_msgpack_without_the_package_is_a_value_error(monkeypatch):
+    monkeypatch.setattr(buffers, "msgpack", None)
+    with pytest.raises(ValueError, match="msgpack"):
+        decode_payload(b"\x80", in_dim=4, content_type=MSGPACK)
+
+def test_msgpack_payloads():
+    msgpack = pytest.importorskip("msgpack")
+    rows = np.arange(8, dtype=np.float32).reshape(2, 4)
+    x = decode_payload(msgpack.packb({"in_dim": 4, "data": rows.tobytes()}), in_dim=64, content_type=MSGPACK)
+    assert np.array_equal(x, rows)
+    x = decode_payload(msgpack.packb({"data": rows.tolist()}), in_dim=4, content_type="application/x-msgpack")
+    assert np.array_equal(x, rows)
+
+@pytest.mark.parametrize("obj, match", [
+    ([1, 2, 3], "map"), ({"in_dim": 4}, "map"), ({"in_dim": "x", "data": b""}, "in_dim"),
+    ({"in_dim": 0, "data": b""}, "in_dim"), ({"in_dim": 2, "data": [["a", "b"]]}, "data"),
+    ({"in_dim": 2, "data": 7}, "data"), ({"in_dim": 4, "data": b"\0" * 6}, "float32"),
+])
+def test_malformed_msgpack_is_a_value_error(obj, match):
+    msgpack = pytest.importorskip("msgpack")
+    with pytest.raises(ValueError, match=match):
+        decode_payload(msgpack.packb(obj), in_dim=4, content_type=MSGPACK)
+    with pytest.raises(ValueError, match="malformed"):
+        decode_payload(b"\xc1", in_dim=4, content_type=MSGPACK)
+
+def test_buffers_are_reused_per_shape_and_bounded():
+    pool = BufferPool(pin=False, max_free_per_key=2)
+    a = pool.acquire(4, 8)
+    pool.release(a)
+    assert pool.acquire(4, 8) is a and pool.reused == 1
+    bufs = [pool.acquire(4, 8) for _ in range(3)]
+    assert pool.allocated == 4          # `a` is still out
+    for b in bufs:
+        pool.release(b)
+    assert pool.snapshot()["free"] == {"4x8": 2}
+    assert pool.acquire(2, 8).shape == (2, 8) and pool.allocated == 5
+
+def test_synthetic_inputs_are_generated_once_per_shape():
+    pool = BufferPool(pin=False)
+    x = pool.synthetic(4, 8)
+    assert pool.synthetic(4, 8) is x and x.shape == (4, 8) and x.dtype == np.float32
+    assert pool.synthetic(2, 8) is not x and pool.snapshot()["synthetic_shapes"] == 2
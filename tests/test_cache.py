@@ -0,0 +1,80 @@
+# tests/test_cache.py
+import os, time
+from conftest import ROOT
+from backend.formal_verifier import cache, runner
+from backend.formal_verifier.cache import FormalCache, tool_identity, stub_toolchain
+
+STUB = ROOT / "backend" / "formal_verifier" / "sby_stub.py"
+COUNTER = ROOT / "data" / "rtl_samples" / "counter.sv"
+
+def test_identity_follows_the_configured_sby(monkeypatch):
+    monkeypatch.delenv("AEGIS_SBY_BIN", raising=False)
+    plain = tool_identity()
+    assert not stub_toolchain()
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    assert tool_identity() != plain
+    assert str(STUB.resolve()) in tool_identity() and stub_toolchain()
+
+def test_stub_verdicts_are_never_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(runner, "CACHE", FormalCache(tmp_path / "formal"))
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    monkeypatch.setenv("AEGIS_STUB_VERDICT", "FAIL")
+    first = runner.run_formal(str(COUNTER), top="counter")
+    again = runner.run_formal(str(COUNTER), top="counter")
+    assert first["status"] == again["status"] == "FAILED"
+    assert not first["cached"] and not again["cached"]
+    assert not list((tmp_path / "formal").glob("*.json"))
+    assert not cache.CACHE.put("k", {"status": "PASSED"})
+
+def _entry(status="PASSED", **kw):
+    return {"status": status, "run_id": "r", "artifacts": [], **kw}
+
+def test_entries_expire_after_max_age(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "stub_toolchain", lambda: False)
+    store = FormalCache(tmp_path, max_age_s=60)
+    assert store.put("k", _entry())
+    assert store.get("k")["status"] == "PASSED"
+    now = time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: now + 61)
+    assert store.get("k") is None and not (tmp_path / "k.json").exists()
+    assert (store.hits, store.misses) == (1, 1)
+
+def test_only_verdicts_are_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "stub_toolchain", lambda: False)
+    store = FormalCache(tmp_path)
+    assert not store.put("e", _entry("ERROR")) and not store.put("u", _entry("UNKNOWN"))
+    assert store.stats()["entries"] == 0
+
+def test_eviction_drops_least_recently_used_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "stub_toolchain", lambda: False)
+    store = FormalCache(tmp_path, max_entries=2)
+    for i, k in enumerate("abc"):
+        store.put(k, _entry())
+        os.utime(tmp_path / f"{k}.json", (time.time() - 100 + i,) * 2)
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["b", "c"]
+    store.get("b")                                    # touched: now the most recent
+    store.put("d", _entry())
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["b", "d"]
+
+def test_eviction_by_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "stub_toolchain", lambda: False)
+    store = FormalCache(tmp_path, max_bytes=1000)
+    for i in range(5):
+        store.put(f"k{i}", _entry(stdout="x" * 300))
+        os.utime(tmp_path / f"k{i}.json", (time.time() - 100 + i,) * 2)
+    assert store.evict() == 0
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["k3", "k4"]
+    assert store.stats()["bytes"] <= 1000
+
+def test_force_reruns_and_refreshes_the_entry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "stub_toolchain", lambda: False)  # treat the stub's verdicts as real here
+    monkeypatch.setattr(runner, "CACHE", FormalCache(tmp_path / "formal"))
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    first = runner.run_formal(str(COUNTER), top="counter")
+    hit = runner.run_formal(str(COUNTER), top="counter")
+    assert not first["cached"] and hit["cached"] and hit["run_id"] == first["run_id"]
+    forced = runner.run_formal(str(COUNTER), top="counter", force=True)
+    assert not forced["cached"] and forced["run_id"] != first["run_id"]
+    assert runner.run_formal(str(COUNTER), top="counter")["run_id"] == forced["run_id"]
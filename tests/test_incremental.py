@@ -0,0 +1,56 @@
+# tests/test_incremental.py
+from backend.formal_verifier.incremental import ProofStore
+
+RTL = b"""module leaf(input clk, output reg q);
+  always @(posedge clk) q <= ~q;
+  /* a comment
+     spanning lines */
+  always @* assert (q == q);
+endmodule
+
+module top(input clk, output q);
+  leaf u(.clk(clk), .q(q));
+endmodule
+
+module unused(input a);
+  always @* assert (a);
+endmodule
+"""
+
+HARNESS = """module top_tb(input clk);
+  wire q;
+  top dut(.clk(clk), .q(q));
+  always @* assert (q == 1'b0);
+  always @* cover (q);
+endmodule
+"""
+
+def _plan(store, mode="bmc"):
+    return store.plan("rtl/top.sv", RTL, "top", HARNESS, mode, 10)
+
+def test_report_keeps_per_property_outcomes(tmp_path):
+    store = ProofStore(tmp_path / "proofs.json")
+    plan = _plan(store)
+    assert [(p["where"], p["location"]) for p in plan["properties"]] == \
+        [("harness", "harness.sv:4"), ("harness", "harness.sv:5"), ("leaf", "design.sv:5")]
+
+    # sby names the failing assert only; the others are not settled by a FAILED run
+    result = {"status": "FAILED", "failed": 1, "run_id": "r1", "artifacts": [],
+              "properties": [{"location": "harness.sv:4.13-4.30", "kind": "assert", "status": "failed", "step": 3}]}
+    rep = store.record(plan, result, step=3)
+    assert rep["verdict"] == "FAILED"
+    assert [(p["status"], p["step"], p["checked"]) for p in rep["properties"]] == \
+        [("failed", 3, "reverified"), ("undetermined", None, "reverified"), ("undetermined", None, "reverified")]
+
+    again = _plan(store)
+    assert again["reuse"] is not None
+    reused = store.reused_result(again)["incremental"]
+    assert reused["reused"] and reused["reverified"] == 0
+    assert [(p["status"], p["checked"]) for p in reused["properties"]] == \
+        [("failed", "reused"), ("undetermined", "reused"), ("undetermined", "reused")]
+
+def test_passed_run_holds_every_assert(tmp_path):
+    store = ProofStore(tmp_path / "proofs.json")
+    plan = _plan(store, mode="prove")
+    rep = store.record(plan, {"status": "PASSED", "proved": 1, "properties": []})
+    assert {(p["kind"], p["status"]) for p in rep["properties"]} == {("assert", "proved"), ("cover", "undetermined")}
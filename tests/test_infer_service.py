@@ -0,0 +1,70 @@
+# tests/test_infer_service.py
+import asyncio, threading, time
+import numpy as np, pytest
+from backend.inferopt.model import TinyNet
+from backend.inferopt import server
+from backend.inferopt.server import InferService
+
+IN_DIM = 8
+
+@pytest.fixture
+def svc():
+    s = InferService(workers=2, model=TinyNet(in_dim=IN_DIM, hidden=16, out_dim=4).eval())
+    s.tuner.enabled = False  # flushes use the batcher defaults and the callers' lanes
+    yield s
+    s.close()
+
+def test_wrong_in_dim_is_rejected_before_batching(svc):
+    good = np.ones((4, IN_DIM), dtype=np.float32)
+    bad = np.ones((2, 32), dtype=np.float32)
+
+    async def go():
+        return await asyncio.gather(svc.infer_batched(payload=good.tobytes()),
+                                    svc.infer_batched(payload=bad.tobytes(), in_dim=32),
+                                    return_exceptions=True)
+    ok, err = asyncio.run(go())
+    assert isinstance(err, ValueError) and "takes 8" in str(err)
+    assert ok["batch"] == 4 and ok["output"].shape == (4, 4)
+    with pytest.raises(ValueError):
+        svc.infer_once(payload=bad.tobytes(), in_dim=32)
+
+def test_workers_argument_sets_the_forward_lanes(svc, monkeypatch):
+    threads = set()
+    forward = server._timed_forward
+
+    def spy(model, x):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.02)  # keep every lane busy so the pool can't reuse one thread
+        return forward(model, x)
+    monkeypatch.setattr(server, "_timed_forward", spy)
+    svc.executor.resize(3)
+    r = asyncio.run(svc.infer_batched(batch=6, workers=3))
+    assert r["workers"] == 3 and len(threads) == 3 and r["output"].shape == (6, 4)
+    threads.clear()
+    r = asyncio.run(svc.infer_batched(batch=6, workers=1))
+    assert r["workers"] == 1 and len(threads) == 1
+
+def test_resize_widens_concurrent_flushes(svc, monkeypatch):
+    svc.batcher.max_wait_ms = 0.0  # every request flushes on its own
+    peak, busy = 0, 0
+
+    async def slow(x, lanes=1, runtime="eager"):
+        nonlocal peak, busy
+        busy += 1
+        peak = max(peak, busy)
+        await asyncio.sleep(0.05)
+        busy -= 1
+        return np.zeros((x.shape[0], 4), np.float32), 50.0
+    monkeypatch.setattr(svc.executor, "forward_async", slow)
+
+    async def burst():
+        await asyncio.gather(*(svc.batcher.submit(np.ones((1, IN_DIM), np.float32)) for _ in range(8)))
+
+    async def go():
+        nonlocal peak
+        await burst()
+        before, peak = peak, 0
+        svc.executor.resize(4)    # what set_tuner does for wider arms, loop already running
+        await burst()
+        return before, peak
+    assert asyncio.run(go()) == (2, 4)
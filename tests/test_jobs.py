@@ -0,0 +1,121 @@
+# tests/test_jobs.py
+import sys, json, asyncio, threading, subprocess
+import pytest
+from conftest import ROOT
+from backend.formal_verifier import runner
+from backend.formal_verifier.jobs import JobScheduler, TERMINAL
+
+STUB = ROOT / "backend" / "formal_verifier" / "sby_stub.py"
+COUNTER = ROOT / "data" / "rtl_samples" / "counter.sv"
+PARAMS = {"rtl_path": str(COUNTER), "top": "counter", "clk": "clk", "rst": "rst", "kind": "prove"}
+
+def _stub(monkeypatch, tmp_path, delay):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    monkeypatch.setenv("AEGIS_STUB_DELAY_S", str(delay))
+    pids = tmp_path / "pids"
+    pids.mkdir()
+    monkeypatch.setenv("AEGIS_STUB_PIDDIR", str(pids))
+    return pids
+
+def _started(pids):
+    # stub pids that started and never finished normally
+    return [int(p.name.rsplit(".", 1)[1]) for p in pids.iterdir()
+            if not p.name.endswith(".done") and not (pids / f"{p.name}.done").exists()]
+
+def _alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ", 1)[1][0] != "Z"   # a zombie is dead, just not reaped yet
+    except FileNotFoundError:
+        return False
+
+def _finalized(tmp_path):
+    # the job's run dir gets its index.json once _run is completely done with it
+    return list((tmp_path / "data" / "tmp").glob("formal_*/index.json"))
+
+async def _until(pred, timeout=10.0):
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    while not pred():
+        assert loop.time() < end, "timed out"
+        await asyncio.sleep(0.05)
+
+def test_jobs_are_visible_and_cancellable_from_another_worker(tmp_path, monkeypatch):
+    _stub(monkeypatch, tmp_path, 30)
+    shared = tmp_path / "jobs"
+    owner, other = JobScheduler(max_parallel=1, shared_dir=shared), JobScheduler(shared_dir=shared)
+
+    async def go():
+        job = owner.submit(PARAMS, force=True)
+        await _until(lambda: other.get(job.id) is not None and other.get(job.id).status == "running")
+        assert [s["job_id"] for s in other.list()] == [job.id]
+        assert other.cancel(job.id).snapshot()["cancel_requested"]
+        await _until(lambda: other.get(job.id).status == "cancelled")
+        assert job.status == "cancelled" and not (shared / f"{job.id}.cancel").exists()
+        snaps = [s async for s in other.stream(job.id)]
+        assert snaps[-1]["status"] == "cancelled"
+        await _until(lambda: _finalized(tmp_path))
+    asyncio.run(go())
+
+def test_job_of_an_exited_worker_reports_error(tmp_path):
+    pid = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                         capture_output=True, text=True).stdout.strip()
+    (tmp_path / "0123456789ab.json").write_text(json.dumps(
+        {"job_id": "0123456789ab", "status": "running", "created": 0, "owner": int(pid)}))
+    sched = JobScheduler(shared_dir=tmp_path)
+    job = sched.get("0123456789ab")
+    assert job.status == "error" and "exited" in job.snapshot()["error"]
+    assert sched.get("../0123456789ab") is None and sched.get("ffffffffffff") is None
+
+def test_single_process_scheduler_runs_a_job(tmp_path, monkeypatch):
+    _stub(monkeypatch, tmp_path, 0.1)
+    sched = JobScheduler(max_parallel=1, shared_dir="")
+
+    async def go():
+        job = sched.submit(PARAMS, force=True)
+        await _until(lambda: job.status in TERMINAL)
+        return job
+    job = asyncio.run(go())
+    assert job.status == "done" and job.result["status"] == "PASSED"
+    assert sched.get("0123456789ab") is None
+
+def test_cancel_kills_the_running_solver(tmp_path, monkeypatch):
+    pids = _stub(monkeypatch, tmp_path, 30)
+    sched = JobScheduler(max_parallel=1, shared_dir="")
+
+    async def go():
+        job = sched.submit(PARAMS, force=True)
+        queued = sched.submit(PARAMS, force=True)       # waits behind the first: never starts
+        await _until(lambda: _started(pids))
+        pid = _started(pids)[0]
+        assert job.status == "running" and _alive(pid)
+        assert sched.cancel(queued.id).status == "cancelled"
+        assert sched.cancel(job.id).status == "cancelled"
+        await _until(lambda: _finalized(tmp_path))
+        await _until(lambda: not _alive(pid))
+        return job, queued
+    job, queued = asyncio.run(go())
+    assert job.result is None and queued.started is None
+    assert json.loads(_finalized(tmp_path)[0].read_text())["status"] == "CANCELLED"
+    assert len(list(pids.iterdir())) == 1            # one solver ever started, and it never finished
+
+def test_cancel_token_stops_a_blocking_run(tmp_path, monkeypatch):
+    pids = _stub(monkeypatch, tmp_path, 30)
+    token, out = runner.CancelToken(), {}
+
+    def run():
+        try:
+            out["result"] = runner.run_formal(str(COUNTER), top="counter", force=True, cancel=token)
+        except runner.Cancelled:
+            out["cancelled"] = True
+    t = threading.Thread(target=run)
+    t.start()
+    asyncio.run(_until(lambda: _started(pids)))
+    token.cancel()
+    t.join(10)
+    assert not t.is_alive() and out == {"cancelled": True}
+    assert not _alive(_started(pids)[0])
+    with pytest.raises(runner.Cancelled):
+        runner.run_formal(str(COUNTER), top="counter", force=True, cancel=token)  # already cancelled: no spawn
+    assert len(list(pids.iterdir())) == 1
@@ -0,0 +1,56 @@
+# tests/test_metrics.py
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from backend.api.metrics import RouteMetrics, PromMiddleware, Exposition, UNMATCHED
+
+@pytest.fixture
+def scraped():
+    reg = CollectorRegistry()
+    metrics = RouteMetrics(Counter("req", "", ["path", "method", "status"], registry=reg),
+                           Histogram("lat_ms", "", registry=reg),
+                           Histogram("route_lat_ms", "", ["route", "method"], registry=reg))
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(PromMiddleware, metrics=metrics)
+    client = TestClient(app, raise_server_exceptions=False)
+
+    def counts():
+        return {(s.labels["path"], s.labels["status"]): s.value
+                for m in reg.collect() for s in m.samples if s.name == "req_total"}
+    return client, counts, reg
+
+def test_requests_are_labelled_by_route_template(scraped):
+    client, counts, reg = scraped
+    for i in range(3):
+        assert client.get(f"/items/{i}").status_code == 200
+    client.get("/items/x")            # validation error, same template
+    client.get("/nope/1")
+    client.get("/nope/2")
+    assert client.get("/boom").status_code == 500
+    assert counts() == {("/items/{item_id}", "200"): 3, ("/items/{item_id}", "422"): 1,
+                        (UNMATCHED, "404"): 2, ("/boom", "500"): 1}
+    assert reg.get_sample_value("lat_ms_count") == 7
+    assert reg.get_sample_value("route_lat_ms_count", {"route": "/items/{item_id}", "method": "GET"}) == 4
+
+def test_exposition_renders_once_per_ttl(monkeypatch):
+    expo = Exposition(ttl_s=60)
+    body, enc = expo.render()
+    assert enc is None and b"# HELP" in body
+    gz, enc = expo.render(gzip_ok=True)
+    assert enc == "gzip" and gzip.decompress(gz) == body
+    assert expo.render(gzip_ok=True)[0] is gz      # the gzip variant is kept with its render
+    assert expo.renders == 1
+    expo.ttl_s = 0
+    expo.render()
+    assert expo.renders == 2
@@ -0,0 +1,56 @@
+# tests/test_portfolio.py
+import os, time
+from conftest import ROOT
+from backend.formal_verifier import runner
+from backend.formal_verifier.engines import EngineStats
+
+STUB = ROOT / "backend" / "formal_verifier" / "sby_stub.py"
+COUNTER = ROOT / "data" / "rtl_samples" / "counter.sv"
+
+def _alive(pgid):
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def test_portfolio_first_verdict_wins_and_kills_the_rest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # workspace, verdict cache and history all land under data/ here
+    pids = tmp_path / "pids"
+    pids.mkdir()
+    monkeypatch.setenv("AEGIS_SBY_BIN", str(STUB))
+    monkeypatch.setenv("AEGIS_STUB_DELAY_S", "0.2")
+    monkeypatch.setenv("AEGIS_STUB_SLOW_ENGINES", "boolector")   # 0.2 s x 100: would take 20 s
+    monkeypatch.setenv("AEGIS_STUB_PIDDIR", str(pids))
+    stats = EngineStats(tmp_path / "engines.json")
+    monkeypatch.setattr(runner, "ENGINE_STATS", stats)
+
+    t0 = time.monotonic()
+    res = runner.run_formal(str(COUNTER), top="counter", force=True, portfolio=True,
+                            engines=["smtbmc z3", "smtbmc boolector"])
+    assert time.monotonic() - t0 < 10
+
+    assert res["status"] == "PASSED"
+    assert res["engine"] == "smtbmc z3"
+    lanes = {t["engine"]: t for t in res["portfolio"].values()}
+    assert lanes["smtbmc z3"].get("winner") is True
+    assert lanes["smtbmc boolector"].get("killed") is True
+
+    started = dict(reversed(p.name.rsplit(".", 1)) for p in pids.iterdir() if not p.name.endswith(".done"))
+    started = {int(pid): job for pid, job in started.items()}
+    finished = {p.name[:-len(".done")] for p in pids.iterdir() if p.name.endswith(".done")}
+    assert len(started) == 2
+    for pid, job in started.items():
+        if f"{job}.{pid}" in finished:
+            continue
+        # the losing lane never finished and its process group (sby + solvers) is gone
+        assert not _alive(pid), f"{job} process group {pid} still running"
+    assert len(finished) == 1
+
+    recorded = stats.snapshot(runner.prepare_run(str(COUNTER), top="counter", portfolio=True,
+                                                 engines=["smtbmc z3", "smtbmc boolector"])["design_key"])
+    assert recorded["smtbmc z3"]["wins"] == 1 and recorded["smtbmc z3"]["runs"] == 1
+    assert recorded["smtbmc boolector"]["losses"] == 1
+    assert (tmp_path / "engines.json").exists()
@@ -0,0 +1,71 @@
+# tests/test_registry.py
+import json, subprocess, sys
+import pytest, torch
+from conftest import ROOT
+from backend.inferopt.model import TinyNet
+from backend.inferopt.registry import ModelRegistry
+
+KWARGS = {"in_dim": 8, "hidden": 16, "out_dim": 4}
+
+@pytest.fixture
+def root(tmp_path):
+    d = tmp_path / "small"
+    d.mkdir()
+    (d / "model.json").write_text(json.dumps({"arch": "tinynet", "kwargs": KWARGS}))
+    for v in ("v1", "v2", "v10"):
+        torch.save(TinyNet(**KWARGS).state_dict(), d / f"{v}.pt")
+    return tmp_path
+
+def _resident(reg):
+    return [(e["version"], e["state"]) for e in reg.snapshot()["resident"]]
+
+def test_resolve_orders_versions_numerically(root):
+    reg = ModelRegistry(root)
+    assert reg.resolve("small")[:2] == ("small", "v10")
+    assert reg.resolve("small@v2")[2] == root / "small" / "v2.pt"
+    assert reg.available()["small"] == ["v1", "v2", "v10"]
+    with pytest.raises(KeyError):
+        reg.resolve("small@v3")
+    with pytest.raises(KeyError):
+        reg.resolve("missing")
+
+def test_least_recently_used_model_is_evicted(root):
+    reg = ModelRegistry(root, max_resident=2)
+    try:
+        v1 = reg.get("small@v1")
+        assert v1.in_dim == 8
+        reg.get("small@v2")
+        assert reg.get("small@v1") is v1           # resident: no reload, now the most recent
+        reg.get("small@v10")
+        assert _resident(reg) == [("v10", "ready"), ("v1", "ready")]
+        assert reg.evictions == 1
+        assert reg.unload("small@v1") and not reg.unload("small@v1")
+    finally:
+        reg.shutdown()
+
+def test_byte_cap_keeps_only_what_fits(root):
+    reg = ModelRegistry(root)
+    try:
+        size = reg.get("small@v1").resident_bytes()
+        reg.max_bytes = size + size // 2
+        reg.get("small@v2")
+        assert _resident(reg) == [("v2", "ready")] and reg.evictions == 1
+    finally:
+        reg.shutdown()
+
+def test_failed_load_is_reported_and_retried(root):
+    (root / "small" / "model.json").write_text(json.dumps({"arch": "resnet"}))
+    reg = ModelRegistry(root)
+    with pytest.raises(RuntimeError, match="unsupported arch"):
+        reg.get("small@v1")
+    assert _resident(reg) == [("v1", "error")]
+    (root / "small" / "model.json").write_text(json.dumps({"arch": "tinynet", "kwargs": KWARGS}))
+    try:
+        assert reg.get("small@v1").in_dim == 8
+    finally:
+        reg.shutdown()
+
+def test_importing_the_api_does_not_import_torch():
+    code = "import sys, backend.api.main, backend.inferopt.registry; print('torch' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,52 @@
+# tests/test_telemetry.py
+import numpy as np, pytest
+from backend.inferopt.telemetry import Telemetry
+
+NOW = 1_000_000.0
+
+def test_window_keeps_only_recent_events():
+    tel = Telemetry(window_s=10)
+    tel.record(500.0, rows=100, now=NOW - 30)            # outside the window
+    for i in range(10):
+        tel.record(float(i + 1), rows=2, busy_ms=100.0, now=NOW - 10 + i)
+    st = tel.stats(now=NOW)
+    assert (st["events"], st["total_events"], st["rows"]) == (10, 11, 20)
+    assert st["rps"] == pytest.approx(2.0)                 # 20 rows over the 10 s window
+    assert st["p50_ms"] == pytest.approx(5.5) and st["p99_ms"] == pytest.approx(9.91)
+    assert st["utilization_percent"] == pytest.approx(10.0)   # 1 s busy in 10 s
+    assert st["capacity_rps"] == pytest.approx(20.0)
+    assert tel.stats(window_s=60, now=NOW)["events"] == 11
+
+def test_young_ring_rate_uses_the_covered_span_and_lanes():
+    tel = Telemetry(window_s=60)
+    tel.record(1.0, rows=10, busy_ms=1000.0, now=NOW - 2)
+    st = tel.stats(now=NOW, lanes=2)
+    assert st["rps"] == pytest.approx(5.0)                 # 10 rows in 2 s, not in 60 s
+    assert st["utilization_percent"] == pytest.approx(25.0)
+    assert st["capacity_rps"] == pytest.approx(20.0)       # 10 rows per busy second x 2 lanes
+
+def test_ring_wraps_and_overwrites_the_oldest():
+    tel = Telemetry(capacity=4, window_s=100)
+    for i in range(6):
+        tel.record(float(i), now=NOW - 6 + i)
+    st = tel.stats(now=NOW)
+    assert st["events"] == 4 and st["total_events"] == 6
+    assert st["p50_ms"] == pytest.approx(3.5)              # latencies 2..5 survive
+
+def test_record_many_spreads_busy_time_by_rows():
+    tel = Telemetry(capacity=8, window_s=10)
+    tel.record_many([4.0, 6.0], [1, 3], busy_ms=80.0, now=NOW - 1)
+    assert np.allclose(tel._busy[:2], [20.0, 60.0])
+    assert tel.stats(now=NOW)["rows"] == 4
+    tel.record_many([], [], now=NOW)
+    assert tel.stats(now=NOW)["total_events"] == 2
+
+def test_empty_window_and_memoized_reads():
+    tel = Telemetry(window_s=10, refresh_s=60)
+    st = tel.stats()
+    assert st["events"] == 0 and st["p50_ms"] is None and st["capacity_rps"] is None
+    tel.record(1.0)
+    assert tel.stats() is st                               # within refresh_s: the memoized result
+    assert tel.stats(max_age_s=0)["events"] == 1
+    tel.reset()
+    assert tel.stats(max_age_s=0)["total_events"] == 0
@@ -0,0 +1,27 @@
+# tests/test_templates.py
+import sys, subprocess
+from conftest import ROOT
+from backend.formal_verifier.templates import _eval, parse_modules
+
+def test_eval_width_expressions():
+    assert _eval("$clog2(DEPTH)-1", {"DEPTH": 16}) == 3
+    assert _eval("W/2 + 8'hF % 4", {"W": 9}) == 7
+    assert _eval("-(3)*2", {}) == -6
+
+def test_eval_rejects_unsafe_or_unknown():
+    for expr in ("2**8", "__import__('os')", "X + 1", "1/0", "(1).bit_length()", "W*W*W*W"):
+        assert _eval(expr, {"W": 1 << 20}) is None, expr
+
+def test_power_tower_parameter_does_not_hang():
+    # `9**9**9**9` used to be handed to eval() and never return; run it in a child so a regression times out
+    src = "module m #(parameter W=9**9**9**9)(input clk, output [W:0] q); endmodule"
+    code = ("from backend.formal_verifier.templates import parse_modules; "
+            f"m = parse_modules({src!r})['m']; print(m['params'], m['ports'][1]['width'])")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=20)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split() == ["{}", "None"]
+
+def test_parameterized_ports():
+    src = "module fifo #(parameter DEPTH=16, parameter W=8)(input clk, input [W-1:0] d, output [$clog2(DEPTH):0] n); endmodule"
+    ports = {p["name"]: p["width"] for p in parse_modules(src)["fifo"]["ports"]}
+    assert ports == {"clk": 1, "d": 8, "n": 5}
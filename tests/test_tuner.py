@@ -0,0 +1,89 @@
+# tests/test_tuner.py
+import numpy as np, pytest
+from backend.inferopt.tuner import BanditTuner, ContextualTuner, arm_grid
+
+FAST = {"batch": 16, "workers": 1, "max_wait_ms": 4.0, "runtime": "eager"}
+SAFE = {"batch": 4, "workers": 1, "max_wait_ms": 1.0, "runtime": "eager"}
+
+def test_context_buckets_and_arm_grid():
+    assert ContextualTuner.context_of(0, 0.0) == (0, 0)
+    assert ContextualTuner.context_of(5, 2000.0) == (2, 2)
+    assert ContextualTuner.context_of(16, 1e5) == (3, 3)
+    grid = arm_grid(batches=(1, 4), max_waits_ms=(0.0, 1.0), workers=(1,), runtimes=("eager",))
+    assert [(a["batch"], a["max_wait_ms"]) for a in grid] == [(1, 0.0), (4, 0.0), (4, 1.0)]
+
+def test_each_context_keeps_its_own_stats():
+    t = ContextualTuner(arms=[FAST, SAFE], gamma=1.0)
+    t.update(FAST, 10.0, rows=16, context=(1, 1))
+    snap = t.snapshot()["contexts"]
+    assert list(snap) == ["q1r1"] and snap["q1r1"][0]["rows_per_s"] == pytest.approx(1600.0)
+    assert t.select_arm((0, 0)) == FAST              # untried there: both arms still explored first
+
+def test_arms_breaking_the_slo_are_skipped():
+    t = ContextualTuner(arms=[FAST, SAFE], slo_ms=50.0, slo_q=0.05, gamma=1.0)
+    for _ in range(200):
+        t.update(FAST, 60.0, rows=16)                # ~267 rows/s, always over the SLO
+        t.update(SAFE, 20.0, rows=4)                 # 200 rows/s, within it
+    assert t.select_arm() == SAFE
+    rates = {s["arm"]["batch"]: s["slo_violation_rate"] for s in t.snapshot()["contexts"]["none"]}
+    assert rates == {16: 1.0, 4: 0.0}
+
+def test_discounting_fades_old_observations():
+    t = ContextualTuner(arms=[FAST, SAFE], gamma=0.5)
+    t.update(FAST, 10.0)
+    t.update(SAFE, 10.0)
+    t.update(SAFE, 10.0)
+    n = t._bucket(None)[0]
+    assert n.tolist() == [0.25, 1.5]
+
+def test_update_many_matches_sequential_updates():
+    arms = [FAST, SAFE, FAST, FAST, SAFE]
+    lat = [12.0, 30.0, 8.0, 70.0, 25.0]
+    one, many = ContextualTuner(arms=[FAST, SAFE], gamma=0.9), ContextualTuner(arms=[FAST, SAFE], gamma=0.9)
+    for a, l in zip(arms, lat):
+        one.update(a, l, rows=4, context=(1, 0))
+    many.update_many(arms, lat, rows=4, context=(1, 0))
+    assert np.allclose(one._bucket((1, 0)), many._bucket((1, 0)))
+
+    b = BanditTuner()
+    b.update_many([0, 2, 0], [10.0, 20.0, 30.0])
+    b.update(b.arms[2], 40.0)
+    assert b.n.tolist() == [2, 0, 2, 0]
+    assert b.sum_reward.tolist() == [-40.0, 0.0, -60.0, 0.0] and b.sum_sq[0] == 1000.0
+
+def test_state_round_trips_through_the_state_file(tmp_path):
+    path = tmp_path / "tuner.json"
+    t = BanditTuner(state_path=path)
+    t.update_many([0, 1, 1], [5.0, 7.0, 9.0])
+    t.close()
+    back = BanditTuner(state_path=path)
+    assert back.fresh_store and back.load()
+    assert back.n.tolist() == [1, 2, 0, 0] and back.sum_reward[1] == -16.0
+    # stats follow the arm, not its position
+    moved = BanditTuner(arms=[t.arms[1], {"batch": 2, "workers": 1, "max_wait_ms": 0.0}])
+    assert moved.load(path) and moved.n.tolist() == [2, 0]
+    assert not BanditTuner().load(tmp_path / "missing.json")
+
+def test_contextual_state_round_trips(tmp_path):
+    t = ContextualTuner(arms=[FAST, SAFE], state_path=tmp_path / "ctx.json")
+    t.update(SAFE, 10.0, rows=4, context=(2, 1))
+    t.save()
+    back = ContextualTuner(arms=[SAFE, FAST])
+    assert back.load(tmp_path / "ctx.json")
+    assert np.allclose(back._bucket((2, 1))[:, 0], t._bucket((2, 1))[:, 1])
+
+def test_shared_slots_sum_across_tuners_and_outlive_them(tmp_path):
+    prefix = tmp_path / "shared" / "bandit"
+    a, b = BanditTuner(shared=prefix), BanditTuner(shared=prefix)
+    assert (a._shared.slot, b._shared.slot) == (0, 1) and a.fresh_store
+    a.update(a.arms[0], 10.0)
+    b.update_many([0, 3], [20.0, 30.0])
+    assert a.state()["n"] == [2, 0, 0, 1]            # totals over both slots
+    assert a.snapshot()["shared_slot"] == 0
+    a.close(); b.close()
+
+    again = BanditTuner(shared=prefix)
+    assert again._shared.slot == 0 and not again.fresh_store   # a JSON load here would double count
+    assert again.state()["n"] == [2, 0, 0, 1]
+    assert again.select_arm() in (again.arms[1], again.arms[2])  # the untried arms come first
+    again.close()
@@ -0,0 +1,32 @@
+# tests/test_workspace.py
+from backend.formal_verifier import cache
+from backend.formal_verifier.cache import FormalCache
+from backend.formal_verifier.workspace import Workspace
+
+def _finished_run(ws, status="FAILED"):
+    run_id, work_dir = ws.create()
+    (work_dir / "job" / "engine_0").mkdir(parents=True)
+    (work_dir / "job" / "logfile.txt").write_text("SBY log\n")
+    (work_dir / "job" / "engine_0" / "trace.vcd").write_text("$enddefinitions $end\n")
+    return run_id, ws.finalize(run_id, work_dir, status=status)
+
+def test_runs_finalized_by_another_process_resolve(tmp_path):
+    a, b = Workspace(tmp_path), Workspace(tmp_path)  # two serving workers, one root
+    assert b.runs() == []                             # b scanned before a's run existed
+    run_id, artifacts = _finished_run(a)
+    assert sorted(artifacts) == sorted(a.get(run_id)["artifacts"])
+    for rel in artifacts:
+        assert b.exists(rel) and b.resolve(rel) == a.resolve(rel)
+    assert b.get(run_id)["status"] == "FAILED"
+    assert not b.exists(f"tmp/{tmp_path.name}/../x.vcd") and not b.exists("tmp/formal_nope/job/x.txt")
+
+def test_cache_hit_on_another_workers_artifacts_is_kept(tmp_path, monkeypatch):
+    a, b = Workspace(tmp_path / "work"), Workspace(tmp_path / "work")
+    b.runs()
+    _, artifacts = _finished_run(a)
+    store = FormalCache(tmp_path / "formal")
+    monkeypatch.setattr(cache, "stub_toolchain", lambda: False)
+    assert store.put("k", {"status": "FAILED", "artifacts": artifacts})
+    monkeypatch.setattr(cache, "WORKSPACE", b)
+    assert store.get("k")["artifacts"] == artifacts
+    assert (tmp_path / "formal" / "k.json").exists()